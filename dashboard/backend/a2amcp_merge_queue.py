@@ -3,11 +3,8 @@ A2AMCP-Enhanced Merge Queue for SplitMind
 Provides conflict-aware merging with agent coordination
 """
 
-import asyncio
-import subprocess
 import logging
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from typing import AbstractSet, List, Optional, Dict, Any
 from pathlib import Path
 
 try:
@@ -17,7 +14,9 @@ except ImportError:
     A2AMCP_AVAILABLE = False
 
 from .merge_queue import MergeQueue
-from .models import Task, TaskStatus
+from .models import TaskStatus
+from .task_graph import TaskGraph
+from .task_record import TaskRecord
 
 logger = logging.getLogger(__name__)
 
@@ -41,21 +40,14 @@ class A2AMCPMergeQueue(MergeQueue):
             except Exception as e:
                 logger.error(f"Failed to initialize A2AMCP for merge queue: {e}")
     
-    async def can_merge_task(self, task: Task, all_tasks: List[Task]) -> bool:
+    async def can_merge_task(self, task: TaskRecord, task_graph: TaskGraph,
+                             merged: AbstractSet[str] = frozenset()) -> bool:
         """
         Check if task can be merged, including A2AMCP file lock checks
         """
         # First check traditional dependencies
-        deps_merged = True
-        if hasattr(task, 'dependencies') and task.dependencies:
-            for dep_id in task.dependencies:
-                dep_task = next((t for t in all_tasks if t.id == dep_id), None)
-                if dep_task and dep_task.status != TaskStatus.MERGED:
-                    deps_merged = False
-                    logger.info(f"Task {task.id} waiting for dependency {dep_id}")
-                    break
-        
-        if not deps_merged:
+        if not task_graph.dependencies_merged(task, merged):
+            logger.info(f"Task {task.id} waiting for unmerged dependencies")
             return False
         
         # Check A2AMCP file locks if enabled
@@ -69,7 +61,7 @@ class A2AMCPMergeQueue(MergeQueue):
         
         return True
     
-    async def check_file_locks(self, task: Task) -> bool:
+    async def check_file_locks(self, task: TaskRecord) -> bool:
         """Check if any files modified by task are locked by other agents"""
         project = Project(self.a2amcp_client, task.project_id)
         
@@ -106,7 +98,7 @@ class A2AMCPMergeQueue(MergeQueue):
         
         return True
     
-    async def negotiate_file_access(self, task: Task, file_path: str, locked_by: str) -> bool:
+    async def negotiate_file_access(self, task: TaskRecord, file_path: str, locked_by: str) -> bool:
         """Try to negotiate file access with the locking agent"""
         if not self.coordination_enabled:
             return False
@@ -146,13 +138,7 @@ class A2AMCPMergeQueue(MergeQueue):
     async def get_modified_files(self, branch: str) -> List[str]:
         """Get list of files modified in a branch"""
         try:
-            result = await asyncio.to_thread(
-                subprocess.run,
-                ["git", "diff", "--name-only", "main", branch],
-                cwd=str(self.project_path),
-                capture_output=True,
-                text=True
-            )
+            result = await self.repo.run("diff", "--name-only", "main", branch)
             
             if result.returncode == 0 and result.stdout:
                 return [f.strip() for f in result.stdout.strip().split('\n') if f.strip()]
@@ -162,15 +148,17 @@ class A2AMCPMergeQueue(MergeQueue):
         
         return []
     
-    async def process_queue(self, all_tasks: List[Task]):
+    async def _process_queue(self, task_graph: TaskGraph):
         """
         Process tasks in order, respecting dependencies and A2AMCP locks
         """
         async with self.merge_lock:
             processed = []
+            # Merged in this pass; the graph is shared, so it isn't touched here
+            merged = set()
             
             for task in self.queue[:]:  # Copy to avoid modification during iteration
-                if await self.can_merge_task(task, all_tasks):
+                if await self.can_merge_task(task, task_graph, merged):
                     logger.info(f"🔄 Processing merge for {task.title}...")
                     
                     # Notify agents about pending merge
@@ -181,8 +169,8 @@ class A2AMCPMergeQueue(MergeQueue):
                     
                     if success:
                         processed.append(task)
-                        task.status = TaskStatus.MERGED
-                        task.merged_at = datetime.now()
+                        # Let later tasks in this pass see the merge
+                        merged.add(task.id)
                         logger.info(f"✅ Successfully merged {task.title}")
                         
                         # Update task status
@@ -200,7 +188,7 @@ class A2AMCPMergeQueue(MergeQueue):
             for task in processed:
                 self.queue.remove(task)
     
-    async def broadcast_merge_notification(self, task: Task):
+    async def broadcast_merge_notification(self, task: TaskRecord):
         """Notify all agents about pending merge"""
         if not self.coordination_enabled or not hasattr(task, 'project_id'):
             return
@@ -217,7 +205,7 @@ class A2AMCPMergeQueue(MergeQueue):
         except Exception as e:
             logger.error(f"Failed to broadcast merge notification: {e}")
     
-    async def cleanup_after_merge(self, task: Task):
+    async def cleanup_after_merge(self, task: TaskRecord):
         """Clean up worktree and A2AMCP resources after merge"""
         # Clean up worktree
         await self.cleanup_worktree(task)
@@ -246,7 +234,7 @@ class A2AMCPMergeQueue(MergeQueue):
             except Exception as e:
                 logger.error(f"Error cleaning up A2AMCP resources: {e}")
     
-    async def handle_merge_conflicts(self, task: Task, conflicts: List[str]) -> bool:
+    async def handle_merge_conflicts(self, task: TaskRecord, conflicts: List[str]) -> bool:
         """Enhanced conflict resolution with A2AMCP awareness"""
         # Try standard conflict resolution first
         resolution_success = await super().handle_merge_conflicts(task, conflicts)
@@ -267,12 +255,12 @@ class A2AMCPMergeQueue(MergeQueue):
                 )
                 
                 # Abort the merge
-                subprocess.run(["git", "merge", "--abort"], cwd=str(self.project_path))
+                await self.repo.run("merge", "--abort")
                 return False
         
         return resolution_success
     
-    async def is_file_locked(self, task: Task, file_path: str) -> bool:
+    async def is_file_locked(self, task: TaskRecord, file_path: str) -> bool:
         """Check if a file is currently locked by another agent"""
         if not self.coordination_enabled or not hasattr(task, 'project_id'):
             return False
@@ -17,8 +17,10 @@ except ImportError:
     A2AMCP_AVAILABLE = False
     logging.warning("A2AMCP SDK not available. Agent coordination features will be limited.")
 
+from .admission import AdmissionController
+from .agent_budget import AgentBudget
 from .orchestrator import OrchestratorManager
-from .models import Task, TaskStatus
+from .models import Task
 from .websocket_manager import WebSocketManager, WebSocketMessage
 from .a2amcp_merge_queue import A2AMCPMergeQueue
 
@@ -28,8 +30,9 @@ logger = logging.getLogger(__name__)
 class A2AMCPOrchestrator(OrchestratorManager):
     """Enhanced orchestrator with A2AMCP agent coordination"""
     
-    def __init__(self, ws_manager: WebSocketManager):
-        super().__init__(ws_manager)
+    def __init__(self, ws_manager: WebSocketManager, budget: Optional[AgentBudget] = None,
+                 admission: Optional[AdmissionController] = None):
+        super().__init__(ws_manager, budget, admission)
         self.a2amcp_client = None
         self.coordination_enabled = False
         
@@ -61,20 +64,10 @@ class A2AMCPOrchestrator(OrchestratorManager):
         self.current_project_id = project_id
         self.running = True
         self._stop_event.clear()
+        self.budget.register(project_id, project.agent_weight)
         
         # Initialize merge queue with A2AMCP enhancement if available
-        async def update_task_status(task_id: str, status: TaskStatus):
-            from .project_manager import ProjectManager
-            pm = ProjectManager(project_id)
-            pm.update_task(task_id, {"status": status})
-            await self.ws_manager.broadcast(WebSocketMessage(
-                type="task_status_changed",
-                project_id=project_id,
-                data={
-                    "task_id": task_id,
-                    "status": status
-                }
-            ))
+        update_task_status = self._task_status_updater(project_id)
         
         # Use A2AMCP merge queue if coordination is enabled
         if self.coordination_enabled:
@@ -405,13 +398,7 @@ Remember: Coordination is MANDATORY. If you cannot use these tools, stop immedia
                 return True  # No worktree, no conflicts
             
             # Get modified files
-            result = await asyncio.to_thread(
-                subprocess.run,
-                ["git", "diff", "--name-only", "main", task.branch],
-                cwd=str(pm.project_path),
-                capture_output=True,
-                text=True
-            )
+            result = await pm.repo.run("diff", "--name-only", "main", task.branch)
             
             if result.returncode != 0:
                 return True  # Can't check, assume OK
@@ -0,0 +1,189 @@
+"""
+Host-load admission control for spawning agents
+"""
+import os
+import re
+import shutil
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, List, NamedTuple, Optional, Tuple
+
+from .models import OrchestratorConfig
+from .process_runner import run_command
+
+
+# Deferred spawns remembered for the API
+MAX_DEFERRALS = 100
+
+# Agents admitted this recently may not show up in memory and disk readings yet
+AGENT_WARMUP = 180  # seconds
+
+MB = 1024 * 1024
+
+
+class HostLoad(NamedTuple):
+    """One sample of host resources; None where the platform can't tell"""
+    load_per_cpu: Optional[float]
+    available_memory_mb: Optional[float]
+    free_disk_mb: Optional[float]
+    sampled_at: datetime
+
+
+def _load_per_cpu() -> Optional[float]:
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+async def _available_memory_mb() -> Optional[float]:
+    # Linux
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    # macOS: free, inactive and speculative pages can be handed out without swapping
+    try:
+        result = await run_command(["vm_stat"], timeout=5)
+    except Exception:
+        return None
+    if result.returncode != 0:
+        return None
+    page_size = re.search(r"page size of (\d+) bytes", result.stdout)
+    pages = 0
+    for label in ("Pages free", "Pages inactive", "Pages speculative"):
+        match = re.search(rf"{label}:\s+(\d+)", result.stdout)
+        if match:
+            pages += int(match.group(1))
+    if not page_size or not pages:
+        return None
+    return pages * int(page_size.group(1)) / MB
+
+
+def _free_disk_mb(path: Path) -> Optional[float]:
+    # worktrees/ may not exist yet; check the closest existing parent
+    while not path.exists() and path != path.parent:
+        path = path.parent
+    try:
+        return shutil.disk_usage(path).free / MB
+    except OSError:
+        return None
+
+
+async def sample_host_load(disk_path: Path) -> HostLoad:
+    """Measure load average, available memory and free disk space under ``disk_path``"""
+    return HostLoad(
+        load_per_cpu=_load_per_cpu(),
+        available_memory_mb=await _available_memory_mb(),
+        free_disk_mb=_free_disk_mb(Path(disk_path)),
+        sampled_at=datetime.now()
+    )
+
+
+def admissible(load: HostLoad, config: OrchestratorConfig, wanted: int,
+               warming_up: int = 0) -> Tuple[int, List[str]]:
+    """
+    How many of ``wanted`` agents the host can take, and why it can't take more.
+
+    Each agent is expected to use ``agent_memory_mb`` of memory and
+    ``agent_disk_mb`` of disk, including the ``warming_up`` agents that
+    started too recently to show in the readings; an agent is only
+    admitted if the configured headroom is left afterwards. A threshold of
+    0 turns its check off, and readings the platform can't provide are not
+    checked.
+    """
+    admitted = wanted
+    reasons = []
+
+    if config.max_load_per_cpu and load.load_per_cpu is not None:
+        if load.load_per_cpu >= config.max_load_per_cpu:
+            admitted = 0
+            reasons.append(f"load {load.load_per_cpu:.2f} per CPU "
+                           f"(limit {config.max_load_per_cpu:.2f})")
+
+    checks = (
+        ("memory", load.available_memory_mb, config.min_available_memory_mb, config.agent_memory_mb),
+        ("disk", load.free_disk_mb, config.min_free_disk_mb, config.agent_disk_mb),
+    )
+    for name, available, minimum, per_agent in checks:
+        if not minimum or available is None:
+            continue
+        headroom = available - minimum - warming_up * per_agent
+        if per_agent > 0:
+            fits = max(0, int(headroom // per_agent))
+        else:
+            fits = wanted if headroom > 0 else 0
+        if fits < admitted:
+            admitted = fits
+            reasons.append(f"{name} {available:.0f} MB free "
+                           f"(keeping {minimum} MB, {per_agent} MB per agent)")
+
+    return admitted, reasons
+
+
+class AdmissionController:
+    """
+    Decides how many agents may start now, given the host's load.
+
+    Shared by every project's orchestrator. Each time spawns are held back,
+    the decision is kept in ``deferrals`` (newest last) for the API.
+    """
+
+    def __init__(self):
+        self.last_sample: Optional[HostLoad] = None
+        self.deferrals: Deque[dict] = deque(maxlen=MAX_DEFERRALS)
+        self.deferred_total = 0
+        # (monotonic time, count) of recent admissions
+        self._admitted: Deque[Tuple[float, int]] = deque()
+
+    def warming_up(self) -> int:
+        """Agents admitted within the last AGENT_WARMUP seconds"""
+        cutoff = time.monotonic() - AGENT_WARMUP
+        while self._admitted and self._admitted[0][0] < cutoff:
+            self._admitted.popleft()
+        return sum(count for _, count in self._admitted)
+
+    async def admit(self, project_id: str, wanted: int, disk_path: Path,
+                    config: OrchestratorConfig) -> Tuple[int, List[str]]:
+        """Number of agents the project may start now, and the reasons for any deferral"""
+        if wanted <= 0:
+            return 0, []
+        load = await sample_host_load(disk_path)
+        self.last_sample = load
+        admitted, reasons = admissible(load, config, wanted, self.warming_up())
+        if admitted:
+            self._admitted.append((time.monotonic(), admitted))
+        if admitted < wanted:
+            self.deferred_total += wanted - admitted
+            self.deferrals.append({
+                "project_id": project_id,
+                "at": load.sampled_at,
+                "wanted": wanted,
+                "admitted": admitted,
+                "reasons": reasons,
+                "load": load._asdict()
+            })
+        return admitted, reasons
+
+    def release(self, count: int):
+        """Forget admitted agents that failed to start"""
+        while count > 0 and self._admitted:
+            at, admitted = self._admitted.pop()
+            if admitted > count:
+                self._admitted.append((at, admitted - count))
+            count -= admitted
+
+    def stats(self) -> dict:
+        """Latest host sample and recent deferrals"""
+        return {
+            "last_sample": self.last_sample._asdict() if self.last_sample else None,
+            "warming_up": self.warming_up(),
+            "deferred_total": self.deferred_total,
+            "deferrals": list(self.deferrals)
+        }
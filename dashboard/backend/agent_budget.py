@@ -0,0 +1,109 @@
+"""
+Host-wide agent budget shared by every running project
+"""
+from typing import Dict
+
+
+def fair_shares(capacity: int, demands: Dict[str, int],
+                weights: Dict[str, float]) -> Dict[str, int]:
+    """
+    Split ``capacity`` agent slots across projects by weighted max-min fairness.
+
+    Slots are handed out one at a time to the project with the fewest slots
+    per unit of weight that still wants more, so no project gets more than
+    it asks for and slots a project doesn't need go to the others. Ties go
+    to the project ID that sorts first, keeping the split stable.
+    """
+    shares = {project_id: 0 for project_id in demands}
+    wanting = {project_id for project_id, demand in demands.items() if demand > 0}
+    for _ in range(max(0, capacity)):
+        if not wanting:
+            break
+        project_id = min(
+            wanting,
+            key=lambda p: ((shares[p] + 1) / max(weights.get(p, 1.0), 0.01), p)
+        )
+        shares[project_id] += 1
+        if shares[project_id] >= demands[project_id]:
+            wanting.discard(project_id)
+    return shares
+
+
+class AgentBudget:
+    """
+    Caps the agents running across all projects on this host.
+
+    Each project's orchestrator reports its running agents once per tick
+    and asks for slots before spawning more. A request is granted up to the
+    project's fair share of the capacity (by ``Project.agent_weight``),
+    given what every project last asked for. Running agents are never
+    taken away; a project over its share just waits for its own agents to
+    finish. Everything runs on the event loop, so no locking is needed.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.running: Dict[str, int] = {}
+        self.demand: Dict[str, int] = {}
+        self.weights: Dict[str, float] = {}
+
+    def register(self, project_id: str, weight: float = 1.0):
+        """
+        Add a project that just started.
+
+        Until its first report it counts as wanting every slot, so projects
+        that tick earlier leave it a fair share instead of taking it all.
+        """
+        self.running.setdefault(project_id, 0)
+        self.demand[project_id] = max(self.capacity, self.demand.get(project_id, 0))
+        self.weights[project_id] = weight
+
+    def report(self, project_id: str, running: int, weight: float = 1.0):
+        """Record a project's running agents; its demand drops to just those"""
+        self.running[project_id] = running
+        self.demand[project_id] = running
+        self.weights[project_id] = weight
+
+    def grant(self, project_id: str, wanted: int) -> int:
+        """Reserve up to ``wanted`` new agent slots for a project"""
+        running = self.running.get(project_id, 0)
+        self.demand[project_id] = running + max(0, wanted)
+        share = self.shares().get(project_id, 0)
+        free = self.capacity - sum(self.running.values())
+        granted = max(0, min(wanted, share - running, free))
+        self.running[project_id] = running + granted
+        return granted
+
+    def release(self, project_id: str, count: int):
+        """Return reserved slots that weren't used, e.g. after a failed spawn"""
+        if project_id in self.running:
+            self.running[project_id] = max(0, self.running[project_id] - count)
+
+    def remove(self, project_id: str):
+        """Forget a project that stopped"""
+        self.running.pop(project_id, None)
+        self.demand.pop(project_id, None)
+        self.weights.pop(project_id, None)
+
+    def shares(self) -> Dict[str, int]:
+        """Current fair share of every reporting project"""
+        return fair_shares(self.capacity, self.demand, self.weights)
+
+    def stats(self) -> dict:
+        """Global and per-project slot usage"""
+        in_use = sum(self.running.values())
+        shares = self.shares()
+        return {
+            "capacity": self.capacity,
+            "in_use": in_use,
+            "available": max(0, self.capacity - in_use),
+            "projects": {
+                project_id: {
+                    "running": self.running[project_id],
+                    "demand": self.demand.get(project_id, 0),
+                    "weight": self.weights.get(project_id, 1.0),
+                    "fair_share": shares.get(project_id, 0)
+                }
+                for project_id in sorted(self.running)
+            }
+        }
@@ -1,7 +1,7 @@
 """
 FastAPI backend for SplitMind Dashboard
 """
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Header, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
@@ -9,6 +9,7 @@ from typing import List, Optional, Dict
 from pathlib import Path
 from contextlib import asynccontextmanager
 import asyncio
+import base64
 import json
 import os
 import platform
@@ -21,7 +22,14 @@ from .models import (
 )
 from .config import config_manager
 from .project_manager import ProjectManager
+from .task_cache import task_cache
+from .loop_monitor import loop_monitor
+from .task_store import TASK_STORES, TaskConflictError
 from .orchestrator import OrchestratorManager
+from .supervisor import OrchestratorSupervisor
+from .git_repo import GitRepo
+from .process_runner import MERGE_TIMEOUT, run_command
+from .retries import retry_updates
 from .websocket_manager import WebSocketManager
 from .claude_integration import claude
 
@@ -36,28 +44,33 @@ except ImportError:
 # WebSocket manager
 ws_manager = WebSocketManager()
 
-# Orchestrator manager - use A2AMCP version if available
+# Orchestrator class for each project - use A2AMCP version if available
 if a2amcp_available and is_a2amcp_available():
     print("🤝 Using A2AMCP-enhanced orchestrator for agent coordination")
-    orchestrator = A2AMCPOrchestrator(ws_manager)
+    orchestrator_class = A2AMCPOrchestrator
 else:
     if a2amcp_available:
         print(
             "⚠️  A2AMCP SDK available but server not running. Using standard orchestrator.")
     else:
         print("📦 A2AMCP SDK not installed. Using standard orchestrator.")
-    orchestrator = OrchestratorManager(ws_manager)
+    orchestrator_class = OrchestratorManager
+
+# Runs one orchestrator per active project under a shared agent budget
+supervisor = OrchestratorSupervisor(ws_manager, orchestrator_class)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle"""
     # Startup
+    loop_monitor.start()
     print("🚀 SplitMind Dashboard API started")
     yield
     # Shutdown
     try:
-        await orchestrator.stop()
+        await loop_monitor.stop()
+        await supervisor.stop()
         # Close all websocket connections
         for conn in list(ws_manager.active_connections):
             try:
@@ -84,6 +97,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count"],
 )
 
 
@@ -148,8 +162,22 @@ async def get_project(project_id: str):
 async def update_project(project_id: str, updates: dict):
     """Update a project"""
     try:
+        # Carry tasks over when the project switches task store backends
+        migrated_tasks = None
+        current = config_manager.get_project(project_id)
+        new_store = updates.get("task_store")
+        if current and new_store and new_store != current.task_store:
+            if new_store not in TASK_STORES:
+                raise HTTPException(
+                    status_code=400, detail=f"Unknown task store '{new_store}'")
+            migrated_tasks = ProjectManager(project_id).get_tasks()
+
         updated_project = config_manager.update_project(project_id, updates)
 
+        if migrated_tasks is not None:
+            ProjectManager(project_id).save_tasks(migrated_tasks)
+            print(f"📦 Moved {len(migrated_tasks)} tasks to the {new_store} task store")
+
         # Notify via WebSocket
         await ws_manager.broadcast(WebSocketMessage(
             type="project_updated",
@@ -172,70 +200,46 @@ async def delete_project(project_id: str, cleanup_files: bool = False):
             raise HTTPException(status_code=404, detail="Project not found")
 
         # Stop orchestrator if running for this project
-        if orchestrator.current_project_id == project_id:
-            await orchestrator.stop()
+        await supervisor.stop(project_id)
 
         if cleanup_files:
             # Perform complete cleanup like reset endpoint but more thorough
             pm = ProjectManager(project_id)
+            repo = pm.repo
 
             # Kill all tmux sessions for this project
-            result = subprocess.run(
-                ["tmux", "ls"], capture_output=True, text=True)
+            result = await run_command(["tmux", "ls"])
             if result.returncode == 0:
                 for line in result.stdout.strip().split('\n'):
                     if project_id in line:
                         session_name = line.split(':')[0]
-                        subprocess.run(
+                        await run_command(
                             ["tmux", "kill-session", "-t", session_name])
 
             # Remove all worktrees
             worktrees_dir = Path(pm.project_path) / "worktrees"
             if worktrees_dir.exists():
                 # First, remove git worktrees properly
-                result = subprocess.run(
-                    ["git", "worktree", "list"],
-                    cwd=pm.project_path,
-                    capture_output=True,
-                    text=True
-                )
+                result = await repo.run("worktree", "list")
                 if result.returncode == 0:
                     # Skip main worktree
                     for line in result.stdout.strip().split('\n')[1:]:
                         if line:
                             worktree_path = line.split()[0]
-                            subprocess.run(
-                                ["git", "worktree", "remove",
-                                    worktree_path, "--force"],
-                                cwd=pm.project_path,
-                                capture_output=True
-                            )
+                            await repo.run("worktree", "remove", worktree_path, "--force")
 
                 # Then remove the directory
                 import shutil
                 shutil.rmtree(worktrees_dir, ignore_errors=True)
 
             # Clean up git branches (except main/master)
-            subprocess.run(
-                ["git", "checkout", "main"],
-                cwd=pm.project_path,
-                capture_output=True
-            )
-            result = subprocess.run(
-                ["git", "branch"],
-                cwd=pm.project_path,
-                capture_output=True,
-                text=True
-            )
+            await repo.run("checkout", "main")
+            result = await repo.run("branch")
             if result.returncode == 0:
                 for line in result.stdout.strip().split('\n'):
                     branch = line.strip().replace('* ', '')
                     if branch not in ['main', 'master'] and not branch.startswith('('):
-                        subprocess.run(
-                            ["git", "branch", "-D", branch],
-                            cwd=pm.project_path,
-                            capture_output=True
-                        )
+                        await repo.run("branch", "-D", branch)
 
             # Remove .splitmind directory completely
             splitmind_dir = Path(pm.project_path) / ".splitmind"
@@ -273,73 +277,47 @@ async def reset_project(project_id: str):
     """Reset a project - removes all tasks, worktrees, and tmux sessions"""
     try:
         pm = ProjectManager(project_id)
+        repo = pm.repo
 
         # Stop orchestrator if running
-        if orchestrator.current_project_id == project_id:
-            await orchestrator.stop()
+        await supervisor.stop(project_id)
 
         # Kill all tmux sessions for this project
-        import subprocess
-        result = subprocess.run(["tmux", "ls"], capture_output=True, text=True)
+        result = await run_command(["tmux", "ls"])
         if result.returncode == 0:
             for line in result.stdout.strip().split('\n'):
                 if project_id in line:
                     session_name = line.split(':')[0]
-                    subprocess.run(
+                    await run_command(
                         ["tmux", "kill-session", "-t", session_name])
 
         # Remove all worktrees
         worktrees_dir = Path(pm.project_path) / "worktrees"
         if worktrees_dir.exists():
             # First, remove git worktrees properly
-            result = subprocess.run(
-                ["git", "worktree", "list"],
-                cwd=pm.project_path,
-                capture_output=True,
-                text=True
-            )
+            result = await repo.run("worktree", "list")
             if result.returncode == 0:
                 # Skip main worktree
                 for line in result.stdout.strip().split('\n')[1:]:
                     if line:
                         worktree_path = line.split()[0]
-                        subprocess.run(
-                            ["git", "worktree", "remove",
-                                worktree_path, "--force"],
-                            cwd=pm.project_path,
-                            capture_output=True
-                        )
+                        await repo.run("worktree", "remove", worktree_path, "--force")
 
             # Then remove the directory
             import shutil
             shutil.rmtree(worktrees_dir, ignore_errors=True)
 
         # Clean up git branches (except main/master)
-        subprocess.run(
-            ["git", "checkout", "main"],
-            cwd=pm.project_path,
-            capture_output=True
-        )
-        result = subprocess.run(
-            ["git", "branch"],
-            cwd=pm.project_path,
-            capture_output=True,
-            text=True
-        )
+        await repo.run("checkout", "main")
+        result = await repo.run("branch")
         if result.returncode == 0:
             for line in result.stdout.strip().split('\n'):
                 branch = line.strip().replace('* ', '')
                 if branch not in ['main', 'master']:
-                    subprocess.run(
-                        ["git", "branch", "-D", branch],
-                        cwd=pm.project_path,
-                        capture_output=True
-                    )
+                    await repo.run("branch", "-D", branch)
 
-        # Remove tasks.md
-        tasks_file = Path(pm.project_path) / ".splitmind" / "tasks.md"
-        if tasks_file.exists():
-            tasks_file.unlink()
+        # Clear the project's tasks
+        pm.reset_tasks()
 
         # Clean up status files
         status_dir = Path("/tmp/splitmind-status")
@@ -366,7 +344,7 @@ async def get_project_stats(project_id: str):
     """Get project statistics"""
     try:
         pm = ProjectManager(project_id)
-        return pm.get_stats()
+        return await pm.get_stats()
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -375,12 +353,101 @@ async def get_project_stats(project_id: str):
 # Task Management Endpoints
 # ============================================================================
 
+def _etag(version: int) -> str:
+    """Format a task or store version as an ETag"""
+    return f'"{version}"'
+
+
+def _parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Version required by an If-Match header, or None when any version is fine"""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid If-Match header: {if_match}")
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header lists the given ETag"""
+    if if_none_match is None:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+def _encode_cursor(key: tuple) -> str:
+    """Opaque page cursor for a task page key"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+
+def _parse_cursor(cursor: Optional[str]) -> Optional[tuple]:
+    """Task page key from a cursor returned by the task list"""
+    if cursor is None:
+        return None
+    try:
+        priority, task_id, task_key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (int(priority), int(task_id), str(task_key))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
+
+
 @app.get("/api/projects/{project_id}/tasks", response_model=List[Task])
-async def get_tasks(project_id: str):
-    """Get all tasks for a project"""
+async def get_tasks(project_id: str, response: Response,
+                    status: Optional[List[TaskStatus]] = Query(None),
+                    wave: Optional[int] = None,
+                    limit: Optional[int] = Query(None, ge=1),
+                    cursor: Optional[str] = None,
+                    include_archived: bool = False,
+                    if_none_match: Optional[str] = Header(None)):
+    """
+    Get a project's tasks, optionally filtered by status and wave.
+
+    Archived MERGED tasks are left out unless ``include_archived`` is set.
+
+    With ``limit``, the X-Next-Cursor header holds the ``cursor`` for the
+    next page. The ETag is the store revision; a matching If-None-Match
+    gets an empty 304.
+    """
+    after = _parse_cursor(cursor)
+    try:
+        pm = ProjectManager(project_id)
+        etag = _etag(pm.get_revision())
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+        tasks, next_key, total = pm.list_tasks(status, wave, limit, after, include_archived)
+        response.headers["ETag"] = etag
+        response.headers["X-Total-Count"] = str(total)
+        if next_key is not None:
+            response.headers["X-Next-Cursor"] = _encode_cursor(next_key)
+        return [pm.task_dict(task) for task in tasks]
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.get("/api/projects/{project_id}/tasks/changes")
+async def get_task_changes(project_id: str, since: int = Query(0, ge=0)):
+    """
+    Tasks written and IDs deleted after revision ``since``.
+
+    Clients poll with the returned ``revision``; when ``reset`` is true the
+    changes since that revision are no longer known and the full task list
+    must be fetched again.
+    """
     try:
         pm = ProjectManager(project_id)
-        return pm.get_tasks()
+        changes = pm.get_changes(since)
+        changes["tasks"] = [task.dict() for task in changes["tasks"]]
+        return changes
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -388,11 +455,11 @@ async def get_tasks(project_id: str):
 @app.post("/api/projects/{project_id}/tasks", response_model=Task)
 async def create_task(project_id: str, title: str, description: Optional[str] = None,
                       prompt: Optional[str] = None, priority: int = 0,
-                      dependencies: Optional[List[str]] = None):
+                      dependencies: Optional[List[str]] = None, wave: Optional[int] = None):
     """Create a new task"""
     try:
         pm = ProjectManager(project_id)
-        task = pm.add_task(title, description, dependencies, priority, prompt)
+        task = pm.add_task(title, description, dependencies, priority, prompt, wave)
 
         # Notify via WebSocket
         await ws_manager.broadcast(WebSocketMessage(
@@ -407,13 +474,16 @@ async def create_task(project_id: str, title: str, description: Optional[str] =
 
 
 @app.put("/api/projects/{project_id}/tasks/{task_id}", response_model=Task)
-async def update_task(project_id: str, task_id: str, updates: dict):
-    """Update a task"""
+async def update_task(project_id: str, task_id: str, updates: dict, response: Response,
+                      if_match: Optional[str] = Header(None)):
+    """Update a task; with If-Match, only if it is still at that version"""
     print(
         f"🔧 Update task request: project_id={project_id}, task_id={task_id}, updates={updates}")
+    expected_version = _parse_if_match(if_match)
     try:
         pm = ProjectManager(project_id)
-        task = pm.update_task(task_id, updates)
+        task = pm.update_task(task_id, updates, expected_version)
+        response.headers["ETag"] = _etag(task.version)
 
         # Notify via WebSocket
         await ws_manager.broadcast(WebSocketMessage(
@@ -424,6 +494,9 @@ async def update_task(project_id: str, task_id: str, updates: dict):
 
         print(f"✅ Task updated successfully: {task.title}")
         return task
+    except TaskConflictError as e:
+        print(f"⚠️ Task update conflict: {str(e)}")
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         print(f"❌ Task update failed: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -432,12 +505,74 @@ async def update_task(project_id: str, task_id: str, updates: dict):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.patch("/api/projects/{project_id}/tasks", response_model=List[Task])
+async def update_tasks(project_id: str, updates: Dict[str, dict]):
+    """
+    Update several tasks at once, keyed by task ID.
+
+    A ``version`` in a task's updates makes the whole batch fail with 409 if
+    that task was changed since it was read.
+    """
+    expected = {
+        task_id: fields.pop("version")
+        for task_id, fields in updates.items() if "version" in fields
+    }
+    try:
+        pm = ProjectManager(project_id)
+        tasks = pm.update_tasks(updates, expected)
+
+        # Notify via WebSocket once for the whole batch
+        await ws_manager.broadcast(WebSocketMessage(
+            type="tasks_updated",
+            project_id=project_id,
+            data={"tasks": [task.dict() for task in tasks]}
+        ))
+
+        return tasks
+    except TaskConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/projects/{project_id}/tasks/export")
+async def export_tasks(project_id: str):
+    """Write the project's tasks to .splitmind/tasks.md"""
+    try:
+        pm = ProjectManager(project_id)
+        path = pm.export_tasks()
+        return {"path": str(path), "tasks": len(pm.get_tasks_snapshot())}
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.post("/api/projects/{project_id}/tasks/import")
+async def import_tasks(project_id: str):
+    """Replace the project's tasks with the contents of .splitmind/tasks.md"""
+    try:
+        pm = ProjectManager(project_id)
+        count = pm.import_tasks()
+
+        await ws_manager.broadcast(WebSocketMessage(
+            type="tasks_reset",
+            project_id=project_id,
+            data={"imported": count}
+        ))
+
+        return {"imported": count}
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
 @app.delete("/api/projects/{project_id}/tasks/{task_id}")
-async def delete_task(project_id: str, task_id: str):
-    """Delete a task"""
+async def delete_task(project_id: str, task_id: str, if_match: Optional[str] = Header(None)):
+    """Delete a task; with If-Match, only if it is still at that version"""
+    expected_version = _parse_if_match(if_match)
     try:
         pm = ProjectManager(project_id)
-        pm.delete_task(task_id)
+        pm.delete_task(task_id, expected_version)
 
         # Notify via WebSocket
         await ws_manager.broadcast(WebSocketMessage(
@@ -447,6 +582,37 @@ async def delete_task(project_id: str, task_id: str):
         ))
 
         return {"message": "Task deleted"}
+    except TaskConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.post("/api/projects/{project_id}/tasks/{task_id}/retry", response_model=Task)
+async def retry_task(project_id: str, task_id: str):
+    """Give a quarantined or backing-off task a fresh retry budget and requeue it"""
+    try:
+        pm = ProjectManager(project_id)
+        task = next((t for t in pm.get_tasks_snapshot() if t.id == task_id), None)
+
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+
+        if task.status not in (TaskStatus.QUARANTINED, TaskStatus.UNCLAIMED):
+            raise HTTPException(
+                status_code=400, detail="Only quarantined or unclaimed tasks can be retried")
+
+        task = pm.update_task(task_id, retry_updates(), task.version)
+
+        await ws_manager.broadcast(WebSocketMessage(
+            type="task_updated",
+            project_id=project_id,
+            data=task.dict()
+        ))
+
+        return task
+    except TaskConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -456,7 +622,7 @@ async def merge_task(project_id: str, task_id: str, force: bool = False):
     """Manually merge a completed task"""
     try:
         pm = ProjectManager(project_id)
-        task = next((t for t in pm.get_tasks() if t.id == task_id), None)
+        task = next((t for t in pm.get_tasks_snapshot() if t.id == task_id), None)
 
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
@@ -466,75 +632,49 @@ async def merge_task(project_id: str, task_id: str, force: bool = False):
                 status_code=400, detail="Task must be completed to merge")
 
         # Use the existing merge script
-        import subprocess
         from pathlib import Path
         from datetime import datetime
 
+        repo = pm.repo
+
         # Simple direct merge approach
         try:
             # Ensure we're on main branch
-            checkout_main = subprocess.run(
-                ["git", "checkout", "main"],
-                cwd=str(pm.project_path),
-                capture_output=True,
-                text=True
-            )
+            checkout_main = await repo.run("checkout", "main")
 
             if checkout_main.returncode != 0:
                 raise Exception(
                     f"Failed to checkout main: {checkout_main.stderr}")
 
             # Pull latest main
-            pull_result = subprocess.run(
-                ["git", "pull", "origin", "main"],
-                cwd=str(pm.project_path),
-                capture_output=True,
-                text=True
-            )
+            pull_result = await repo.run("pull", "origin", "main", timeout=MERGE_TIMEOUT)
 
             # Check if the branch exists locally
-            branch_check = subprocess.run(
-                ["git", "rev-parse", "--verify", task.branch],
-                cwd=str(pm.project_path),
-                capture_output=True,
-                text=True
-            )
+            branch_check = await repo.run("rev-parse", "--verify", task.branch)
 
             if branch_check.returncode != 0:
                 # Branch doesn't exist, check in worktree
                 worktree_path = pm.project_path / "worktrees" / task.branch
                 if worktree_path.exists():
                     # Push the branch from worktree to main repo
-                    push_result = subprocess.run(
-                        ["git", "push", "origin", f"HEAD:{task.branch}"],
-                        cwd=str(worktree_path),
-                        capture_output=True,
-                        text=True
-                    )
+                    push_result = await GitRepo(worktree_path).run(
+                        "push", "origin", f"HEAD:{task.branch}", timeout=MERGE_TIMEOUT)
 
                     if push_result.returncode != 0:
                         raise Exception(
                             f"Failed to push branch from worktree: {push_result.stderr}")
 
                     # Fetch the branch in main repo
-                    fetch_result = subprocess.run(
-                        ["git", "fetch", "origin", task.branch],
-                        cwd=str(pm.project_path),
-                        capture_output=True,
-                        text=True
-                    )
+                    fetch_result = await repo.run("fetch", "origin", task.branch,
+                                                  timeout=MERGE_TIMEOUT)
                 else:
                     raise Exception(
                         f"Branch {task.branch} not found locally or in worktrees")
 
             # Now merge the branch
-            merge_result = subprocess.run(
-                ["git", "merge", task.branch, "--no-ff",
-                    "-m", f"Merge task: {task.title}"],
-                cwd=str(pm.project_path),
-                capture_output=True,
-                text=True
-            )
+            merge_result = await repo.run(
+                "merge", task.branch, "--no-ff", "-m", f"Merge task: {task.title}",
+                timeout=MERGE_TIMEOUT)
 
             if merge_result.returncode == 0:
                 result = merge_result
@@ -543,14 +683,14 @@ async def merge_task(project_id: str, task_id: str, force: bool = False):
 
         except Exception as e:
             # If direct merge fails, fall back to the auto-merge script
-            result = subprocess.run([
+            result = await run_command([
                 "python",
                 str(Path(__file__).parent.parent.parent /
                     "scripts" / "auto-merge.py"),
                 task.branch,
                 "--strategy", "merge",
                 "--json"
-            ], cwd=str(pm.project_path), capture_output=True, text=True)
+            ], cwd=pm.project_path, timeout=MERGE_TIMEOUT)
 
         if result.returncode == 0:
             # Update task status to merged
@@ -597,7 +737,7 @@ async def get_agents(project_id: str):
     """Get running agents for a project"""
     try:
         pm = ProjectManager(project_id)
-        return pm.get_agents()
+        return await pm.get_agents()
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -606,8 +746,6 @@ async def get_agents(project_id: str):
 async def launch_iterm(project_id: str, agent_id: str):
     """Launch iTerm for a specific agent session"""
     try:
-        import subprocess
-
         # The agent_id is the actual tmux session name (might be truncated)
         # AppleScript to open iTerm and attach to tmux session
         applescript = f'''
@@ -619,7 +757,7 @@ async def launch_iterm(project_id: str, agent_id: str):
         end tell
         '''
 
-        subprocess.run(['osascript', '-e', applescript])
+        await run_command(['osascript', '-e', applescript])
 
         return {"message": f"Launched iTerm for session {agent_id}"}
     except Exception as e:
@@ -630,17 +768,14 @@ async def launch_iterm(project_id: str, agent_id: str):
 async def launch_agent_monitor(project_id: str):
     """Launch tmux session with split panes showing all active agents"""
     try:
-        import subprocess
         from pathlib import Path
 
         # Get the tmux viewer script path
         viewer_script = Path(__file__).parent / "tmux_viewer.py"
 
         # Check if any agents are running
-        result = subprocess.run(
-            ["tmux", "list-sessions", "-F", "#{session_name}"],
-            capture_output=True,
-            text=True
+        result = await run_command(
+            ["tmux", "list-sessions", "-F", "#{session_name}"]
         )
 
         if result.returncode != 0 or not result.stdout:
@@ -670,7 +805,7 @@ async def launch_agent_monitor(project_id: str):
         end tell
         '''
 
-        subprocess.run(["osascript", "-e", applescript])
+        await run_command(["osascript", "-e", applescript])
 
         return {
             "message": f"Launched tmux monitor for {len(sessions)} active agents",
@@ -688,32 +823,31 @@ async def reset_agent_tasks(project_id: str):
     """Reset all claimed/in-progress tasks and kill their tmux sessions"""
     try:
         pm = ProjectManager(project_id)
-        tasks = pm.get_tasks()
-        agents = pm.get_agents()
+        tasks = pm.get_tasks_snapshot()
+        agents = await pm.get_agents()
 
-        reset_count = 0
         killed_sessions = []
 
         # Kill all tmux sessions for this project
         for agent in agents:
             try:
-                subprocess.run(
-                    ["tmux", "kill-session", "-t", agent.session_name],
-                    capture_output=True,
-                    text=True
+                await run_command(
+                    ["tmux", "kill-session", "-t", agent.session_name]
                 )
                 killed_sessions.append(agent.session_name)
             except:
                 pass
 
         # Reset ALL tasks to unclaimed (except merged ones)
+        resets = {}
         for task in tasks:
             if task.status != TaskStatus.MERGED:
-                pm.update_task(task.id, {
+                resets[task.id] = {
                     "status": TaskStatus.UNCLAIMED,
                     "session": None
-                })
-                reset_count += 1
+                }
+        pm.update_tasks(resets)
+        reset_count = len(resets)
 
         # Notify via WebSocket
         await ws_manager.broadcast(WebSocketMessage(
@@ -750,7 +884,7 @@ async def get_orchestrator_config():
 async def update_orchestrator_config(config: OrchestratorConfig):
     """Update orchestrator configuration"""
     config_manager.update_orchestrator_config(config)
-    orchestrator.update_config(config)
+    supervisor.update_config(config)
     return config
 
 
@@ -758,41 +892,66 @@ async def update_orchestrator_config(config: OrchestratorConfig):
 async def start_orchestrator(project_id: str):
     """Start the orchestrator for a project"""
     try:
-        await orchestrator.start(project_id)
+        await supervisor.start(project_id)
         return {"message": "Orchestrator started"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/api/orchestrator/stop")
-async def stop_orchestrator():
-    """Stop the orchestrator"""
-    await orchestrator.stop()
+async def stop_orchestrator(project_id: Optional[str] = None):
+    """Stop the orchestrator for a project, or for all projects"""
+    await supervisor.stop(project_id)
     return {"message": "Orchestrator stopped"}
 
 
 @app.get("/api/orchestrator/status")
 async def get_orchestrator_status():
-    """Get orchestrator status"""
+    """Get orchestrator status for every running project"""
+    status = supervisor.status()
+    projects = status["projects"]
+    # Single-project clients only look at current_project
+    status["current_project"] = projects[0] if projects else None
+    return status
+
+
+@app.get("/api/orchestrator/agents")
+async def get_agent_slots():
+    """Get host-wide and per-project agent slot usage"""
+    return supervisor.budget.stats()
+
+
+@app.get("/api/orchestrator/admission")
+async def get_admission_status():
+    """Get the latest host load sample and spawns deferred because of load"""
+    return supervisor.admission.stats()
+
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Get internal performance counters"""
     return {
-        "running": orchestrator.is_running(),
-        "current_project": orchestrator.current_project_id
+        "task_cache": task_cache.stats(),
+        "event_loop": loop_monitor.stats()
     }
 
 
 @app.post("/api/orchestrator/check-tasks")
-async def check_orchestrator_tasks():
+async def check_orchestrator_tasks(project_id: Optional[str] = None):
     """Manually trigger task status check"""
-    if orchestrator.current_project_id:
-        await orchestrator._check_agent_status()
-        return {"message": "Task check completed"}
-    else:
+    project_ids = [project_id] if project_id else supervisor.running_projects()
+    orchestrators = [o for o in map(supervisor.get, project_ids) if o]
+    if not orchestrators:
         raise HTTPException(status_code=400, detail="No active project")
+    for orchestrator in orchestrators:
+        await orchestrator._check_agent_status()
+    return {"message": "Task check completed"}
 
 
 @app.get("/api/projects/{project_id}/coordination-stats")
 async def get_coordination_stats(project_id: str):
     """Get A2AMCP coordination statistics for a project"""
+    orchestrator = supervisor.get(project_id)
     if hasattr(orchestrator, 'get_coordination_stats'):
         stats = await orchestrator.get_coordination_stats(project_id)
         return stats
@@ -1008,12 +1167,18 @@ Key Requirements:
 
 This task is part of a structured development approach. Focus on delivering high-quality, production-ready code."""
 
+                try:
+                    wave = int(task_info.get("wave", 1))
+                except (TypeError, ValueError):
+                    wave = None
+
                 task = pm.add_task(
                     task_info["title"],
                     task_info["description"],
                     dependencies=[],  # Dependencies handled by wave structure
                     priority=task_info.get("priority", 5),
-                    prompt=custom_prompt
+                    prompt=custom_prompt,
+                    wave=wave
                 )
 
                 created_tasks.append(task)
@@ -1062,6 +1227,7 @@ async def get_git_status(project_id: str):
             raise HTTPException(status_code=404, detail="Project not found")
 
         project_path = Path(project.path)
+        repo = GitRepo(project_path)
         if not project_path.exists():
             raise HTTPException(
                 status_code=404, detail="Project path does not exist")
@@ -1079,34 +1245,16 @@ async def get_git_status(project_id: str):
         if is_git_repo:
             try:
                 # Get current branch
-                result = subprocess.run(
-                    ["git", "branch", "--show-current"],
-                    cwd=str(project_path),
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
+                result = await repo.run("branch", "--show-current", check=True)
                 git_info["current_branch"] = result.stdout.strip()
 
                 # Check for uncommitted changes
-                result = subprocess.run(
-                    ["git", "status", "--porcelain"],
-                    cwd=str(project_path),
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
+                result = await repo.run("status", "--porcelain", check=True)
                 git_info["has_changes"] = bool(result.stdout.strip())
 
                 # Get remote URL if exists
                 try:
-                    result = subprocess.run(
-                        ["git", "remote", "get-url", "origin"],
-                        cwd=str(project_path),
-                        capture_output=True,
-                        text=True,
-                        check=True
-                    )
+                    result = await repo.run("remote", "get-url", "origin", check=True)
                     git_info["remote_url"] = result.stdout.strip()
                 except subprocess.CalledProcessError:
                     git_info["remote_url"] = None
@@ -1131,6 +1279,7 @@ async def init_git_repo(project_id: str):
             raise HTTPException(status_code=404, detail="Project not found")
 
         project_path = Path(project.path)
+        repo = GitRepo(project_path)
         if not project_path.exists():
             raise HTTPException(
                 status_code=404, detail="Project path does not exist")
@@ -1142,12 +1291,7 @@ async def init_git_repo(project_id: str):
                 status_code=400, detail="Already a Git repository")
 
         # Initialize Git repository
-        result = subprocess.run(
-            ["git", "init"],
-            cwd=str(project_path),
-            capture_output=True,
-            text=True
-        )
+        result = await repo.run("init")
 
         if result.returncode != 0:
             raise HTTPException(
@@ -1353,10 +1497,8 @@ async def check_claude_cli():
     """Check if Claude CLI is installed and available"""
     try:
         # Check if claude command exists
-        result = subprocess.run(
-            ["which", "claude"],
-            capture_output=True,
-            text=True
+        result = await run_command(
+            ["which", "claude"]
         )
 
         cli_installed = result.returncode == 0
@@ -1366,10 +1508,8 @@ async def check_claude_cli():
         version = None
         if cli_installed:
             try:
-                version_result = subprocess.run(
+                version_result = await run_command(
                     ["claude", "--version"],
-                    capture_output=True,
-                    text=True,
                     timeout=5
                 )
                 if version_result.returncode == 0:
@@ -1403,10 +1543,8 @@ async def list_mcps():
             }
 
         # Run claude mcp list command
-        result = subprocess.run(
+        result = await run_command(
             ["claude", "mcp", "list"],
-            capture_output=True,
-            text=True,
             timeout=10
         )
 
@@ -1511,10 +1649,8 @@ async def install_mcp(name: str, command: Optional[str] = None):
             cmd = ["claude", "mcp", "add", "-g", name]
 
         # Run the install command
-        result = subprocess.run(
+        result = await run_command(
             cmd,
-            capture_output=True,
-            text=True,
             timeout=30
         )
 
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark tasks.md parsing and scanning with TaskRecords versus pydantic Task models
+"""
+
+import sys
+import os
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models import Task, TaskStatus
+from backend.task_graph import TaskGraph
+from backend.task_store import build_tasks, parse_tasks_markdown, render_tasks_markdown
+
+
+def make_tasks_file(path: Path, count: int):
+    """Write a tasks.md with ``count`` tasks in a mix of statuses"""
+    statuses = list(TaskStatus)
+    tasks = [
+        Task(
+            id=f"task-{i}",
+            task_id=i,
+            title=f"Task {i}",
+            description=f"Implement part {i} of the plan",
+            status=statuses[i % len(statuses)],
+            branch=f"task-{i}",
+            dependencies=[f"task-{i - 1}"] if i > 1 else [],
+            priority=i % 3,
+        )
+        for i in range(1, count + 1)
+    ]
+    path.write_text(render_tasks_markdown(tasks))
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    """Fastest of several runs, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def scan(tasks):
+    """The kind of pass the scheduler makes over every task"""
+    up_next = [t for t in tasks if t.status == TaskStatus.UP_NEXT]
+    in_progress = sum(1 for t in tasks if t.status == TaskStatus.IN_PROGRESS)
+    by_id = {t.id: t for t in tasks}
+    return len(up_next), in_progress, len(by_id)
+
+
+def run(count: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "tasks.md"
+        make_tasks_file(path, count)
+
+        raw = parse_tasks_markdown(path)
+        records = build_tasks([dict(t) for t in raw])
+        models = [Task(**dict(t)) for t in raw]
+
+        results = {
+            "parse file": best_of(lambda: parse_tasks_markdown(path)),
+            "build records": best_of(lambda: build_tasks([dict(t) for t in raw])),
+            "build Task models": best_of(lambda: [Task(**dict(t)) for t in raw]),
+            "scan records": best_of(lambda: scan(records)),
+            "scan Task models": best_of(lambda: scan(models)),
+            "graph over records": best_of(lambda: TaskGraph(records)),
+            "records -> Task models": best_of(lambda: [r.to_task() for r in records]),
+        }
+
+    print(f"\n📊 {count} tasks")
+    for name, ms in results.items():
+        print(f"   {name:<24} {ms:9.2f} ms")
+
+
+if __name__ == "__main__":
+    for count in (1000, 10000):
+        run(count)
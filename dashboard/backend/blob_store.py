@@ -0,0 +1,95 @@
+"""
+Content-addressed storage for large text fields
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from .task_journal import write_atomic
+
+
+# Inline values are replaced by BLOB_PREFIX followed by the SHA-256 of the text
+BLOB_PREFIX = "blob:sha256:"
+BLOB_REF = re.compile(re.escape(BLOB_PREFIX) + "[0-9a-f]{64}")
+
+# Longer texts, and any text spanning several lines, are moved to blobs
+INLINE_MAX = 256
+
+# Blobs never change, so recently read ones are kept in memory by digest
+CACHE_SIZE = 256
+
+_cache: "OrderedDict[str, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def is_blob_ref(value) -> bool:
+    """Whether a stored field value is a blob reference rather than the text itself"""
+    return isinstance(value, str) and BLOB_REF.fullmatch(value) is not None
+
+
+class BlobStore:
+    """
+    Stores texts as files named after their SHA-256 digest.
+
+    Metadata files such as tasks.md and projects.json keep only the short
+    reference returned by ``put_large``; ``resolve`` turns it back into the
+    text when the value is actually needed.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:]
+
+    def put(self, text: str) -> str:
+        """Store a text and return its reference"""
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(path, data)
+        return BLOB_PREFIX + digest
+
+    def put_large(self, text: Optional[str]) -> Optional[str]:
+        """
+        Store a text if it is too large to keep inline, returning what to keep.
+
+        ``text`` is always taken as text: one that starts with BLOB_PREFIX
+        goes to a blob too, so a stored value with the prefix is always a
+        reference.
+        """
+        if not isinstance(text, str):
+            return text
+        if len(text) <= INLINE_MAX and "\n" not in text and not text.startswith(BLOB_PREFIX):
+            return text
+        return self.put(text)
+
+    def get(self, ref: str) -> Optional[str]:
+        """Read the text for a reference, or None if the blob is missing"""
+        digest = ref[len(BLOB_PREFIX):]
+        with _cache_lock:
+            text = _cache.get(digest)
+            if text is not None:
+                _cache.move_to_end(digest)
+                return text
+
+        try:
+            text = self._path(digest).read_bytes().decode('utf-8')
+        except FileNotFoundError:
+            print(f"⚠️  Missing blob {digest} in {self.root}")
+            return None
+
+        with _cache_lock:
+            _cache[digest] = text
+            if len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+        return text
+
+    def resolve(self, value: Optional[str]) -> Optional[str]:
+        """The text for a field value that may be a blob reference"""
+        return self.get(value) if is_blob_ref(value) else value
@@ -3,9 +3,18 @@ Configuration management for SplitMind
 """
 import json
 import os
+import shutil
 from pathlib import Path
 from typing import List, Optional
 from .models import Project, OrchestratorConfig
+from .blob_store import BlobStore
+
+
+# Project fields kept in blobs, with only a reference in projects.json
+PROJECT_BLOB_FIELDS = ("plan",)
+
+# Where SplitMind keeps data that doesn't belong in the source tree, such as blobs
+DATA_DIR = Path(os.environ.get("SPLITMIND_DATA_DIR", Path.home() / ".splitmind"))
 
 
 class ConfigManager:
@@ -17,7 +26,9 @@ class ConfigManager:
         self.config_dir = Path(__file__).parent.parent.parent
         self.config_file = self.config_dir / "config.json"
         self.projects_file = self.config_dir / "projects.json"
+        self.blobs = BlobStore(DATA_DIR / "blobs")
         self._ensure_config_dir()
+        self._move_legacy_blobs()
         self._load_config()
 
     def _ensure_config_dir(self):
@@ -50,6 +61,18 @@ class ConfigManager:
         if not self.projects_file.exists():
             self._save_json(self.projects_file, {"projects": []})
 
+    def _move_legacy_blobs(self):
+        """Move blobs that earlier versions wrote into the source tree to the data directory"""
+        legacy = self.config_dir / "blobs"
+        if not legacy.is_dir():
+            return
+        for path in legacy.glob("*/*"):
+            target = self.blobs.root / path.relative_to(legacy)
+            if not target.exists():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(path), str(target))
+        shutil.rmtree(legacy, ignore_errors=True)
+
     def _load_config(self):
         """Load configuration from disk"""
         self.config = self._load_json(self.config_file)
@@ -74,15 +97,28 @@ class ConfigManager:
         self.config["orchestrator"] = config.dict()
         self._save_json(self.config_file, self.config)
 
+    def _project(self, data: dict) -> Project:
+        """Build a Project, reading blob fields back from the blob store"""
+        values = dict(data)
+        for field in PROJECT_BLOB_FIELDS:
+            values[field] = self.blobs.resolve(values.get(field))
+        return Project(**values)
+
+    def _store_blobs(self, data: dict, fields=PROJECT_BLOB_FIELDS):
+        """Move large text ``fields`` of a project dict into blobs"""
+        for field in fields:
+            if field in PROJECT_BLOB_FIELDS:
+                data[field] = self.blobs.put_large(data.get(field))
+
     def get_projects(self) -> List[Project]:
         """Get all projects"""
-        return [Project(**p) for p in self.projects_data["projects"]]
+        return [self._project(p) for p in self.projects_data["projects"]]
 
     def get_project(self, project_id: str) -> Optional[Project]:
         """Get a specific project"""
         for p in self.projects_data["projects"]:
             if p["id"] == project_id:
-                return Project(**p)
+                return self._project(p)
         return None
 
     def add_project(self, project: Project) -> Project:
@@ -110,6 +146,7 @@ class ConfigManager:
         project_dict = project.dict()
         project_dict['created_at'] = project.created_at.isoformat()
         project_dict['updated_at'] = project.updated_at.isoformat()
+        self._store_blobs(project_dict)
         self.projects_data["projects"].append(project_dict)
         self._save_json(self.projects_file, self.projects_data)
 
@@ -126,8 +163,10 @@ class ConfigManager:
                     updates['updated_at'] = datetime.now().isoformat()
 
                 self.projects_data["projects"][i].update(updates)
+                # Only the updated fields are text; the others are already stored
+                self._store_blobs(self.projects_data["projects"][i], updates)
                 self._save_json(self.projects_file, self.projects_data)
-                return Project(**self.projects_data["projects"][i])
+                return self._project(self.projects_data["projects"][i])
         raise ValueError(f"Project '{project_id}' not found")
 
     def delete_project(self, project_id: str):
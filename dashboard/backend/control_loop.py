@@ -0,0 +1,96 @@
+"""
+Supervised control loops for the orchestrator
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from .orchestrator_events import WakeupSignal
+
+
+# Longest pause before retrying a loop whose passes keep failing
+MAX_ERROR_BACKOFF = 60  # seconds
+
+
+class ControlLoop:
+    """
+    Runs one phase of the orchestrator on its own cadence.
+
+    A pass runs on every wakeup, or after ``interval`` seconds without one,
+    and is abandoned after ``timeout`` seconds. A pass that raises or times
+    out is reported through ``on_error`` and the loop carries on, pausing
+    longer after each repeated failure, so one stuck phase never holds up
+    the others.
+    """
+
+    def __init__(self, name: str, step: Callable[[], Awaitable[None]],
+                 interval: float, timeout: float,
+                 on_error: Optional[Callable[[str, str], Awaitable[None]]] = None):
+        self.name = name
+        self.step = step
+        self.interval = interval
+        self.timeout = timeout
+        self.on_error = on_error
+        self.wakeups = WakeupSignal()
+        self.runs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_started_at: Optional[datetime] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    async def run(self, is_running: Callable[[], bool]):
+        """Run passes until ``is_running`` turns false"""
+        self.wakeups.bind()
+        while is_running():
+            await self.run_once()
+            if not is_running():
+                break
+            if self.consecutive_failures:
+                await asyncio.sleep(min(MAX_ERROR_BACKOFF, 2 ** (self.consecutive_failures - 1)))
+
+            # Wait for an event, or the interval as a fallback
+            reasons = await self.wakeups.wait(self.interval)
+            if is_running() and reasons != {"interval"}:
+                print(f"⏰ {self.name} woken by: {', '.join(sorted(reasons))}")
+
+    async def run_once(self):
+        """One pass of the step, bounded by the timeout"""
+        self.runs += 1
+        self.last_started_at = datetime.now()
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self.step(), timeout=self.timeout)
+            self.consecutive_failures = 0
+            self.last_error = None
+            return
+        except asyncio.TimeoutError:
+            error = f"timed out after {self.timeout:.0f}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        finally:
+            self.last_duration = time.monotonic() - started
+
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = error
+        print(f"Orchestrator {self.name} loop error: {error}")
+        if self.on_error:
+            try:
+                await self.on_error(self.name, error)
+            except Exception as e:
+                print(f"Error reporting {self.name} loop failure: {e}")
+
+    def stats(self) -> dict:
+        """Pass counts, failures and timing of the last pass"""
+        return {
+            "interval": self.interval,
+            "timeout": self.timeout,
+            "runs": self.runs,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_started_at": self.last_started_at,
+            "last_duration": self.last_duration,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,31 @@
+"""
+Git commands scoped to one repository
+"""
+import subprocess
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from .process_runner import DEFAULT_TIMEOUT, run_command
+
+
+class GitRepo:
+    """
+    Runs git in a fixed directory.
+
+    The directory is passed to each git process instead of changing the
+    process-wide working directory, so operations on different projects,
+    and on different worktrees of one project, can safely overlap.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+    def __repr__(self) -> str:
+        return f"GitRepo({str(self.path)!r})"
+
+    async def run(self, *args: str, check: bool = False,
+                  timeout: Optional[float] = DEFAULT_TIMEOUT,
+                  env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+        """Run ``git <args>`` in this repository"""
+        return await run_command(["git", *args], cwd=self.path, env=env,
+                                 timeout=timeout, check=check)
@@ -0,0 +1,84 @@
+"""
+Event loop lag measurement
+"""
+import asyncio
+import time
+from typing import Optional
+
+
+# How often the loop is sampled
+SAMPLE_INTERVAL = 0.5  # seconds
+
+# Lag above this counts as a stall
+STALL_THRESHOLD = 0.1  # seconds
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up a sleeping task.
+
+    Anything blocking the loop, such as a synchronous subprocess call in a
+    request handler, shows up as lag: every WebSocket broadcast and API
+    request waits at least that long.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL,
+                 stall_threshold: float = STALL_THRESHOLD):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self._task: Optional[asyncio.Task] = None
+        self.reset()
+
+    def reset(self):
+        """Clear the counters"""
+        self.samples = 0
+        self.stalls = 0
+        self.last = 0.0
+        self.max = 0.0
+        self.total = 0.0
+
+    def start(self):
+        """Start sampling on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop sampling"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def record(self, lag: float):
+        """Add one lag sample, in seconds"""
+        lag = max(0.0, lag)
+        self.samples += 1
+        self.last = lag
+        self.max = max(self.max, lag)
+        self.total += lag
+        if lag >= self.stall_threshold:
+            self.stalls += 1
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.record(time.monotonic() - started - self.interval)
+
+    def stats(self) -> dict:
+        """Lag counters for monitoring, in milliseconds"""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "samples": self.samples,
+            "stalls": self.stalls,
+            "last_ms": round(self.last * 1000, 1),
+            "max_ms": round(self.max * 1000, 1),
+            "mean_ms": round(self.total / self.samples * 1000, 1) if self.samples else 0.0
+        }
+
+
+# Global loop lag monitor instance
+loop_monitor = LoopLagMonitor()
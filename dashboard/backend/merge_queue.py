@@ -2,15 +2,16 @@
 Merge queue system for orderly task merging with conflict resolution
 """
 import asyncio
-import subprocess
 import json
-import os
 from typing import List, Optional
-from datetime import datetime
 from pathlib import Path
 
-from .models import Task, TaskStatus
+from .models import TaskStatus
+from .git_repo import GitRepo
+from .process_runner import MERGE_TIMEOUT
 from .task_config import get_task_config
+from .task_graph import TaskGraph
+from .task_record import TaskRecord
 
 
 class MergeQueue:
@@ -20,7 +21,8 @@ class MergeQueue:
     
     def __init__(self, project_path: str, status_update_callback=None):
         self.project_path = Path(project_path)
-        self.queue: List[Task] = []
+        self.repo = GitRepo(self.project_path)
+        self.queue: List[TaskRecord] = []
         self.merge_lock = asyncio.Lock()
         self.status_update_callback = status_update_callback
         self.conflict_resolvers = {
@@ -29,7 +31,7 @@ class MergeQueue:
             "README.md": self.resolve_readme,
         }
     
-    async def add_to_queue(self, task: Task, all_tasks: List[Task]):
+    async def add_to_queue(self, task: TaskRecord, task_graph: TaskGraph):
         """
         Add completed task to merge queue
         """
@@ -42,33 +44,34 @@ class MergeQueue:
         ))
         
         # Try to process queue
-        await self.process_queue(all_tasks)
+        await self.process_queue(task_graph)
     
-    async def process_queue(self, all_tasks: List[Task]):
+    async def process_queue(self, task_graph: TaskGraph):
         """
-        Process tasks in order, respecting dependencies
+        Process tasks in order, respecting dependencies.
+
+        The pass runs to the end even if the caller stops waiting, e.g. a
+        control loop that timed out, so git is never killed mid-merge.
         """
+        await asyncio.shield(self._process_queue(task_graph))
+    
+    async def _process_queue(self, task_graph: TaskGraph):
+        """One pass over the queue, under the merge lock"""
         async with self.merge_lock:
             processed = []
+            # Merged in this pass; the graph is shared, so it isn't touched here
+            merged = set()
             
             for task in self.queue:
                 # Check if dependencies are merged
-                deps_merged = True
-                if hasattr(task, 'dependencies') and task.dependencies:
-                    for dep_id in task.dependencies:
-                        dep_task = next((t for t in all_tasks if t.id == dep_id), None)
-                        if dep_task and dep_task.status != TaskStatus.MERGED:
-                            deps_merged = False
-                            break
-                
-                if deps_merged:
+                if task_graph.dependencies_merged(task, merged):
                     print(f"\n🔄 Processing merge for {task.title}...")
                     success = await self.merge_task(task)
                     
                     if success:
                         processed.append(task)
-                        task.status = TaskStatus.MERGED
-                        task.merged_at = datetime.now()
+                        # Let later tasks in this pass see the merge
+                        merged.add(task.id)
                         print(f"✅ Successfully merged {task.title}")
                         
                         # Update task status via callback if provided
@@ -86,21 +89,16 @@ class MergeQueue:
             for task in processed:
                 self.queue.remove(task)
     
-    async def merge_task(self, task: Task) -> bool:
+    async def merge_task(self, task: TaskRecord) -> bool:
         """
         Attempt to merge a task's branch
         """
-        os.chdir(self.project_path)
-        
         # Ensure we're on main
-        subprocess.run(["git", "checkout", "main"], capture_output=True)
+        await self.repo.run("checkout", "main")
         
         # Try to merge
-        result = subprocess.run(
-            ["git", "merge", task.branch, "--no-ff", "-m", f"Merge branch '{task.branch}'"],
-            capture_output=True,
-            text=True
-        )
+        result = await self.repo.run("merge", task.branch, "--no-ff", "-m",
+                                     f"Merge branch '{task.branch}'", timeout=MERGE_TIMEOUT)
         
         if result.returncode == 0:
             return True
@@ -109,11 +107,7 @@ class MergeQueue:
         print(f"   Merge conflicts detected, attempting auto-resolution...")
         
         # Get conflicted files
-        status = subprocess.run(
-            ["git", "status", "--porcelain"],
-            capture_output=True,
-            text=True
-        )
+        status = await self.repo.run("status", "--porcelain")
         
         conflicts = []
         for line in status.stdout.split('\n'):
@@ -127,27 +121,27 @@ class MergeQueue:
         for file_path in conflicts:
             if file_path in self.conflict_resolvers:
                 if await self.conflict_resolvers[file_path](file_path):
-                    subprocess.run(["git", "add", file_path])
+                    await self.repo.run("add", file_path)
                     print(f"   ✓ Auto-resolved {file_path}")
                 else:
                     all_resolved = False
                     print(f"   ✗ Could not auto-resolve {file_path}")
             else:
                 # For other files, prefer theirs (the branch being merged)
-                subprocess.run(["git", "checkout", "--theirs", file_path])
-                subprocess.run(["git", "add", file_path])
+                await self.repo.run("checkout", "--theirs", file_path)
+                await self.repo.run("add", file_path)
                 print(f"   ✓ Accepted changes from branch for {file_path}")
         
         if all_resolved:
             # Complete the merge
-            subprocess.run(["git", "commit", "--no-edit"])
+            await self.repo.run("commit", "--no-edit", timeout=MERGE_TIMEOUT)
             return True
         else:
             # Abort the merge
-            subprocess.run(["git", "merge", "--abort"])
+            await self.repo.run("merge", "--abort")
             return False
     
-    async def cleanup_worktree(self, task: Task):
+    async def cleanup_worktree(self, task: TaskRecord):
         """
         Clean up worktree after successful merge
         """
@@ -156,19 +150,11 @@ class MergeQueue:
             
             if worktree_path.exists():
                 # Remove the worktree
-                subprocess.run(
-                    ["git", "worktree", "remove", str(worktree_path), "--force"],
-                    cwd=self.project_path,
-                    capture_output=True
-                )
+                await self.repo.run("worktree", "remove", str(worktree_path), "--force")
                 print(f"🧹 Cleaned up worktree for {task.title}")
                 
                 # Also prune worktree list
-                subprocess.run(
-                    ["git", "worktree", "prune"],
-                    cwd=self.project_path,
-                    capture_output=True
-                )
+                await self.repo.run("worktree", "prune")
         except Exception as e:
             print(f"⚠️  Error cleaning up worktree for {task.title}: {e}")
     
@@ -178,23 +164,11 @@ class MergeQueue:
         """
         try:
             # Get the three versions
-            base = subprocess.run(
-                ["git", "show", ":1:" + file_path],
-                capture_output=True,
-                text=True
-            ).stdout
+            base = (await self.repo.run("show", ":1:" + file_path)).stdout
             
-            ours = subprocess.run(
-                ["git", "show", ":2:" + file_path],
-                capture_output=True,
-                text=True
-            ).stdout
+            ours = (await self.repo.run("show", ":2:" + file_path)).stdout
             
-            theirs = subprocess.run(
-                ["git", "show", ":3:" + file_path],
-                capture_output=True,
-                text=True
-            ).stdout
+            theirs = (await self.repo.run("show", ":3:" + file_path)).stdout
             
             # Parse JSON
             base_json = json.loads(base) if base else {}
@@ -219,7 +193,7 @@ class MergeQueue:
             }
             
             # Write merged file
-            with open(file_path, 'w') as f:
+            with open(self.project_path / file_path, 'w') as f:
                 json.dump(merged, f, indent=2)
             
             return True
@@ -234,17 +208,9 @@ class MergeQueue:
         """
         try:
             # Get all versions
-            ours = subprocess.run(
-                ["git", "show", ":2:" + file_path],
-                capture_output=True,
-                text=True
-            ).stdout
+            ours = (await self.repo.run("show", ":2:" + file_path)).stdout
             
-            theirs = subprocess.run(
-                ["git", "show", ":3:" + file_path],
-                capture_output=True,
-                text=True
-            ).stdout
+            theirs = (await self.repo.run("show", ":3:" + file_path)).stdout
             
             # Combine unique lines
             all_lines = set(ours.split('\n')) | set(theirs.split('\n'))
@@ -265,7 +231,7 @@ class MergeQueue:
                     categories[current_category].append(line)
             
             # Write organized file
-            with open(file_path, 'w') as f:
+            with open(self.project_path / file_path, 'w') as f:
                 for category, entries in categories.items():
                     if category != "General":
                         f.write(f"\n{category}\n")
@@ -284,7 +250,7 @@ class MergeQueue:
         """
         try:
             # For now, just take theirs (the newer content)
-            subprocess.run(["git", "checkout", "--theirs", file_path])
+            await self.repo.run("checkout", "--theirs", file_path)
             return True
             
         except Exception as e:
@@ -14,6 +14,8 @@ class TaskStatus(str, Enum):
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
     MERGED = "merged"
+    # Failed too many times; left alone until retried by hand
+    QUARANTINED = "quarantined"
 
 
 class Task(BaseModel):
@@ -26,6 +28,8 @@ class Task(BaseModel):
     status: TaskStatus = TaskStatus.UNCLAIMED
     branch: str
     session: Optional[str] = None
+    # Session of a speculative backup agent racing a straggling one
+    backup_session: Optional[str] = None
     # List of task IDs that must be completed first
     dependencies: List[str] = []
     # Higher priority tasks are assigned first (0 = normal, 1+ = higher)
@@ -39,8 +43,23 @@ class Task(BaseModel):
     shared_files: List[str] = []
     # Tasks whose output is needed for setup
     initialization_deps: List[str] = []
+    # Development wave from the generated task breakdown
+    wave: Optional[int] = None
+    # Failed agent runs since the task was last retried by hand
+    attempts: int = 0
+    last_failure: Optional[str] = None  # Why the last attempt failed
+    # Not promoted again before this time after a failed attempt
+    retry_after: Optional[datetime] = None
+    # Store revision of the last write to this task, used for If-Match checks
+    version: int = 0
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
+    # When an agent was last spawned for this task
+    started_at: Optional[datetime] = None
+    # When the task's agent was frozen to give its slot to an urgent task
+    suspended_at: Optional[datetime] = None
+    # Time the agent spent frozen before its last resume, since it was started
+    suspended_seconds: float = 0
     completed_at: Optional[datetime] = None
     merged_at: Optional[datetime] = None
 
@@ -52,7 +71,7 @@ class Agent(BaseModel):
     task_id: str
     task_title: str
     branch: str
-    status: str = "running"  # "running", "completed", "failed"
+    status: str = "running"  # "running", "suspended", "completed", "failed"
     progress: int = 0
     started_at: datetime = Field(default_factory=datetime.now)
     logs: List[str] = []
@@ -77,6 +96,10 @@ class Project(BaseModel):
     git_remote: Optional[str] = None
     # Whether the project path is a Git repository
     is_git_repo: Optional[bool] = None
+    # Task storage backend: "markdown" (tasks.md) or "sqlite" (tasks.db)
+    task_store: str = "markdown"
+    # Share of the host-wide agent budget relative to other running projects
+    agent_weight: float = 1.0
 
     class Config:
         json_encoders = {
@@ -92,6 +115,7 @@ class ProjectStats(BaseModel):
     in_progress_tasks: int = 0
     completed_tasks: int = 0
     merged_tasks: int = 0
+    quarantined_tasks: int = 0
     active_agents: int = 0
     total_agents_run: int = 0
 
@@ -99,9 +123,45 @@ class ProjectStats(BaseModel):
 class OrchestratorConfig(BaseModel):
     """Orchestrator configuration"""
     max_concurrent_agents: int = 5
+    # Agents running at once across all projects on this host
+    max_total_agents: int = 10
+    # Defer spawning while the 1-minute load average per CPU is at least this (0 = off),
+    # e.g. 1.5
+    max_load_per_cpu: float = 0
+    # Memory and disk (under worktrees/) to keep free after starting agents (0 = off),
+    # e.g. 2048 and 5120
+    min_available_memory_mb: int = 0
+    min_free_disk_mb: int = 0
+    # Expected memory and disk use of one agent, including its installs; only used
+    # when the matching minimum above is set
+    agent_memory_mb: int = 1536
+    agent_disk_mb: int = 1024
+    # Freeze lower-priority agents when tasks with priority 1..preempt_max_priority
+    # are waiting for a slot, and resume them once a slot frees up
+    preemption_enabled: bool = False
+    preempt_max_priority: int = 1
+    # Start a backup agent on <branch>-b for tasks running longer than this
+    # percentile of finished tasks' run times, when a slot would otherwise idle
+    speculation_enabled: bool = False
+    straggler_percentile: float = 90
+    # Finished tasks needed before run times are trusted
+    min_runtime_samples: int = 5
+    # Quarantine a task after this many failed agent runs (0 = never); failed
+    # tasks wait retry_backoff_seconds, doubling per failure up to the max
+    max_task_attempts: int = 3
+    retry_backoff_seconds: int = 60
+    max_retry_backoff_seconds: int = 3600
     auto_merge: bool = False
     merge_strategy: str = "merge"  # merge, squash, ff
     auto_spawn_interval: int = 60  # seconds
+    # Safety-net poll of each control loop in seconds; the promoter and
+    # spawner use auto_spawn_interval unless listed here
+    control_loop_intervals: Dict[str, int] = {"completion": 15, "merger": 30}
+    # Longest one pass of each control loop, or the reconciliation at start,
+    # may take before it is abandoned; the merger's is raised to fit a merge
+    control_loop_timeouts: Dict[str, int] = {
+        "reconciler": 60, "promoter": 60, "spawner": 900, "completion": 120, "merger": 900
+    }
     enabled: bool = False
     # API provider: "anthropic", "openai", "azure", etc.
     api_provider: str = "anthropic"
@@ -111,6 +171,16 @@ class OrchestratorConfig(BaseModel):
     api_base_url: Optional[str] = None
     # API version (for providers that require it)
     api_version: Optional[str] = None
+    # Move MERGED tasks to the project archive after this many hours (0 = never)
+    archive_merged_after_hours: int = 24
+    # Order for promoting and spawning tasks: "priority" or "critical_path"
+    scheduling_policy: str = "priority"
+    # Weight critical paths by the run times of finished tasks
+    weight_by_durations: bool = True
+    # How many agent spawns may run each stage at the same time
+    spawn_stage_limits: Dict[str, int] = {
+        "worktree": 2, "provision": 4, "session": 4, "notify": 8
+    }
 
 
 class PlanGenerationRequest(BaseModel):
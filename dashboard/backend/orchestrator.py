@@ -8,49 +8,115 @@ import shutil
 import time
 import threading
 import tempfile
-from typing import Optional, List
+from typing import Awaitable, Callable, Optional, List, Sequence, Dict, Tuple
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 import redis
 import json
 
 from .models import Task, TaskStatus, OrchestratorConfig, WebSocketMessage
+from .admission import AdmissionController
+from .agent_budget import AgentBudget
 from .config import config_manager
 from .project_manager import ProjectManager
+from .task_store import TaskConflictError
+from .task_record import TaskRecord
 from .websocket_manager import WebSocketManager
 from .task_config import can_tasks_run_concurrently, get_task_config, get_initialization_script
 from .merge_queue import MergeQueue
+from .process_runner import MERGE_TIMEOUT, run_command
+from .scheduler import frozen_seconds, run_seconds, task_order_key
+from .preemption import choose_victims, freeze_session, is_urgent, preemption_rank, thaw_session
+from .speculation import backup_branch, backup_session_name, find_stragglers
+from .orchestrator_events import StoreWriteWatcher, StatusDirWatcher, RedisCompletionWatcher
+from .control_loop import ControlLoop
+from .reconciler import (observe_state, plan_reconciliation, project_session_pattern,
+                         session_name_for)
+from .retries import failure_updates, is_backing_off
+
+
+# Agents report completion through files in this directory
+STATUS_DIR = Path("/tmp/splitmind-status")
+
+# Pass timeout of control loops without one in control_loop_timeouts
+DEFAULT_LOOP_TIMEOUT = 300  # seconds
+
+
+def clear_status_files(status_dir: Path = STATUS_DIR, pattern: str = "*"):
+    """Remove agent status files and exit markers matching ``pattern``"""
+    for status_file in [*status_dir.glob(f"{pattern}.status"), *status_dir.glob(f"{pattern}.exited")]:
+        try:
+            status_file.unlink()
+        except Exception as e:
+            print(f"Error removing status file {status_file}: {e}")
+
+
+def still_as_read(tasks: Sequence[TaskRecord], *fields: str) -> Callable[[TaskRecord], bool]:
+    """Recheck for re-read tasks that still have ``fields`` as they were read"""
+    read = {task.id: task for task in tasks}
+    return lambda fresh: fresh.id in read and all(
+        getattr(fresh, field) == getattr(read[fresh.id], field) for field in fields
+    )
 
 
 class OrchestratorManager:
-    """Manages the AI agent orchestrator"""
+    """Manages the AI agent orchestrator for one project"""
     
-    def __init__(self, ws_manager: WebSocketManager):
+    def __init__(self, ws_manager: WebSocketManager, budget: Optional[AgentBudget] = None,
+                 admission: Optional[AdmissionController] = None):
         self.ws_manager = ws_manager
         self.config = config_manager.get_orchestrator_config()
         self.running = False
         self.current_project_id: Optional[str] = None
         self._task: Optional[asyncio.Task] = None
         self._stop_event = asyncio.Event()
+        self.loops = self._control_loops()
+        # Outcome of the reconciliation pass at the last start
+        self.last_reconciliation: Optional[dict] = None
         self.merge_queue: Optional[MergeQueue] = None
+        # Host-wide agent slots, shared with other projects' orchestrators
+        self.budget = budget or AgentBudget(self.config.max_total_agents)
+        # Holds spawns back while the host is overloaded
+        self.admission = admission or AdmissionController()
         
         # Status file directory
-        self.status_dir = Path("/tmp/splitmind-status")
+        self.status_dir = STATUS_DIR
         self._ensure_status_dir()
     
     def _ensure_status_dir(self):
-        """Ensure status directory exists and clean up old files"""
+        """Ensure status directory exists"""
         self.status_dir.mkdir(exist_ok=True)
-        # Clean up any existing status files on startup
-        for status_file in self.status_dir.glob("*.status"):
-            try:
-                status_file.unlink()
-            except Exception as e:
-                print(f"Error removing old status file {status_file}: {e}")
     
     def update_config(self, config: OrchestratorConfig):
         """Update orchestrator configuration"""
         self.config = config
+        self.budget.capacity = config.max_total_agents
+        for loop in self.loops.values():
+            loop.interval, loop.timeout = self._loop_settings(loop.name)
+    
+    def _now(self) -> datetime:
+        """Current time for task timestamps; the simulator runs on virtual time"""
+        return datetime.now()
+    
+    def _task_status_updater(self, project_id: str) -> Callable[[str, TaskStatus], Awaitable[None]]:
+        """Merge queue callback that records a task's new status, unless it changed meanwhile"""
+        async def update_task_status(task_id: str, status: TaskStatus):
+            pm = ProjectManager(project_id)
+            task = next((t for t in pm.get_tasks_snapshot() if t.id == task_id), None)
+            if task is None or not await self._set_task_statuses(
+                pm, {task_id: {"status": status}}, {task_id: task.version},
+                recheck=lambda fresh: fresh.status != status
+            ):
+                return
+            await self.ws_manager.broadcast(WebSocketMessage(
+                type="task_status_changed",
+                project_id=project_id,
+                data={
+                    "task_id": task_id,
+                    "status": status
+                }
+            ))
+        return update_task_status
     
     def is_running(self) -> bool:
         """Check if orchestrator is running"""
@@ -69,21 +135,10 @@ class OrchestratorManager:
         self.current_project_id = project_id
         self.running = True
         self._stop_event.clear()
+        self.budget.register(project_id, project.agent_weight)
         
         # Initialize merge queue for the project with status update callback
-        async def update_task_status(task_id: str, status: TaskStatus):
-            pm = ProjectManager(project_id)
-            pm.update_task(task_id, {"status": status})
-            await self.ws_manager.broadcast(WebSocketMessage(
-                type="task_status_changed",
-                project_id=project_id,
-                data={
-                    "task_id": task_id,
-                    "status": status
-                }
-            ))
-        
-        self.merge_queue = MergeQueue(project.path, update_task_status)
+        self.merge_queue = MergeQueue(project.path, self._task_status_updater(project_id))
         
         # Start the orchestrator loop
         self._task = asyncio.create_task(self._orchestrator_loop())
@@ -102,6 +157,7 @@ class OrchestratorManager:
         
         self.running = False
         self._stop_event.set()
+        self._wake("stop")
         
         if self._task:
             self._task.cancel()
@@ -110,12 +166,15 @@ class OrchestratorManager:
             except asyncio.CancelledError:
                 pass
         
-        # Clean up status files
-        for status_file in self.status_dir.glob("*.status"):
-            try:
-                status_file.unlink()
-            except Exception as e:
-                print(f"Error removing status file {status_file}: {e}")
+        # Agents aren't stopped with the orchestrator; don't leave any frozen
+        try:
+            await self._resume_all_agents()
+        except Exception as e:
+            print(f"Error resuming suspended agents: {e}")
+        
+        # Clean up this project's status files and release its agent slots
+        clear_status_files(self.status_dir, f"*{self.current_project_id}*")
+        self.budget.remove(self.current_project_id)
         
         # Notify clients
         await self.ws_manager.broadcast(WebSocketMessage(
@@ -126,42 +185,188 @@ class OrchestratorManager:
         
         self.current_project_id = None
     
+    def _control_loops(self) -> Dict[str, ControlLoop]:
+        """The independent phases of the orchestrator, each on its own loop"""
+        steps = {
+            "promoter": self._promote_step,
+            "spawner": self._spawn_step,
+            "completion": self._completion_step,
+            "merger": self._merge_step,
+        }
+        return {
+            name: ControlLoop(name, step, *self._loop_settings(name), on_error=self._report_loop_error)
+            for name, step in steps.items()
+        }
+    
+    def _loop_settings(self, name: str) -> Tuple[float, float]:
+        """Safety-net interval and pass timeout of a control loop"""
+        defaults = OrchestratorConfig()
+        intervals = {**defaults.control_loop_intervals, **self.config.control_loop_intervals}
+        timeouts = {**defaults.control_loop_timeouts, **self.config.control_loop_timeouts}
+        timeout = timeouts.get(name, DEFAULT_LOOP_TIMEOUT)
+        if name == "merger":
+            # Never give up on a pass sooner than a single merge may take
+            timeout = max(timeout, MERGE_TIMEOUT + DEFAULT_LOOP_TIMEOUT)
+        return intervals.get(name, self.config.auto_spawn_interval), timeout
+    
+    def _wake(self, reason: str, *names: str):
+        """Wake the named control loops, or all of them"""
+        for name in names or self.loops:
+            self.loops[name].wakeups.notify(reason)
+    
+    def _start_watchers(self) -> list:
+        """Start the event sources that wake the loops before their interval is up"""
+        wake = self._wake
+        watchers = [
+            # Covers API edits and the other loops' writes, since they go through the task store
+            StoreWriteWatcher(self.current_project_id,
+                              lambda: wake("task_store", "promoter", "spawner", "merger")),
+            StatusDirWatcher(self.status_dir, lambda: wake("status_file", "completion"),
+                             name_filter=project_session_pattern(self.current_project_id)),
+            RedisCompletionWatcher(self.current_project_id, lambda: wake("redis", "completion")),
+        ]
+        for watcher in watchers:
+            watcher.start()
+        return watchers
+    
     async def _orchestrator_loop(self):
-        """Main orchestrator loop"""
-        while self.running:
+        """
+        Run the promoter, spawner, completion and merger loops side by side.
+
+        Each loop runs as soon as an event it cares about arrives (task
+        writes, agent status files, Redis completions), with bursts
+        debounced into one pass, and otherwise on its own safety-net
+        interval. The loops share state only through the task store, and
+        each pass has its own timeout, so a slow merge or a hanging tmux
+        call doesn't hold up the other phases.
+        """
+        if self.config.enabled:
             try:
-                if self.config.enabled:
-                    # Get current state once and pass it through
-                    pm = ProjectManager(self.current_project_id)
-                    project = pm.project
-                    tasks = pm.get_tasks()
-                    agents = pm.get_agents()
-                    
-                    await self._manage_task_queue(pm, project, tasks, agents)
-                    # Reload tasks after queue management changes
-                    tasks = pm.get_tasks()
-                    await self._spawn_agents(pm, project, tasks, agents)
-                    await self._check_agent_status()
-                    # Check for any completed tasks that need auto-merging
-                    await self._check_and_merge_completed_tasks(pm, tasks)
-                
-                # Wait for interval or stop event
-                try:
-                    await asyncio.wait_for(
-                        self._stop_event.wait(),
-                        timeout=self.config.auto_spawn_interval
-                    )
-                    break  # Stop event was set
-                except asyncio.TimeoutError:
-                    pass  # Continue loop
-                    
+                await asyncio.wait_for(self._reconcile(), timeout=self._loop_settings("reconciler")[1])
             except Exception as e:
-                print(f"Orchestrator error: {e}")
-                await self.ws_manager.broadcast(WebSocketMessage(
-                    type="orchestrator_error",
-                    project_id=self.current_project_id,
-                    data={"error": str(e)}
-                ))
+                error = str(e) or type(e).__name__
+                print(f"Orchestrator reconciliation error: {error}")
+                await self._report_loop_error("reconciler", error)
+        
+        watchers = self._start_watchers()
+        try:
+            await asyncio.gather(*(loop.run(self.is_running) for loop in self.loops.values()))
+        finally:
+            for watcher in watchers:
+                watcher.stop()
+    
+    async def _reconcile(self):
+        """
+        Bring the project's tasks in line with what is actually running, in one pass.
+
+        Runs before the control loops start, so agents, status files, Redis
+        completions and worktrees left from a previous run are adopted or
+        cleaned up right away instead of being rediscovered over many
+        ticks. Completed tasks are queued for merging by the merger's first
+        pass.
+        """
+        started = time.monotonic()
+        pm = ProjectManager(self.current_project_id)
+        tasks = pm.get_tasks_snapshot()
+        observed = await observe_state(pm, self.status_dir)
+        plan = plan_reconciliation(tasks, observed, pm.project.id, pm.worktrees_dir)
+        by_id = {task.id: task for task in tasks}
+        now = datetime.now()
+        
+        await asyncio.gather(*(
+            run_command(["tmux", "kill-session", "-t", session]) for session in plan.kill_sessions
+        ))
+        for session in plan.remove_status_files:
+            clear_status_files(self.status_dir, session)
+        for session in plan.write_status_files:
+            (self.status_dir / f"{session}.status").write_text("RUNNING")
+        
+        updates = {}
+        for task_id, session in plan.adopt.items():
+            updates[task_id] = {"status": TaskStatus.IN_PROGRESS, "session": session,
+                                "started_at": by_id[task_id].started_at or now}
+        for task_id in plan.complete:
+            updates[task_id] = {"status": TaskStatus.COMPLETED, "completed_at": now,
+                                "suspended_at": None,
+                                "suspended_seconds": frozen_seconds(by_id[task_id], now)}
+        for task_id in plan.requeue:
+            # The agent died with the previous run; that counts as a failed attempt
+            updates[task_id] = {**failure_updates(by_id[task_id], "Agent session was gone at "
+                                                  "restart without commits", self.config, now),
+                                "backup_session": None}
+        await self._set_task_statuses(pm, updates, {task_id: by_id[task_id].version
+                                                    for task_id in updates})
+        
+        if plan.clear_redis:
+            try:
+                r = redis.Redis(host='localhost', port=6379, decode_responses=True)
+                await asyncio.to_thread(
+                    r.hdel, f"splitmind:{self.current_project_id}:completed_tasks", *plan.clear_redis
+                )
+            except Exception as e:
+                print(f"Redis cleanup error: {e}")
+        for worktree_path in plan.remove_worktrees:
+            # Without --force git keeps worktrees with uncommitted changes
+            result = await pm.repo.run("worktree", "remove", worktree_path)
+            if result.returncode != 0:
+                print(f"⚠️ Kept worktree {worktree_path}: {result.stderr.strip()}")
+        
+        self.last_reconciliation = {
+            "at": now,
+            "duration": time.monotonic() - started,
+            **plan.summary()
+        }
+        changes = {kind: count for kind, count in plan.summary().items()
+                   if count and kind != "keep"}
+        print(f"🔁 Reconciled {len(tasks)} tasks in {self.last_reconciliation['duration']:.1f}s: "
+              f"{', '.join(f'{kind} {count}' for kind, count in changes.items()) or 'nothing to fix'}")
+        await self.ws_manager.broadcast(WebSocketMessage(
+            type="orchestrator_reconciled",
+            project_id=self.current_project_id,
+            data=self.last_reconciliation
+        ))
+    
+    async def _report_loop_error(self, name: str, error: str):
+        await self.ws_manager.broadcast(WebSocketMessage(
+            type="orchestrator_error",
+            project_id=self.current_project_id,
+            data={"error": error, "loop": name}
+        ))
+    
+    def loop_stats(self) -> Dict[str, dict]:
+        """Runs, failures and last pass timing of each control loop"""
+        return {name: loop.stats() for name, loop in self.loops.items()}
+    
+    async def _promote_step(self):
+        """Promoter: keep the UP_NEXT queue filled"""
+        if not self.config.enabled:
+            return
+        pm = ProjectManager(self.current_project_id)
+        await self._manage_task_queue(pm, pm.project, pm.get_tasks_snapshot(), await pm.get_agents())
+    
+    async def _spawn_step(self):
+        """Spawner: start agents for UP_NEXT tasks, and backups for stragglers"""
+        if not self.config.enabled:
+            return
+        pm = ProjectManager(self.current_project_id)
+        await self._spawn_agents(pm, pm.project, pm.get_tasks_snapshot(), await pm.get_agents())
+    
+    async def _completion_step(self):
+        """Completion watcher: settle backup races and notice finished agents"""
+        if not self.config.enabled:
+            return
+        await self._resolve_backups(ProjectManager(self.current_project_id))
+        await self._check_agent_status()
+    
+    async def _merge_step(self):
+        """Merger: queue completed tasks for merging and archive old merged ones"""
+        if not self.config.enabled:
+            return
+        pm = ProjectManager(self.current_project_id)
+        await self._check_and_merge_completed_tasks(pm, pm.get_tasks_snapshot())
+        archive_after = self.config.archive_merged_after_hours
+        if archive_after:
+            pm.archive_merged_tasks(timedelta(hours=archive_after))
     
     async def _manage_task_queue(self, pm: ProjectManager, project, tasks, agents):
         """Manage the task queue to maintain UP_NEXT tasks based on available slots"""
@@ -170,11 +375,13 @@ class OrchestratorManager:
         
         try:
             
+            graph = pm.get_task_graph()
+            
             # Count current task statuses
             active_agents = len([a for a in agents if a.status == "running"])
-            up_next_tasks = len([t for t in tasks if t.status == TaskStatus.UP_NEXT])
-            in_progress_tasks = len([t for t in tasks if t.status == TaskStatus.IN_PROGRESS])
-            unclaimed_tasks_count = len([t for t in tasks if t.status == TaskStatus.UNCLAIMED])
+            up_next_tasks = graph.count(TaskStatus.UP_NEXT)
+            in_progress_tasks = graph.count(TaskStatus.IN_PROGRESS)
+            unclaimed_tasks_count = graph.count(TaskStatus.UNCLAIMED)
             
             print(f"📊 Current task counts:")
             print(f"   UNCLAIMED: {unclaimed_tasks_count}")
@@ -194,83 +401,133 @@ class OrchestratorManager:
             print(f"   Current UP_NEXT: {up_next_tasks}")
             print(f"   Current IN_PROGRESS: {in_progress_tasks}")
             
+            order_key = self._task_order_key(graph)
             if up_next_tasks < target_up_next:
-                # Need to promote tasks from UNCLAIMED to UP_NEXT
-                unclaimed_tasks = [t for t in tasks if t.status == TaskStatus.UNCLAIMED]
+                # Need to promote UNCLAIMED tasks whose dependencies are met,
+                # leaving failed ones to wait out their retry delay
+                now = self._now()
+                eligible_tasks = [task for task in graph.ready_tasks()
+                                  if not is_backing_off(task, now)]
                 
-                # Filter out tasks with unmet dependencies
-                eligible_tasks = []
-                for task in unclaimed_tasks:
-                    if hasattr(task, 'dependencies') and task.dependencies:
-                        all_deps_met = True
-                        for dep_id in task.dependencies:
-                            dep_task = next((t for t in tasks if t.id == dep_id), None)
-                            if dep_task and dep_task.status not in [TaskStatus.COMPLETED, TaskStatus.MERGED]:
-                                all_deps_met = False
-                                break
-                        if all_deps_met:
-                            eligible_tasks.append(task)
-                    else:
-                        eligible_tasks.append(task)
-                
-                # Sort by priority and merge order
-                eligible_tasks.sort(
-                    key=lambda t: (getattr(t, 'priority', 10), -getattr(t, 'merge_order', 0))
-                )
+                # Sort by the scheduling policy (priority and merge order break ties)
+                eligible_tasks.sort(key=order_key)
                 
                 # Promote tasks to UP_NEXT
                 tasks_to_promote = min(target_up_next - up_next_tasks, len(eligible_tasks))
                 if tasks_to_promote > 0:
                     print(f"📋 Need to promote {tasks_to_promote} tasks from TODO to UP_NEXT")
+                    promoted = eligible_tasks[:tasks_to_promote]
+                    for task in promoted:
+                        print(f"📋 Promoting task '{task.title}' (ID: {task.id}) from {task.status} to UP_NEXT")
                     
-                for i in range(tasks_to_promote):
-                    task = eligible_tasks[i]
-                    print(f"📋 Promoting task '{task.title}' (ID: {task.id}) from {task.status} to UP_NEXT")
-                    
-                    # Update in database
-                    updated_task = pm.update_task(task.id, {"status": TaskStatus.UP_NEXT})
-                    print(f"📋 Database updated: {updated_task.title} is now {updated_task.status}")
-                    
-                    # Notify via websocket
-                    await self.ws_manager.broadcast(WebSocketMessage(
-                        type="task_status_changed",
-                        project_id=self.current_project_id,
-                        data={
-                            "task_id": task.id,
-                            "status": TaskStatus.UP_NEXT
-                        }
-                    ))
-                    
-                    print(f"✅ Successfully promoted task '{task.title}' to UP_NEXT queue")
+                    # Update in database with a single write
+                    if await self._set_task_statuses(pm, {
+                        task.id: {"status": TaskStatus.UP_NEXT} for task in promoted
+                    }, {task.id: task.version for task in promoted}):
+                        print(f"✅ Successfully promoted {len(promoted)} task(s) to UP_NEXT queue")
             
             elif up_next_tasks > target_up_next:
                 # Too many UP_NEXT tasks, move some back to UNCLAIMED
-                up_next_task_list = [t for t in tasks if t.status == TaskStatus.UP_NEXT]
-                # Sort by priority (lower priority tasks go back first)
-                up_next_task_list.sort(
-                    key=lambda t: (-getattr(t, 'priority', 10), getattr(t, 'merge_order', 0))
-                )
+                up_next_task_list = graph.with_status(TaskStatus.UP_NEXT)
+                # Tasks the scheduling policy would start last go back first
+                up_next_task_list.sort(key=order_key, reverse=True)
                 
                 tasks_to_demote = up_next_tasks - target_up_next
-                for i in range(tasks_to_demote):
-                    task = up_next_task_list[i]
-                    pm.update_task(task.id, {"status": TaskStatus.UNCLAIMED})
-                    
-                    # Notify via websocket
-                    await self.ws_manager.broadcast(WebSocketMessage(
-                        type="task_status_changed",
-                        project_id=self.current_project_id,
-                        data={
-                            "task_id": task.id,
-                            "status": TaskStatus.UNCLAIMED
-                        }
-                    ))
-                    
-                    print(f"📋 Moved task '{task.title}' back to TODO (queue full)")
+                demoted = up_next_task_list[:tasks_to_demote]
+                if await self._set_task_statuses(pm, {
+                    task.id: {"status": TaskStatus.UNCLAIMED} for task in demoted
+                }, {task.id: task.version for task in demoted}):
+                    for task in demoted:
+                        print(f"📋 Moved task '{task.title}' back to TODO (queue full)")
         
         except Exception as e:
             print(f"Error managing task queue: {e}")
     
+    def _task_order_key(self, graph):
+        """Sort key for the configured scheduling policy"""
+        return task_order_key(self.config.scheduling_policy, graph,
+                              self.config.weight_by_durations)
+    
+    async def _set_task_statuses(self, pm: ProjectManager, updates: dict,
+                                 expected: Optional[dict] = None,
+                                 recheck: Optional[Callable[[TaskRecord], bool]] = None
+                                 ) -> List[Task]:
+        """
+        Apply a batch of task updates and notify clients once.
+
+        ``expected`` holds the versions the updates were worked out from. If
+        another loop or an API client changed one of those tasks since, the
+        batch is dropped, or with ``recheck``, applied to the re-read tasks
+        it still holds for. Returns the tasks written.
+        """
+        if not updates:
+            return []
+        
+        try:
+            updated = pm.update_tasks(updates, expected)
+        except (TaskConflictError, ValueError) as e:
+            if recheck is None:
+                # Someone else changed a task since this pass read it; retry next pass
+                print(f"⚠️ Skipping task update: {e}")
+                return []
+            fresh = {task.id: task for task in pm.get_tasks_snapshot() if task.id in updates}
+            retry = {task_id: fields for task_id, fields in updates.items()
+                     if task_id in fresh and recheck(fresh[task_id])}
+            print(f"⚠️ {e}; applying {len(retry)} of {len(updates)} update(s) that still hold")
+            if not retry:
+                return []
+            try:
+                updated = pm.update_tasks(retry, {task_id: fresh[task_id].version
+                                                  for task_id in retry})
+            except (TaskConflictError, ValueError) as e:
+                print(f"⚠️ Skipping task update: {e}")
+                return []
+        await self.ws_manager.broadcast(WebSocketMessage(
+            type="tasks_updated",
+            project_id=self.current_project_id,
+            data={"tasks": [task.dict() for task in updated]}
+        ))
+        return updated
+    
+    async def _record_failures(self, pm: ProjectManager, failed: List[Tuple[TaskRecord, str]]):
+        """Count failed attempts, backing each task off or quarantining it"""
+        if not failed:
+            return
+        
+        now = self._now()
+        updates = {task.id: failure_updates(task, reason, self.config, now)
+                   for task, reason in failed}
+        tasks = [task for task, _ in failed]
+        written = await self._set_task_statuses(
+            pm, updates, {task.id: task.version for task in tasks},
+            recheck=still_as_read(tasks, "status", "session", "attempts")
+        )
+        written_ids = {task.id for task in written}
+        for task in tasks:
+            if task.id not in written_ids:
+                continue
+            update = updates[task.id]
+            if update["status"] == TaskStatus.QUARANTINED:
+                print(f"🚫 Quarantined task {task.title} after {update['attempts']} "
+                      f"failed attempts: {update['last_failure']}")
+                message_type = "task_quarantined"
+            else:
+                retry_after = update["retry_after"]
+                print(f"🔁 Task {task.title} failed attempt {update['attempts']}; retrying "
+                      f"{f'after {retry_after:%H:%M:%S}' if retry_after else 'right away'}")
+                message_type = "task_status_changed"
+            await self.ws_manager.broadcast(WebSocketMessage(
+                type=message_type,
+                project_id=self.current_project_id,
+                data={
+                    "task_id": task.id,
+                    "status": update["status"],
+                    "attempts": update["attempts"],
+                    "last_failure": update["last_failure"],
+                    "retry_after": update["retry_after"]
+                }
+            ))
+    
     async def _spawn_agents(self, pm: ProjectManager, project, tasks, agents):
         """Spawn agents for UP_NEXT tasks"""
         if not self.current_project_id:
@@ -280,24 +537,31 @@ class OrchestratorManager:
             
             # Count active agents  
             active_agents = len([a for a in agents if a.status == "running"])
-            in_progress_tasks = len([t for t in tasks if t.status == TaskStatus.IN_PROGRESS])
+            # Frozen agents keep their worktrees but give up their slots
+            running_tasks = [t for t in tasks if t.status == TaskStatus.IN_PROGRESS]
+            suspended_tasks = [t for t in running_tasks if t.suspended_at]
+            # Backup agents racing stragglers take slots of their own
+            backup_agents = len([t for t in running_tasks if t.backup_session])
+            in_progress_tasks = len(running_tasks) - len(suspended_tasks) + backup_agents
             
             # Check if we can spawn more agents (only count IN_PROGRESS, not UP_NEXT)
             max_concurrent = min(self.config.max_concurrent_agents, project.max_agents)
             available_working_slots = max_concurrent - in_progress_tasks
+            self.budget.report(project.id, in_progress_tasks, project.agent_weight)
             
             print(f"🚀 Agent spawning check:")
             print(f"   Max concurrent: {max_concurrent}")
             print(f"   In progress: {in_progress_tasks}")
+            if suspended_tasks:
+                print(f"   Suspended: {len(suspended_tasks)}")
             print(f"   Available working slots: {available_working_slots}")
             
-            if available_working_slots <= 0:
+            if available_working_slots <= 0 and not self.config.preemption_enabled:
                 print(f"🚀 No available working slots for agents")
                 return
             
             # Find UP_NEXT tasks ready to be spawned
             up_next_tasks = []
-            running_tasks = [t for t in tasks if t.status == TaskStatus.IN_PROGRESS]
             
             up_next_in_db = [t for t in tasks if t.status == TaskStatus.UP_NEXT]
             print(f"🚀 Found {len(up_next_in_db)} UP_NEXT tasks in database: {[t.title for t in up_next_in_db]}")
@@ -319,142 +583,534 @@ class OrchestratorManager:
                     else:
                         print(f"🚀 Skipped {task.title} due to conflicts")
             
-            # Sort by priority and merge order
+            # Sort by the scheduling policy, then priority and merge order
             # Priority: 1 is highest (process first), 10 is lowest (process last)
             # So we want ascending order for priority
-            up_next_tasks.sort(
-                key=lambda t: (getattr(t, 'priority', 10), -getattr(t, 'merge_order', 0))
-            )
+            up_next_tasks.sort(key=self._task_order_key(pm.get_task_graph()))
+            
+            urgent_tasks = []
+            if self.config.preemption_enabled:
+                # Urgent tasks go first, freezing lower-priority agents if needed
+                urgent_tasks = [t for t in up_next_tasks
+                                if is_urgent(t, self.config.preempt_max_priority)]
+                urgent_ids = {t.id for t in urgent_tasks}
+                up_next_tasks = urgent_tasks + [t for t in up_next_tasks if t.id not in urgent_ids]
+                available_working_slots += await self._preempt_agents(
+                    pm, urgent_tasks, [t for t in running_tasks if not t.suspended_at],
+                    available_working_slots
+                )
+            if suspended_tasks:
+                available_working_slots -= await self._resume_agents(
+                    pm, suspended_tasks, available_working_slots - len(urgent_tasks)
+                )
+            if available_working_slots <= 0:
+                print(f"🚀 No available working slots for agents")
+                return
             
             # Spawn agents for UP_NEXT tasks (limited by available working slots)
             if up_next_tasks:
                 print(f"🚀 Found {len(up_next_tasks)} UP_NEXT tasks ready to spawn")
                 tasks_to_spawn = min(len(up_next_tasks), available_working_slots)
+                granted = self.budget.grant(project.id, tasks_to_spawn)
+                if granted < tasks_to_spawn:
+                    print(f"🚀 Host agent budget allows {granted} of {tasks_to_spawn} agents")
+                    tasks_to_spawn = granted
+                tasks_to_spawn = await self._admit_agents(pm, tasks_to_spawn)
+                if tasks_to_spawn <= 0:
+                    return
                 print(f"🚀 Spawning {tasks_to_spawn} agents (limited by working slots)")
-                for task in up_next_tasks[:tasks_to_spawn]:
+                limits = self._spawn_limits()
+                batch = up_next_tasks[:tasks_to_spawn]
+                for task in batch:
                     print(f"🚀 Spawning agent for task: {task.title}")
-                    await self._spawn_agent_for_task(pm, task)
+                # Spawns overlap, each stage bounded by its own limit
+                results = await asyncio.gather(
+                    *(self._spawn_agent_for_task(pm, task, limits) for task in batch),
+                    return_exceptions=True
+                )
+                spawned = {
+                    task.id: result
+                    for task, result in zip(batch, results) if isinstance(result, str)
+                }
+                self.budget.release(project.id, len(batch) - len(spawned))
+                self.admission.release(len(batch) - len(spawned))
+                
+                if spawned:
+                    await self._mark_spawned(pm, up_next_tasks, spawned, limits["notify"])
+                await self._record_failures(pm, [
+                    (task, f"Spawn failed: {result}")
+                    for task, result in zip(batch, results) if isinstance(result, Exception)
+                ])
             else:
                 print(f"🚀 No UP_NEXT tasks found to spawn")
+                if self.config.speculation_enabled:
+                    await self._launch_backups(pm, tasks, available_working_slots)
         
         except Exception as e:
             print(f"Error spawning agents: {e}")
     
-    async def _spawn_agent_for_task(self, pm: ProjectManager, task: Task):
-        """Spawn a single agent for a task"""
-        try:
-            os.chdir(pm.project_path)
-            
-            # Create worktree from appropriate base
-            worktree_path = pm.worktrees_dir / task.branch
-            if not worktree_path.exists():
-                # Determine base branch
-                base_branch = "main"
-                task_config = get_task_config(task.id)
-                
-                # If task has initialization dependencies, start from the latest one
-                init_deps = task_config.get("initialization_deps", [])
-                if init_deps:
-                    # Find the latest merged dependency
-                    for dep_id in reversed(init_deps):
-                        dep_task = next((t for t in pm.get_tasks() if dep_id in t.id and t.status == TaskStatus.MERGED), None)
-                        if dep_task:
-                            base_branch = dep_task.branch
-                            print(f"📌 Creating worktree from {base_branch} (dependency)")
-                            break
-                
-                subprocess.run([
-                    "git", "worktree", "add",
-                    str(worktree_path),
-                    "-b", task.branch,
-                    base_branch
-                ], check=True)
-                
-                # Copy CLAUDE.md and .claude folder if they exist
-                claude_md_src = pm.project_path / "CLAUDE.md"
-                claude_dir_src = pm.project_path / ".claude"
-                
-                if claude_md_src.exists():
-                    shutil.copy2(claude_md_src, worktree_path / "CLAUDE.md")
-                    print(f"📄 Copied CLAUDE.md to worktree")
-                
-                if claude_dir_src.exists() and claude_dir_src.is_dir():
-                    claude_dir_dst = worktree_path / ".claude"
-                    if claude_dir_dst.exists():
-                        shutil.rmtree(claude_dir_dst)
-                    shutil.copytree(claude_dir_src, claude_dir_dst)
-                    print(f"📁 Copied .claude folder to worktree")
-                
-                # Run initialization script
-                init_script = get_initialization_script(task.id, str(worktree_path))
-                if task_config.get("setup_commands"):
-                    with tempfile.NamedTemporaryFile(mode='w', suffix='_init.sh', delete=False) as f:
-                        f.write(init_script)
-                        init_script_path = f.name
-                    
-                    os.chmod(init_script_path, 0o755)
-                    print(f"🔧 Running initialization for {task.title}...")
-                    subprocess.run(["/bin/bash", init_script_path], cwd=str(worktree_path))
-                    os.unlink(init_script_path)
-            
-            # Generate session name with task ID at the front
-            if task.task_id:
-                session_name = f"{task.task_id}-{pm.project.id}"
+    async def _preempt_agents(self, pm: ProjectManager, urgent_tasks: List[TaskRecord],
+                              running_tasks: List[TaskRecord], available: int) -> int:
+        """Freeze lower-priority agents for urgent tasks that have no slot; returns slots freed"""
+        waiting = urgent_tasks[max(0, available):]
+        if not waiting:
+            return 0
+        
+        frozen = {}
+        for task, victim in choose_victims(waiting, running_tasks):
+            if not await freeze_session(victim.session):
+                print(f"⚠️ Could not freeze agent {victim.session} for task {task.title}")
+                continue
+            print(f"🧊 Froze agent {victim.session} ({victim.title}) for urgent task {task.title}")
+            frozen[victim.id] = (victim, task)
+        if not frozen:
+            return 0
+        
+        now = datetime.now()
+        victims = [victim for victim, _ in frozen.values()]
+        written = await self._set_task_statuses(
+            pm, {victim_id: {"suspended_at": now} for victim_id in frozen},
+            {victim.id: victim.version for victim in victims},
+            recheck=still_as_read(victims, "status", "session", "suspended_at")
+        )
+        written_ids = {task.id for task in written}
+        for victim in victims:
+            if victim.id not in written_ids:
+                # Settled by someone else meanwhile; don't leave it frozen
+                await thaw_session(victim.session)
+                del frozen[victim.id]
+        self.budget.release(pm.project.id, len(frozen))
+        for victim, task in frozen.values():
+            await self.ws_manager.broadcast(WebSocketMessage(
+                type="agent_preempted",
+                project_id=self.current_project_id,
+                data={
+                    "task_id": victim.id,
+                    "session": victim.session,
+                    "priority": victim.priority,
+                    "for_task_id": task.id,
+                    "for_priority": task.priority
+                }
+            ))
+        return len(frozen)
+    
+    async def _resume_agents(self, pm: ProjectManager, suspended_tasks: List[TaskRecord],
+                             spare: int) -> int:
+        """Thaw frozen agents, most urgent first, into slots no urgent task needs"""
+        if spare <= 0:
+            return 0
+        candidates = sorted(
+            suspended_tasks, key=lambda t: (preemption_rank(t), t.suspended_at)
+        )[:spare]
+        granted = self.budget.grant(pm.project.id, len(candidates))
+        
+        resumed = []
+        for task in candidates[:granted]:
+            if await thaw_session(task.session):
+                print(f"▶️ Resumed agent {task.session} ({task.title})")
+                resumed.append(task)
             else:
-                # Fallback to branch-based naming if no task_id
-                session_name = f"{pm.project.id}-{task.branch}"
-            
-            # Create status file for this agent
-            status_file = self.status_dir / f"{session_name}.status"
-            status_file.write_text("RUNNING")
-            
-            # Build agent prompt
-            if task.prompt:
-                # Use custom prompt if provided
-                prompt = task.prompt
-                # Add task title and description as context
-                prompt += f"\\n\\nTask: {task.title}"
-                if task.description:
-                    prompt += f"\\nDescription: {task.description}"
+                # The session is gone; the status check will settle the task
+                print(f"⚠️ Could not resume agent {task.session}")
+        self.budget.release(pm.project.id, granted - len(resumed))
+        
+        now = datetime.now()
+        await self._set_task_statuses(
+            pm, {task.id: {"suspended_at": None, "suspended_seconds": frozen_seconds(task, now)}
+                 for task in candidates[:granted]},
+            {task.id: task.version for task in candidates[:granted]},
+            recheck=lambda fresh: fresh.suspended_at is not None
+        )
+        for task in resumed:
+            await self.ws_manager.broadcast(WebSocketMessage(
+                type="agent_resumed",
+                project_id=self.current_project_id,
+                data={
+                    "task_id": task.id,
+                    "session": task.session,
+                    "suspended_for": (now - task.suspended_at).total_seconds()
+                }
+            ))
+        return len(resumed)
+    
+    async def _resume_all_agents(self):
+        """Thaw every frozen agent of the project, e.g. when the orchestrator stops"""
+        pm = ProjectManager(self.current_project_id)
+        suspended = [t for t in pm.get_tasks_snapshot()
+                     if t.status == TaskStatus.IN_PROGRESS and t.suspended_at]
+        for task in suspended:
+            await thaw_session(task.session)
+            print(f"▶️ Resumed agent {task.session} ({task.title})")
+        now = datetime.now()
+        await self._set_task_statuses(
+            pm, {task.id: {"suspended_at": None, "suspended_seconds": frozen_seconds(task, now)}
+                 for task in suspended},
+            {task.id: task.version for task in suspended},
+            recheck=lambda fresh: fresh.suspended_at is not None
+        )
+    
+    async def _launch_backups(self, pm: ProjectManager, tasks: List[TaskRecord], slots: int):
+        """Start backup agents for straggling tasks in otherwise idle slots"""
+        threshold, stragglers = find_stragglers(
+            tasks, self.config.straggler_percentile, self.config.min_runtime_samples
+        )
+        stragglers = stragglers[:max(0, slots)]
+        if not stragglers:
+            return
+        
+        wanted = self.budget.grant(pm.project.id, len(stragglers))
+        stragglers = stragglers[:await self._admit_agents(pm, wanted)]
+        if not stragglers:
+            return
+        
+        limits = self._spawn_limits()
+        for task in stragglers:
+            print(f"🐢 Task {task.title} is running longer than {threshold / 60:.0f} min; "
+                  f"starting a backup agent on {backup_branch(task.branch)}")
+        # A failed backup doesn't count against the task; its original agent is still running
+        sessions = await asyncio.gather(*(
+            self._spawn_agent_for_task(pm, task._replace(branch=backup_branch(task.branch)),
+                                       limits, backup_session_name(task.session))
+            for task in stragglers
+        ), return_exceptions=True)
+        launched = {task.id: session for task, session in zip(stragglers, sessions)
+                    if isinstance(session, str)}
+        self.budget.release(pm.project.id, len(stragglers) - len(launched))
+        self.admission.release(len(stragglers) - len(launched))
+        
+        racing = [task for task in stragglers if task.id in launched]
+        written = await self._set_task_statuses(
+            pm, {task_id: {"backup_session": session} for task_id, session in launched.items()},
+            {task.id: task.version for task in racing},
+            recheck=still_as_read(racing, "status", "session", "backup_session")
+        )
+        written_ids = {task.id for task in written}
+        dropped = [task for task in racing if task.id not in written_ids]
+        for task in dropped:
+            # The task moved on while the backup started; drop the backup
+            await self._discard_agent(pm, launched[task.id], backup_branch(task.branch))
+        if dropped:
+            self.budget.release(pm.project.id, len(dropped))
+            self.admission.release(len(dropped))
+        now = datetime.now()
+        for task in racing:
+            if task.id in written_ids:
+                await self.ws_manager.broadcast(WebSocketMessage(
+                    type="backup_agent_spawned",
+                    project_id=self.current_project_id,
+                    data={
+                        "task_id": task.id,
+                        "session": launched[task.id],
+                        "branch": backup_branch(task.branch),
+                        "running_for": run_seconds(task, now),
+                        "threshold": threshold
+                    }
+                ))
+    
+    async def _resolve_backups(self, pm: ProjectManager):
+        """
+        Settle races between straggling agents and their backups.
+
+        The first branch with commits wins; a backup also wins if the
+        original agent's session ends without any. The loser's session,
+        worktree and branch are removed, and a winning backup takes over
+        the task's branch and session.
+        """
+        updates = {}
+        tasks = pm.get_tasks_snapshot()
+        for task in tasks:
+            if not task.backup_session:
+                continue
+            backup = backup_branch(task.branch)
+            if task.status == TaskStatus.IN_PROGRESS:
+                primary_done, backup_done = await asyncio.gather(
+                    self._has_commits(pm, task.branch), self._has_commits(pm, backup)
+                )
+                if primary_done:
+                    backup_wins = False
+                elif backup_done or not await self._session_exists(task.session):
+                    backup_wins = True
+                elif not await self._session_exists(task.backup_session):
+                    backup_wins = False
+                else:
+                    continue
             else:
-                # Use default prompt
-                prompt = f"You are working on {pm.project.name}."
-                prompt += f"\\n\\nIMPORTANT: Use the TodoWrite tool to create a todo list for this task. Break down the work into clear, actionable items and track your progress by updating the todo status as you complete each item."
-                prompt += f"\\n\\nCreate a plan, review your plan and choose the best option, then accomplish the following task and commit the changes: {task.title}"
-                if task.description:
-                    prompt += f"\\n\\nDescription: {task.description}"
-            
-            # Add todo tool reminder
-            if "TodoWrite" not in prompt:
-                prompt += f"\\n\\nREMINDER: Use the TodoWrite tool to break down this task into manageable todos and track your progress. Mark todos as 'in_progress' when you start them and 'completed' when done."
-            
-            # Add status file instruction with clear command
-            prompt += f"\\n\\nIMPORTANT: When you have completed all work and committed your changes, execute this command as your FINAL action:\\nbash -c 'echo COMPLETED > {status_file}'"
+                # Settled without the race, e.g. completed or reset by hand
+                backup_wins = False
             
-            # Create a prompt file for Claude to read
-            prompt_file = f"/tmp/claude_prompt_{session_name}.txt"
-            with open(prompt_file, 'w') as f:
-                f.write(prompt)
-            
-            # Create the tmux session first
-            subprocess.run([
-                "tmux", "new-session", "-d",
-                "-s", session_name,
-                "-c", str(worktree_path)
-            ], check=True)
+            if backup_wins:
+                winner, loser = backup, task.branch
+                await self._discard_agent(pm, task.session, task.branch)
+                updates[task.id] = {"branch": backup, "session": task.backup_session,
+                                    "backup_session": None}
+            else:
+                winner, loser = task.branch, backup
+                await self._discard_agent(pm, task.backup_session, backup)
+                updates[task.id] = {"backup_session": None}
+            print(f"🏁 {winner} won the race for task {task.title}; removed {loser}")
+            await self.ws_manager.broadcast(WebSocketMessage(
+                type="backup_agent_resolved",
+                project_id=self.current_project_id,
+                data={
+                    "task_id": task.id,
+                    "winner": winner,
+                    "loser": loser
+                }
+            ))
+        by_id = {task.id: task for task in tasks}
+        await self._set_task_statuses(
+            pm, updates, {task_id: by_id[task_id].version for task_id in updates},
+            recheck=still_as_read(tasks, "branch", "session", "backup_session")
+        )
+    
+    async def _has_commits(self, pm: ProjectManager, branch: str) -> bool:
+        """Whether a branch has commits that aren't on main"""
+        result = await pm.repo.run("log", f"main..{branch}", "--oneline")
+        return result.returncode == 0 and bool(result.stdout.strip())
+    
+    async def _session_exists(self, session: Optional[str]) -> bool:
+        """Whether a tmux session is still alive"""
+        if not session:
+            return False
+        result = await run_command(["tmux", "has-session", "-t", session])
+        return result.returncode == 0
+    
+    async def _discard_agent(self, pm: ProjectManager, session: Optional[str], branch: str):
+        """Kill an agent's session and remove its status files, worktree and branch"""
+        if session:
+            await run_command(["tmux", "kill-session", "-t", session])
+            clear_status_files(self.status_dir, session)
+        worktree_path = pm.worktrees_dir / branch
+        if worktree_path.exists():
+            await pm.repo.run("worktree", "remove", "--force", str(worktree_path))
+        await pm.repo.run("branch", "-D", branch)
+    
+    async def _admit_agents(self, pm: ProjectManager, wanted: int) -> int:
+        """Check host load before starting agents; returns how many may start now"""
+        admitted, reasons = await self.admission.admit(
+            pm.project.id, wanted, pm.worktrees_dir, self.config
+        )
+        if admitted < wanted:
+            deferred = wanted - admitted
+            print(f"⏸️  Deferring {deferred} agent(s) due to host load: {'; '.join(reasons)}")
+            self.budget.release(pm.project.id, deferred)
+            await self.ws_manager.broadcast(WebSocketMessage(
+                type="agent_spawn_deferred",
+                project_id=self.current_project_id,
+                data={
+                    "deferred": deferred,
+                    "admitted": admitted,
+                    "reasons": reasons
+                }
+            ))
+        return admitted
+    
+    def _spawn_limits(self) -> Dict[str, asyncio.Semaphore]:
+        """Per-stage concurrency limits for one round of spawns"""
+        limits = OrchestratorConfig().spawn_stage_limits
+        limits.update(self.config.spawn_stage_limits)
+        return {stage: asyncio.Semaphore(max(1, limit)) for stage, limit in limits.items()}
+    
+    async def _mark_spawned(self, pm: ProjectManager, tasks: List[TaskRecord], spawned: dict,
+                            notify_limit: Optional[asyncio.Semaphore] = None):
+        """Move freshly spawned tasks to IN_PROGRESS with a single write, then notify clients"""
+        now = self._now()
+        by_id = {task.id: task for task in tasks}
+        # Update task status to IN_PROGRESS (since it's moving from UP_NEXT to active work),
+        # unless it was claimed elsewhere while its agent started
+        written = await self._set_task_statuses(pm, {
+            task_id: {"status": TaskStatus.IN_PROGRESS, "session": session_name,
+                      "started_at": now, "suspended_seconds": 0}
+            for task_id, session_name in spawned.items()
+        }, {task_id: by_id[task_id].version for task_id in spawned},
+            recheck=lambda fresh: (fresh.status in (TaskStatus.UNCLAIMED, TaskStatus.UP_NEXT)
+                                   and not fresh.session))
+        written_ids = {task.id for task in written}
+        orphaned = [task_id for task_id in spawned if task_id not in written_ids]
+        for task_id in orphaned:
+            # Claimed, finished or deleted elsewhere while the agent started
+            print(f"⚠️ Task {task_id} changed while its agent started; stopping {spawned[task_id]}")
+            await run_command(["tmux", "kill-session", "-t", spawned[task_id]])
+            clear_status_files(self.status_dir, spawned[task_id])
+        if orphaned:
+            self.budget.release(pm.project.id, len(orphaned))
+            self.admission.release(len(orphaned))
+        spawned = {task_id: session for task_id, session in spawned.items()
+                   if task_id in written_ids}
+        
+        notify_limit = notify_limit or asyncio.Semaphore(1)
+        
+        async def notify(task: TaskRecord):
+            print(f"📊 Task {task.title} moved to IN_PROGRESS")
+            async with notify_limit:
+                await self.ws_manager.broadcast(WebSocketMessage(
+                    type="agent_spawned",
+                    project_id=self.current_project_id,
+                    data={
+                        "task_id": task.id,
+                        "session": spawned[task.id],
+                        "branch": task.branch
+                    }
+                ))
+        
+        # Notify stage
+        await asyncio.gather(*(notify(task) for task in tasks if task.id in spawned))
+    
+    async def _spawn_agent_for_task(self, pm: ProjectManager, task: TaskRecord,
+                                    limits: Dict[str, asyncio.Semaphore],
+                                    session_name: Optional[str] = None) -> Optional[str]:
+        """
+        Spawn a single agent for a task and return its session name.
+
+        Runs the worktree, provision and session stages, each under its own
+        concurrency limit, without blocking the event loop. A failure only
+        affects this task; it is reported to clients and raised for the
+        caller to record.
+        """
+        try:
+            async with limits["worktree"]:
+                worktree_path, created = await self._create_worktree(pm, task)
+            if created:
+                async with limits["provision"]:
+                    await asyncio.to_thread(self._provision_worktree, pm, task, worktree_path)
+            async with limits["session"]:
+                session_name = await asyncio.to_thread(
+                    self._start_session, pm, task, worktree_path, session_name
+                )
             
-            # Get the PTY runner path
-            pty_runner_path = Path(__file__).parent / "claude_pty_runner.py"
+            print(f"✅ Spawned agent for task: {task.title}")
+            return session_name
             
-            # Prepare template variables
-            project_id = pm.project.id
-            task_id = str(task.task_id)
-            branch = task.branch
-            task_title = task.title
-            actual_prompt = prompt
+        except Exception as e:
+            print(f"Error spawning agent for task {task.title}: {e}")
+            await self.ws_manager.broadcast(WebSocketMessage(
+                type="agent_spawn_failed",
+                project_id=self.current_project_id,
+                data={
+                    "task_id": task.id,
+                    "error": str(e)
+                }
+            ))
+            raise
+    
+    async def _create_worktree(self, pm: ProjectManager, task: TaskRecord) -> Tuple[Path, bool]:
+        """Worktree stage: add the task's worktree unless it already exists"""
+        worktree_path = pm.worktrees_dir / task.branch
+        if worktree_path.exists():
+            return worktree_path, False
+        
+        # Determine base branch
+        base_branch = "main"
+        task_config = get_task_config(task.id)
+        
+        # If task has initialization dependencies, start from the latest one
+        init_deps = task_config.get("initialization_deps", [])
+        if init_deps:
+            # Find the latest merged dependency
+            for dep_id in reversed(init_deps):
+                dep_task = next((t for t in pm.get_tasks_snapshot() if dep_id in t.id and t.status == TaskStatus.MERGED), None)
+                if dep_task:
+                    base_branch = dep_task.branch
+                    print(f"📌 Creating worktree from {base_branch} (dependency)")
+                    break
+        
+        await pm.repo.run("worktree", "add", str(worktree_path), "-b", task.branch, base_branch,
+                          check=True)
+        return worktree_path, True
+    
+    def _provision_worktree(self, pm: ProjectManager, task: TaskRecord, worktree_path: Path):
+        """Provision stage: copy agent settings and run the task's setup commands"""
+        # Copy CLAUDE.md and .claude folder if they exist
+        claude_md_src = pm.project_path / "CLAUDE.md"
+        claude_dir_src = pm.project_path / ".claude"
+        
+        if claude_md_src.exists():
+            shutil.copy2(claude_md_src, worktree_path / "CLAUDE.md")
+            print(f"📄 Copied CLAUDE.md to worktree")
+        
+        if claude_dir_src.exists() and claude_dir_src.is_dir():
+            claude_dir_dst = worktree_path / ".claude"
+            if claude_dir_dst.exists():
+                shutil.rmtree(claude_dir_dst)
+            shutil.copytree(claude_dir_src, claude_dir_dst)
+            print(f"📁 Copied .claude folder to worktree")
+        
+        # Run initialization script
+        task_config = get_task_config(task.id)
+        init_script = get_initialization_script(task.id, str(worktree_path))
+        if task_config.get("setup_commands"):
+            with tempfile.NamedTemporaryFile(mode='w', suffix='_init.sh', delete=False) as f:
+                f.write(init_script)
+                init_script_path = f.name
             
-            # Create a wrapper script that runs in the foreground
-            wrapper_script = '''#!/bin/bash
+            os.chmod(init_script_path, 0o755)
+            print(f"🔧 Running initialization for {task.title}...")
+            subprocess.run(["/bin/bash", init_script_path], cwd=str(worktree_path))
+            os.unlink(init_script_path)
+    
+    def _start_session(self, pm: ProjectManager, task: TaskRecord, worktree_path: Path,
+                       session_name: Optional[str] = None) -> str:
+        """Session stage: write the agent prompt and wrapper and start its tmux session"""
+        # Session name with task ID at the front, unless given (backup agents)
+        session_name = session_name or session_name_for(task, pm.project.id)
+        
+        # Create status file for this agent
+        status_file = self.status_dir / f"{session_name}.status"
+        status_file.write_text("RUNNING")
+        # Touched by the wrapper script when the session ends, to wake the loop
+        exit_file = self.status_dir / f"{session_name}.exited"
+        if exit_file.exists():
+            exit_file.unlink()
+        
+        # Build agent prompt
+        custom_prompt = pm.load_prompt(task)
+        if custom_prompt:
+            # Use custom prompt if provided
+            prompt = custom_prompt
+            # Add task title and description as context
+            prompt += f"\\n\\nTask: {task.title}"
+            if task.description:
+                prompt += f"\\nDescription: {task.description}"
+        else:
+            # Use default prompt
+            prompt = f"You are working on {pm.project.name}."
+            prompt += f"\\n\\nIMPORTANT: Use the TodoWrite tool to create a todo list for this task. Break down the work into clear, actionable items and track your progress by updating the todo status as you complete each item."
+            prompt += f"\\n\\nCreate a plan, review your plan and choose the best option, then accomplish the following task and commit the changes: {task.title}"
+            if task.description:
+                prompt += f"\\n\\nDescription: {task.description}"
+        
+        # Add todo tool reminder
+        if "TodoWrite" not in prompt:
+            prompt += f"\\n\\nREMINDER: Use the TodoWrite tool to break down this task into manageable todos and track your progress. Mark todos as 'in_progress' when you start them and 'completed' when done."
+        
+        # Add status file instruction with clear command
+        prompt += f"\\n\\nIMPORTANT: When you have completed all work and committed your changes, execute this command as your FINAL action:\\nbash -c 'echo COMPLETED > {status_file}'"
+        
+        # Create a prompt file for Claude to read
+        prompt_file = f"/tmp/claude_prompt_{session_name}.txt"
+        with open(prompt_file, 'w') as f:
+            f.write(prompt)
+        
+        # Create the tmux session first
+        subprocess.run([
+            "tmux", "new-session", "-d",
+            "-s", session_name,
+            "-c", str(worktree_path)
+        ], check=True)
+        
+        # Get the PTY runner path
+        pty_runner_path = Path(__file__).parent / "claude_pty_runner.py"
+        
+        # Prepare template variables
+        project_id = pm.project.id
+        task_id = str(task.task_id)
+        branch = task.branch
+        task_title = task.title
+        actual_prompt = prompt
+        
+        # Create a wrapper script that runs in the foreground
+        wrapper_script = '''#!/bin/bash
+trap 'touch "{exit_file}"' EXIT
 cd {worktree_path}
 
 echo "🚀 Starting AI agent for task: {task.title}"
@@ -535,91 +1191,51 @@ fi
 # This line will only run if Claude exits with an error
 echo "Claude exited unexpectedly"
 '''
-            
-            # Replace template variables
-            wrapper_script = wrapper_script.replace('{worktree_path}', str(worktree_path))
-            wrapper_script = wrapper_script.replace('{task.title}', task.title)
-            wrapper_script = wrapper_script.replace('{task.description}', task.description or '')
-            wrapper_script = wrapper_script.replace('{project_id}', project_id)
-            wrapper_script = wrapper_script.replace('{session_name}', session_name)
-            wrapper_script = wrapper_script.replace('{task_id}', task_id)
-            wrapper_script = wrapper_script.replace('{branch}', branch)
-            wrapper_script = wrapper_script.replace('{task_title}', task_title)
-            wrapper_script = wrapper_script.replace('{actual_prompt}', actual_prompt)
-            wrapper_script = wrapper_script.replace('{status_file}', str(status_file))
-            
-            # Write the wrapper script
-            wrapper_file = f"/tmp/claude_wrapper_{session_name}.sh"
-            with open(wrapper_file, 'w') as f:
-                f.write(wrapper_script)
-            os.chmod(wrapper_file, 0o755)
-            
-            # Run the wrapper script directly in tmux
-            # Using 'new-window' to ensure clean environment
-            subprocess.run([
-                "tmux", "send-keys", "-t", session_name,
-                f"exec bash {wrapper_file}", "Enter"
-            ])
-            
-            # Clean up files after a delay
-            def cleanup():
-                time.sleep(5)
-                try:
-                    os.remove(wrapper_file)
-                    os.remove(prompt_file)
-                except:
-                    pass
-            
-            threading.Thread(target=cleanup, daemon=True).start()
-            
-            # Ensure session exits when script completes
-            subprocess.run([
-                "tmux", "set-option", "-t", session_name,
-                "remain-on-exit", "off"
-            ], check=False)
-            
-            # Update task status to IN_PROGRESS (since it's moving from UP_NEXT to active work)
-            task.status = TaskStatus.IN_PROGRESS
-            task.session = session_name
-            pm.update_task(task.id, {
-                "status": TaskStatus.IN_PROGRESS,
-                "session": session_name
-            })
-            
-            # Notify via websocket immediately
-            await self.ws_manager.broadcast(WebSocketMessage(
-                type="task_status_changed",
-                project_id=self.current_project_id,
-                data={
-                    "task_id": task.id,
-                    "status": TaskStatus.IN_PROGRESS
-                }
-            ))
-            print(f"📊 Task {task.title} moved to IN_PROGRESS")
-            
-            # Notify clients
-            await self.ws_manager.broadcast(WebSocketMessage(
-                type="agent_spawned",
-                project_id=self.current_project_id,
-                data={
-                    "task_id": task.id,
-                    "session": session_name,
-                    "branch": task.branch
-                }
-            ))
-            
-            print(f"✅ Spawned agent for task: {task.title}")
-            
-        except Exception as e:
-            print(f"Error spawning agent for task {task.title}: {e}")
-            await self.ws_manager.broadcast(WebSocketMessage(
-                type="agent_spawn_failed",
-                project_id=self.current_project_id,
-                data={
-                    "task_id": task.id,
-                    "error": str(e)
-                }
-            ))
+        
+        # Replace template variables
+        wrapper_script = wrapper_script.replace('{worktree_path}', str(worktree_path))
+        wrapper_script = wrapper_script.replace('{task.title}', task.title)
+        wrapper_script = wrapper_script.replace('{task.description}', task.description or '')
+        wrapper_script = wrapper_script.replace('{project_id}', project_id)
+        wrapper_script = wrapper_script.replace('{session_name}', session_name)
+        wrapper_script = wrapper_script.replace('{task_id}', task_id)
+        wrapper_script = wrapper_script.replace('{branch}', branch)
+        wrapper_script = wrapper_script.replace('{task_title}', task_title)
+        wrapper_script = wrapper_script.replace('{actual_prompt}', actual_prompt)
+        wrapper_script = wrapper_script.replace('{status_file}', str(status_file))
+        wrapper_script = wrapper_script.replace('{exit_file}', str(exit_file))
+        
+        # Write the wrapper script
+        wrapper_file = f"/tmp/claude_wrapper_{session_name}.sh"
+        with open(wrapper_file, 'w') as f:
+            f.write(wrapper_script)
+        os.chmod(wrapper_file, 0o755)
+        
+        # Run the wrapper script directly in tmux
+        # Using 'new-window' to ensure clean environment
+        subprocess.run([
+            "tmux", "send-keys", "-t", session_name,
+            f"exec bash {wrapper_file}", "Enter"
+        ])
+        
+        # Clean up files after a delay
+        def cleanup():
+            time.sleep(5)
+            try:
+                os.remove(wrapper_file)
+                os.remove(prompt_file)
+            except:
+                pass
+        
+        threading.Thread(target=cleanup, daemon=True).start()
+        
+        # Ensure session exits when script completes
+        subprocess.run([
+            "tmux", "set-option", "-t", session_name,
+            "remain-on-exit", "off"
+        ], check=False)
+        
+        return session_name
     
     async def _merge_completed_work(self):
         """Auto-merge completed work"""
@@ -628,27 +1244,33 @@ echo "Claude exited unexpectedly"
         
         try:
             pm = ProjectManager(self.current_project_id)
-            tasks = pm.get_tasks()
+            tasks = pm.get_tasks_snapshot()
             
             # Find completed tasks
             completed_tasks = [t for t in tasks if t.status == TaskStatus.COMPLETED]
             
             for task in completed_tasks:
                 # Run auto-merge script
-                result = subprocess.run([
-                    "python",
-                    str(Path(__file__).parent.parent.parent / "scripts" / "auto-merge.py"),
-                    task.branch,
-                    "--strategy", self.config.merge_strategy,
-                    "--json"
-                ], cwd=str(pm.project_path), capture_output=True, text=True)
+                try:
+                    result = await run_command([
+                        "python",
+                        str(Path(__file__).parent.parent.parent / "scripts" / "auto-merge.py"),
+                        task.branch,
+                        "--strategy", self.config.merge_strategy,
+                        "--json"
+                    ], cwd=pm.project_path, timeout=MERGE_TIMEOUT)
+                except subprocess.TimeoutExpired:
+                    # Leave this one for the next pass and merge the rest
+                    print(f"Auto-merge of task {task.title} timed out after {MERGE_TIMEOUT:.0f}s")
+                    continue
                 
                 if result.returncode == 0:
                     # Update task status
-                    pm.update_task(task.id, {
-                        "status": TaskStatus.MERGED,
-                        "merged_at": datetime.now()
-                    })
+                    if not await self._set_task_statuses(
+                        pm, {task.id: {"status": TaskStatus.MERGED, "merged_at": datetime.now()}},
+                        {task.id: task.version}, recheck=still_as_read([task], "status", "branch")
+                    ):
+                        continue
                     
                     # Notify clients
                     await self.ws_manager.broadcast(WebSocketMessage(
@@ -674,7 +1296,8 @@ echo "Claude exited unexpectedly"
         
         try:
             pm = ProjectManager(self.current_project_id)
-            tasks = pm.get_tasks()
+            tasks = pm.get_tasks_snapshot()
+            graph = pm.get_task_graph()
             
             # Check Redis for completed tasks
             try:
@@ -682,7 +1305,7 @@ echo "Claude exited unexpectedly"
                 # The container maps internal port 6379 to external port 6379
                 r = redis.Redis(host='localhost', port=6379, decode_responses=True)
                 completion_key = f"splitmind:{self.current_project_id}:completed_tasks"
-                completed_tasks = r.hgetall(completion_key)
+                completed_tasks = await asyncio.to_thread(r.hgetall, completion_key)
                 
                 # Process completed tasks from Redis
                 for task_id, completion_data in completed_tasks.items():
@@ -690,45 +1313,45 @@ echo "Claude exited unexpectedly"
                     session_name = completion_info.get('session_name')
                     
                     # Find the corresponding task
-                    for task in tasks:
-                        if str(task.task_id) == task_id and task.session == session_name:
-                            print(f"🎯 Redis: Task {task_id} marked as completed by agent {session_name}")
-                            
-                            # Kill the tmux session
-                            subprocess.run(["tmux", "kill-session", "-t", session_name])
-                            print(f"✅ Killed session {session_name}")
-                            
-                            # Clean up status file
-                            status_file = self.status_dir / f"{session_name}.status"
-                            if status_file.exists():
-                                status_file.unlink()
-                            
-                            # Remove from Redis completed tasks
-                            r.hdel(completion_key, task_id)
-                            
-                            # Mark task as completed
-                            pm.update_task(task.id, {
-                                "status": TaskStatus.COMPLETED,
-                                "completed_at": datetime.now()
-                            })
-                            
-                            await self.ws_manager.broadcast(WebSocketMessage(
-                                type="task_completed",
-                                project_id=self.current_project_id,
-                                data={
-                                    "task_id": task.id,
-                                    "branch": task.branch
-                                }
-                            ))
-                            
-                            print(f"✅ Task {task.title} marked as completed")
-                            
-                            # Add to merge queue if auto-merge is enabled
-                            if self.config.auto_merge and self.merge_queue:
-                                all_tasks = pm.get_tasks()
-                                await self.merge_queue.add_to_queue(task, all_tasks)
-                            
-                            break
+                    task = graph.by_session.get(session_name)
+                    if task and str(task.task_id) == task_id:
+                        print(f"🎯 Redis: Task {task_id} marked as completed by agent {session_name}")
+                        
+                        # Kill the tmux session
+                        await run_command(["tmux", "kill-session", "-t", session_name])
+                        print(f"✅ Killed session {session_name}")
+                        
+                        # Clean up status file
+                        status_file = self.status_dir / f"{session_name}.status"
+                        if status_file.exists():
+                            status_file.unlink()
+                        
+                        # Remove from Redis completed tasks
+                        await asyncio.to_thread(r.hdel, completion_key, task_id)
+                        
+                        # Mark task as completed, unless it was settled meanwhile
+                        if not await self._set_task_statuses(
+                            pm, {task.id: {"status": TaskStatus.COMPLETED,
+                                           "completed_at": datetime.now()}},
+                            {task.id: task.version},
+                            recheck=still_as_read([task], "status", "session")
+                        ):
+                            continue
+                        
+                        await self.ws_manager.broadcast(WebSocketMessage(
+                            type="task_completed",
+                            project_id=self.current_project_id,
+                            data={
+                                "task_id": task.id,
+                                "branch": task.branch
+                            }
+                        ))
+                        
+                        print(f"✅ Task {task.title} marked as completed")
+                        
+                        # Add to merge queue if auto-merge is enabled
+                        if self.config.auto_merge and self.merge_queue:
+                            await self.merge_queue.add_to_queue(task, pm.get_task_graph())
                 
             except Exception as e:
                 print(f"Redis check error: {e}")
@@ -737,10 +1360,7 @@ echo "Claude exited unexpectedly"
             for task in tasks:
                 if task.status in [TaskStatus.UP_NEXT, TaskStatus.IN_PROGRESS] and task.session:
                     # Check if tmux session is still active
-                    result = subprocess.run(
-                        ["tmux", "has-session", "-t", task.session],
-                        capture_output=True
-                    )
+                    result = await run_command(["tmux", "has-session", "-t", task.session])
                     
                     # Check status file first
                     status_file = self.status_dir / f"{task.session}.status"
@@ -751,14 +1371,17 @@ echo "Claude exited unexpectedly"
                             print(f"✅ Agent {task.session} signaled COMPLETED via status file")
                             
                             # Kill the session
-                            subprocess.run(["tmux", "kill-session", "-t", task.session])
+                            await run_command(["tmux", "kill-session", "-t", task.session])
                             status_file.unlink()  # Clean up status file
                             
-                            # Update task status immediately
-                            pm.update_task(task.id, {
-                                "status": TaskStatus.COMPLETED,
-                                "completed_at": datetime.now()
-                            })
+                            # Update task status immediately, unless it was settled meanwhile
+                            if not await self._set_task_statuses(
+                                pm, {task.id: {"status": TaskStatus.COMPLETED,
+                                               "completed_at": datetime.now()}},
+                                {task.id: task.version},
+                                recheck=still_as_read([task], "status", "session")
+                            ):
+                                continue
                             
                             await self.ws_manager.broadcast(WebSocketMessage(
                                 type="task_completed",
@@ -773,43 +1396,37 @@ echo "Claude exited unexpectedly"
                             
                             # Add to merge queue if auto-merge is enabled
                             if self.config.auto_merge and self.merge_queue:
-                                all_tasks = pm.get_tasks()
-                                await self.merge_queue.add_to_queue(task, all_tasks)
+                                await self.merge_queue.add_to_queue(task, pm.get_task_graph())
                             
                             # Skip further processing for this task
                             continue
                     
                     elif result.returncode == 0:
                         # Session exists but no status file, check if agent is done by looking at output
-                        capture_result = subprocess.run(
-                            ["tmux", "capture-pane", "-t", task.session, "-p"],
-                            capture_output=True,
-                            text=True
+                        capture_result = await run_command(
+                            ["tmux", "capture-pane", "-t", task.session, "-p"]
                         )
                         
                         output = capture_result.stdout
                         if "✅ Task completed" in output or "Task completed!" in output or "All changes have been committed" in output:
                             # Agent finished, kill the session
-                            subprocess.run(["tmux", "kill-session", "-t", task.session])
+                            await run_command(["tmux", "kill-session", "-t", task.session])
                             result.returncode = 1  # Pretend session doesn't exist
                     
                     if result.returncode != 0:
                         # Session no longer exists, check if work was done
-                        os.chdir(pm.project_path)
-                        
                         # Check for commits on the branch
-                        result = subprocess.run(
-                            ["git", "log", f"main..{task.branch}", "--oneline"],
-                            capture_output=True,
-                            text=True
-                        )
+                        result = await pm.repo.run("log", f"main..{task.branch}", "--oneline")
                         
                         if result.stdout.strip():
-                            # Commits exist, mark as completed
-                            pm.update_task(task.id, {
-                                "status": TaskStatus.COMPLETED,
-                                "completed_at": datetime.now()
-                            })
+                            # Commits exist, mark as completed unless it was settled meanwhile
+                            if not await self._set_task_statuses(
+                                pm, {task.id: {"status": TaskStatus.COMPLETED,
+                                               "completed_at": datetime.now()}},
+                                {task.id: task.version},
+                                recheck=still_as_read([task], "status", "session")
+                            ):
+                                continue
                             
                             await self.ws_manager.broadcast(WebSocketMessage(
                                 type="task_completed",
@@ -824,31 +1441,18 @@ echo "Claude exited unexpectedly"
                             
                             # Add to merge queue if auto-merge is enabled
                             if self.config.auto_merge and self.merge_queue:
-                                all_tasks = pm.get_tasks()
-                                await self.merge_queue.add_to_queue(task, all_tasks)
+                                await self.merge_queue.add_to_queue(task, pm.get_task_graph())
                         else:
-                            # No commits yet, reset task status so it can be retried
-                            print(f"⚠️ Agent for task {task.title} stopped without commits - resetting to UP_NEXT")
-                            
-                            # Reset task status to UP_NEXT so it can be picked up again
-                            pm.update_task(task.id, {
-                                "status": TaskStatus.UP_NEXT,
-                                "session": None
-                            })
-                            
-                            await self.ws_manager.broadcast(WebSocketMessage(
-                                type="task_status_changed",
-                                project_id=self.current_project_id,
-                                data={
-                                    "task_id": task.id,
-                                    "status": TaskStatus.UP_NEXT
-                                }
-                            ))
+                            # No commits yet, retry after a delay or quarantine the task
+                            print(f"⚠️ Agent for task {task.title} stopped without commits")
+                            await self._record_failures(
+                                pm, [(task, "Agent session ended without commits")]
+                            )
         
         except Exception as e:
             print(f"Error checking agent status: {e}")
     
-    async def _check_and_merge_completed_tasks(self, pm: ProjectManager, tasks: List[Task]):
+    async def _check_and_merge_completed_tasks(self, pm: ProjectManager, tasks: Sequence[TaskRecord]):
         """Check for completed tasks and auto-merge if enabled"""
         if not self.config.auto_merge:
             print("🔀 Auto-merge is disabled")
@@ -870,7 +1474,7 @@ echo "Claude exited unexpectedly"
                     # Check if task is already in merge queue by ID
                     if task.id not in queue_ids:
                         print(f"📋 Adding completed task to merge queue: {task.title} (ID: {task.id})")
-                        await self.merge_queue.add_to_queue(task, tasks)
+                        await self.merge_queue.add_to_queue(task, pm.get_task_graph())
                         
                         # Notify via websocket
                         await self.ws_manager.broadcast(WebSocketMessage(
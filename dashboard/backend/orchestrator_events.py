@@ -0,0 +1,199 @@
+"""
+Wakeup sources for the orchestrator loop
+"""
+import asyncio
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Tuple
+
+import redis
+
+from .task_store import add_write_listener, remove_write_listener
+
+
+# Events arriving this soon after the first one are handled by the same tick
+WAKEUP_DEBOUNCE = 0.5  # seconds
+
+# How often the agent status directory is checked for changes
+STATUS_POLL_INTERVAL = 1.0  # seconds
+
+# Delay before reconnecting to Redis after it went away
+REDIS_RETRY_INTERVAL = 30.0  # seconds
+
+
+class WakeupSignal:
+    """
+    Debounced wakeups for the orchestrator loop.
+
+    ``notify`` may be called from any thread. ``wait`` returns the reasons
+    collected since the last tick, or ``{"interval"}`` when the safety-net
+    timeout passed without any event.
+    """
+
+    def __init__(self, debounce: float = WAKEUP_DEBOUNCE):
+        self.debounce = debounce
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event: Optional[asyncio.Event] = None
+        self._reasons: Set[str] = set()
+
+    def bind(self):
+        """Deliver wakeups to the running event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        self._reasons = set()
+
+    def notify(self, reason: str):
+        """Ask for a tick as soon as possible"""
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._set, reason)
+        except RuntimeError:
+            # The loop was closed
+            pass
+
+    def _set(self, reason: str):
+        self._reasons.add(reason)
+        self._event.set()
+
+    async def wait(self, timeout: float) -> Set[str]:
+        """Wait for a wakeup, or at most ``timeout`` seconds"""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return {"interval"}
+        # Let the rest of a burst arrive so it collapses into one tick
+        await asyncio.sleep(self.debounce)
+        self._event.clear()
+        reasons, self._reasons = self._reasons, set()
+        return reasons
+
+
+class StoreWriteWatcher:
+    """Reports task store writes made in this process for one project"""
+
+    def __init__(self, project_id: str, on_change: Callable[[], None]):
+        self.project_id = project_id
+        self.on_change = on_change
+
+    def _on_write(self, project_id: str):
+        if project_id == self.project_id:
+            self.on_change()
+
+    def start(self):
+        add_write_listener(self._on_write)
+
+    def stop(self):
+        remove_write_listener(self._on_write)
+
+
+class StatusDirWatcher:
+    """
+    Reports new, changed and removed files in the agent status directory.
+
+    Agents write COMPLETED into their status file, and agent wrapper scripts
+    drop a ``.exited`` marker when their tmux session ends. Polling a
+    handful of stat calls keeps this free of extra dependencies. With
+    ``name_filter``, only files of the sessions it matches are watched, so
+    one project's agents don't wake another project's loop.
+    """
+
+    def __init__(self, status_dir: Path, on_change: Callable[[], None],
+                 interval: float = STATUS_POLL_INTERVAL,
+                 name_filter: Optional["re.Pattern"] = None):
+        self.status_dir = Path(status_dir)
+        self.on_change = on_change
+        self.interval = interval
+        self.name_filter = name_filter
+        self._stop = threading.Event()
+
+    def start(self):
+        self._stop.clear()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        files = {}
+        try:
+            with os.scandir(self.status_dir) as entries:
+                for entry in entries:
+                    session = os.path.splitext(entry.name)[0]
+                    if self.name_filter and not self.name_filter.match(session):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        return files
+
+    def _run(self):
+        previous = self._snapshot()
+        while not self._stop.wait(self.interval):
+            current = self._snapshot()
+            if current != previous:
+                self.on_change()
+            previous = current
+
+
+class RedisCompletionWatcher:
+    """
+    Reports writes to a project's Redis hash of completed tasks.
+
+    Uses keyspace notifications, enabling them for hashes if needed without
+    dropping flags someone else configured. While Redis is unavailable the
+    orchestrator falls back to its interval poll.
+    """
+
+    def __init__(self, project_id: str, on_change: Callable[[], None],
+                 host: str = 'localhost', port: int = 6379):
+        self.key = f"splitmind:{project_id}:completed_tasks"
+        self.on_change = on_change
+        self.host = host
+        self.port = port
+        self._stop = threading.Event()
+
+    def start(self):
+        self._stop.clear()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        warned = False
+        while not self._stop.is_set():
+            try:
+                r = redis.Redis(host=self.host, port=self.port, decode_responses=True)
+                self._enable_notifications(r)
+                pubsub = r.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f"__keyspace@*__:{self.key}")
+                warned = False
+                try:
+                    while not self._stop.is_set():
+                        if pubsub.get_message(timeout=1.0):
+                            self.on_change()
+                finally:
+                    pubsub.close()
+                    r.close()
+            except Exception as e:
+                if not warned:
+                    print(f"⚠️  Redis completion notifications unavailable: {e}")
+                    warned = True
+                self._stop.wait(REDIS_RETRY_INTERVAL)
+
+    @staticmethod
+    def _enable_notifications(r: redis.Redis):
+        flags = r.config_get("notify-keyspace-events").get("notify-keyspace-events", "")
+        # "A" already includes hash events
+        wanted = "K" if "A" in flags else "Kh"
+        missing = "".join(flag for flag in wanted if flag not in flags)
+        if missing:
+            r.config_set("notify-keyspace-events", flags + missing)
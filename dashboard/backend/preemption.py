@@ -0,0 +1,86 @@
+"""
+Priority preemption: freezing low-priority agents so urgent tasks can start
+"""
+from typing import List, Optional, Sequence, Tuple
+
+from .process_runner import run_command
+from .task_record import TaskRecord
+
+
+# Rank of tasks without an explicit priority: below every priority from 1 up
+UNSET_PRIORITY_RANK = float("inf")
+
+
+def preemption_rank(task: TaskRecord) -> float:
+    """How urgent a task is; 1 is most urgent and unset (0) priorities rank last"""
+    priority = task.priority or 0
+    return priority if priority > 0 else UNSET_PRIORITY_RANK
+
+
+def is_urgent(task: TaskRecord, max_priority: int) -> bool:
+    """Whether a waiting task may preempt a running agent"""
+    return preemption_rank(task) <= max_priority
+
+
+def choose_victims(urgent: Sequence[TaskRecord],
+                   running: Sequence[TaskRecord]) -> List[Tuple[TaskRecord, TaskRecord]]:
+    """
+    Pair urgent waiting tasks with the running tasks to freeze for them.
+
+    The most urgent task gets the least urgent running agent, ties going to
+    the agent started last, since it has the least work to lose if it is
+    never resumed. An agent is only frozen for a task strictly more urgent
+    than its own.
+    """
+    candidates = sorted(
+        (t for t in running if t.session),
+        key=lambda t: (preemption_rank(t), t.started_at.timestamp() if t.started_at else 0),
+        reverse=True
+    )
+    pairs = []
+    for task, victim in zip(sorted(urgent, key=preemption_rank), candidates):
+        if preemption_rank(victim) <= preemption_rank(task):
+            break
+        pairs.append((task, victim))
+    return pairs
+
+
+async def session_leader(session_name: str) -> Optional[int]:
+    """PID of the shell in a tmux session's pane, which leads the pane's process session"""
+    result = await run_command(
+        ["tmux", "display-message", "-p", "-t", session_name, "#{pane_pid}"], timeout=10
+    )
+    try:
+        return int(result.stdout.strip()) if result.returncode == 0 else None
+    except ValueError:
+        return None
+
+
+async def signal_session(session_name: str, signal_name: str) -> bool:
+    """
+    Send a signal to every process the shell in a tmux session's pane started.
+
+    Matches the pane's whole process session, so the agent's subprocesses
+    are frozen along with it. The shell itself is left alone: tmux resumes
+    a pane's process group as soon as its shell stops, and the shell only
+    waits for the agent anyway.
+    """
+    leader = await session_leader(session_name)
+    if not leader:
+        return False
+    result = await run_command(["pgrep", "-s", str(leader)], timeout=10)
+    pids = [pid for pid in result.stdout.split() if pid != str(leader)]
+    if not pids:
+        return False
+    result = await run_command(["kill", f"-{signal_name}", *pids], timeout=10)
+    return result.returncode == 0
+
+
+async def freeze_session(session_name: str) -> bool:
+    """Stop an agent's processes in place; returns whether any were stopped"""
+    return await signal_session(session_name, "STOP")
+
+
+async def thaw_session(session_name: str) -> bool:
+    """Let a frozen agent's processes continue"""
+    return await signal_session(session_name, "CONT")
@@ -0,0 +1,100 @@
+"""
+Non-blocking execution of git, tmux and other external commands
+"""
+import asyncio
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Union
+
+
+# Commands still running after this long are killed
+DEFAULT_TIMEOUT = 120.0  # seconds
+
+# Merges, pulls and the auto-merge script can legitimately take much longer
+# (hooks, network, large histories), so their callers pass this instead
+MERGE_TIMEOUT = 1800.0  # seconds
+
+# Bytes kept from each of stdout and stderr; the rest is read and dropped
+MAX_OUTPUT = 1024 * 1024
+
+_READ_CHUNK = 64 * 1024
+
+
+async def _read_limited(stream: asyncio.StreamReader, limit: int) -> bytes:
+    """Read a stream to the end, keeping at most ``limit`` bytes"""
+    data = bytearray()
+    while True:
+        chunk = await stream.read(_READ_CHUNK)
+        if not chunk:
+            return bytes(data)
+        if len(data) < limit:
+            data.extend(chunk[:limit - len(data)])
+
+
+async def run_command(args: Sequence[str],
+                      cwd: Optional[Union[str, Path]] = None,
+                      env: Optional[Dict[str, str]] = None,
+                      timeout: Optional[float] = DEFAULT_TIMEOUT,
+                      check: bool = False,
+                      input: Optional[str] = None,
+                      max_output: int = MAX_OUTPUT) -> subprocess.CompletedProcess:
+    """
+    Run a command without blocking the event loop.
+
+    Behaves like ``subprocess.run(args, capture_output=True, text=True)``:
+    the result carries decoded stdout/stderr, ``check`` raises
+    CalledProcessError on a non-zero exit, and a command outliving
+    ``timeout`` is killed and raises TimeoutExpired. ``env`` is added to
+    the current environment rather than replacing it. Stdin is closed
+    unless ``input`` is given, so a command can never wait on a prompt.
+    """
+    args = [str(arg) for arg in args]
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        cwd=str(cwd) if cwd is not None else None,
+        env={**os.environ, **env} if env else None,
+        stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+
+    async def communicate():
+        if input is not None:
+            process.stdin.write(input.encode('utf-8'))
+            await process.stdin.drain()
+            process.stdin.close()
+        out, err = await asyncio.gather(
+            _read_limited(process.stdout, max_output),
+            _read_limited(process.stderr, max_output)
+        )
+        await process.wait()
+        return out, err
+
+    try:
+        stdout, stderr = await asyncio.wait_for(communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        _kill(process)
+        await process.wait()
+        raise subprocess.TimeoutExpired(args, timeout)
+    except BaseException:
+        # Cancelled: don't leave the command running behind us
+        _kill(process)
+        raise
+
+    result = subprocess.CompletedProcess(
+        args, process.returncode,
+        stdout.decode('utf-8', errors='replace'),
+        stderr.decode('utf-8', errors='replace')
+    )
+    if check:
+        result.check_returncode()
+    return result
+
+
+def _kill(process: asyncio.subprocess.Process):
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
@@ -1,13 +1,19 @@
 """
 Project-specific operations for SplitMind
 """
-import os
+import bisect
 import subprocess
 from pathlib import Path
-from typing import List, Optional, Dict
-from datetime import datetime
+from typing import List, Optional, Dict, Tuple
+from datetime import datetime, timedelta
 from .models import Task, TaskStatus, Agent, ProjectStats
 from .config import config_manager
+from .git_repo import GitRepo
+from .process_runner import run_command
+from .task_archive import TaskArchive, archive_candidates, task_archive
+from .task_store import TaskStore, create_task_store, task_page_key
+from .task_graph import TaskGraph, graph_for_snapshot
+from .task_record import TaskRecord
 
 
 class ProjectManager:
@@ -22,272 +28,185 @@ class ProjectManager:
         self.project_path = Path(self.project.path)
         self.splitmind_dir = self.project_path / ".splitmind"
         self.tasks_file = self.splitmind_dir / "tasks.md"
+        self.store: TaskStore = create_task_store(
+            self.project.id, self.splitmind_dir, self.project.task_store
+        )
+        self.archive: TaskArchive = task_archive(self.splitmind_dir)
         self.worktrees_dir = self.project_path / "worktrees"
         self.git_dir = self.project_path / ".git"
+        self.repo = GitRepo(self.project_path)
     
     def _ensure_directories(self):
         """Ensure required directories exist"""
         self.splitmind_dir.mkdir(exist_ok=True)
         self.worktrees_dir.mkdir(exist_ok=True)
     
-    def _sanitize_task_id(self, task_id: str) -> str:
-        """Sanitize task ID to avoid URL routing issues"""
-        # Replace problematic characters
-        sanitized = task_id.replace('/', '-')
-        sanitized = sanitized.replace('\\', '-')
-        sanitized = sanitized.replace('&', 'and')
-        return sanitized
-
     def get_tasks(self) -> List[Task]:
-        """Read and parse tasks from tasks.md"""
-        if not self.tasks_file.exists():
-            return []
-        
-        tasks = []
-        current_task = None
-        max_task_id = 0
-        
-        with open(self.tasks_file, 'r') as f:
-            for line in f:
-                line = line.strip()
-                
-                if line.startswith("## Task:"):
-                    # Save previous task
-                    if current_task:
-                        tasks.append(current_task)
-                    
-                    # Start new task
-                    title = line.replace("## Task:", "").strip()
-                    # Generate sanitized ID
-                    task_id = title.lower().replace(" ", "-")
-                    task_id = self._sanitize_task_id(task_id)
-                    current_task = {
-                        "id": task_id,
-                        "task_id": None,
-                        "title": title,
-                        "status": TaskStatus.UNCLAIMED,
-                        "branch": None,
-                        "session": None,
-                        "description": None,
-                        "dependencies": [],
-                        "priority": 0,
-                        "merge_order": 0,
-                        "exclusive_files": [],
-                        "shared_files": [],
-                        "initialization_deps": []
-                    }
-                
-                elif current_task and line.startswith("- "):
-                    # Parse task properties
-                    if line.startswith("- task_id:"):
-                        try:
-                            task_id = int(line.replace("- task_id:", "").strip())
-                            current_task["task_id"] = task_id
-                            max_task_id = max(max_task_id, task_id)
-                        except ValueError:
-                            pass
-                    
-                    elif line.startswith("- status:"):
-                        status_str = line.replace("- status:", "").strip()
-                        try:
-                            current_task["status"] = TaskStatus(status_str)
-                        except ValueError:
-                            current_task["status"] = TaskStatus.UNCLAIMED
-                    
-                    elif line.startswith("- branch:"):
-                        branch = line.replace("- branch:", "").strip()
-                        if branch != "null":
-                            # Sanitize branch name as well
-                            branch = self._sanitize_task_id(branch)
-                            current_task["branch"] = branch
-                    
-                    elif line.startswith("- session:"):
-                        session = line.replace("- session:", "").strip()
-                        if session != "null":
-                            current_task["session"] = session
-                    
-                    elif line.startswith("- description:"):
-                        current_task["description"] = line.replace("- description:", "").strip()
-                    
-                    elif line.startswith("- prompt:"):
-                        current_task["prompt"] = line.replace("- prompt:", "").strip()
-                    
-                    elif line.startswith("- dependencies:"):
-                        deps_str = line.replace("- dependencies:", "").strip()
-                        if deps_str and deps_str != "[]":
-                            current_task["dependencies"] = [d.strip() for d in deps_str.strip("[]").split(",") if d.strip()]
-                    
-                    elif line.startswith("- priority:"):
-                        try:
-                            current_task["priority"] = int(line.replace("- priority:", "").strip())
-                        except ValueError:
-                            current_task["priority"] = 0
-                    
-                    elif line.startswith("- merge_order:"):
-                        try:
-                            current_task["merge_order"] = int(line.replace("- merge_order:", "").strip())
-                        except ValueError:
-                            current_task["merge_order"] = 0
-                    
-                    elif line.startswith("- exclusive_files:"):
-                        files_str = line.replace("- exclusive_files:", "").strip()
-                        if files_str and files_str != "[]":
-                            current_task["exclusive_files"] = [f.strip() for f in files_str.strip("[]").split(",") if f.strip()]
-                    
-                    elif line.startswith("- shared_files:"):
-                        files_str = line.replace("- shared_files:", "").strip()
-                        if files_str and files_str != "[]":
-                            current_task["shared_files"] = [f.strip() for f in files_str.strip("[]").split(",") if f.strip()]
-                    
-                    elif line.startswith("- initialization_deps:"):
-                        deps_str = line.replace("- initialization_deps:", "").strip()
-                        if deps_str and deps_str != "[]":
-                            current_task["initialization_deps"] = [d.strip() for d in deps_str.strip("[]").split(",") if d.strip()]
-        
-        # Don't forget the last task
-        if current_task:
-            tasks.append(current_task)
-        
-        # Assign task IDs to tasks that don't have them
-        for task in tasks:
-            if task.get("task_id") is None:
-                max_task_id += 1
-                task["task_id"] = max_task_id
-        
-        # Convert to Task models
-        result_tasks = [Task(**task) for task in tasks if task.get("branch")]
-        
-        # Sort tasks by priority and task_id to maintain consistent order
-        result_tasks.sort(key=lambda t: (t.priority if t.priority is not None else 10, t.task_id or 0))
-        
-        # print(f"📖 Loaded {len(result_tasks)} tasks from database")
-        # for task in result_tasks:
-        #     print(f"📖 Loaded {task.title}: status = {task.status}")
-        return result_tasks
+        """Get a private, mutable copy of the project's tasks"""
+        return [self.store.load_task(task) for task in self.store.get_tasks_snapshot()]
+    
+    def get_tasks_snapshot(self) -> Tuple[TaskRecord, ...]:
+        """
+        Get the shared task snapshot.
+
+        Served from the process-wide cache while the task store is unchanged.
+        The records are immutable; use get_tasks() for Task models.
+        """
+        return self.store.get_tasks_snapshot()
+    
+    def get_task_graph(self) -> TaskGraph:
+        """Get the dependency graph for the current task snapshot"""
+        return graph_for_snapshot(self.project.id, self.store.get_tasks_snapshot(),
+                                  self.archive.ids())
+    
+    def list_tasks(self, statuses: Optional[List[TaskStatus]] = None,
+                   wave: Optional[int] = None, limit: Optional[int] = None,
+                   after: Optional[Tuple[int, int, str]] = None,
+                   include_archived: bool = False
+                   ) -> Tuple[List[TaskRecord], Optional[Tuple[int, int, str]], int]:
+        """
+        Filter and page through the task snapshot.
+
+        Status filters are served from the task graph's status buckets.
+        Archived tasks are only read with ``include_archived``.
+        ``after`` is the page key of the last task already returned. Returns
+        the page, the page key to continue from (None on the last page) and
+        the number of matching tasks.
+        """
+        graph = self.get_task_graph()
+        if statuses:
+            tasks = graph.with_status(*statuses)
+        else:
+            tasks = self.get_tasks_snapshot()
+        if include_archived and (not statuses or TaskStatus.MERGED in statuses):
+            tasks = list(tasks) + [t for t in self.archive.read() if t.id not in graph]
+        if wave is not None:
+            tasks = [t for t in tasks if t.wave == wave]
+
+        # Snapshots are already in listing order, so this is close to linear
+        tasks = sorted(tasks, key=task_page_key)
+        total = len(tasks)
+        if after is not None:
+            keys = [task_page_key(t) for t in tasks]
+            tasks = tasks[bisect.bisect_right(keys, after):]
+        if limit is None or len(tasks) <= limit:
+            return tasks, None, total
+        page = tasks[:limit]
+        return page, task_page_key(page[-1]), total
+    
+    def task_dict(self, task: TaskRecord) -> dict:
+        """A task record as a response dict, with its full prompt"""
+        return self.store.task_dict(task)
+    
+    def load_prompt(self, task: TaskRecord) -> Optional[str]:
+        """A task's prompt text, read from its blob if it was stored as one"""
+        return self.store.blobs.resolve(task.prompt)
+    
+    def get_task(self, task_id: str) -> Optional[Task]:
+        """Get a single task by ID"""
+        return self.store.get_task(task_id)
+    
+    def get_tasks_by_status(self, *statuses: TaskStatus) -> List[TaskRecord]:
+        """Get tasks in any of the given statuses"""
+        return self.store.get_tasks_by_status(*statuses)
     
     def save_tasks(self, tasks: List[Task]):
-        """Save tasks back to tasks.md"""
-        content = ["# tasks.md\n"]
-        
-        # print(f"💾 Saving {len(tasks)} tasks to database...")
-        
-        # Sort tasks before saving to maintain consistent order
-        sorted_tasks = sorted(tasks, key=lambda t: (t.priority if t.priority is not None else 10, t.task_id or 0))
-        
-        for task in sorted_tasks:
-            content.append(f"\n## Task: {task.title}\n")
-            content.append(f"- task_id: {task.task_id}")
-            # Always save the enum value, not the enum object
-            status_value = task.status.value if hasattr(task.status, 'value') else str(task.status)
-            content.append(f"- status: {status_value}")
-            # print(f"💾 Saving {task.title}: status = {status_value}")
-            content.append(f"- branch: {task.branch}")
-            content.append(f"- session: {task.session or 'null'}")
-            if task.description:
-                content.append(f"- description: {task.description}")
-            if task.prompt:
-                content.append(f"- prompt: {task.prompt}")
-            if hasattr(task, 'dependencies') and task.dependencies:
-                content.append(f"- dependencies: [{', '.join(task.dependencies)}]")
-            if hasattr(task, 'priority') and task.priority > 0:
-                content.append(f"- priority: {task.priority}")
-            if hasattr(task, 'merge_order') and task.merge_order > 0:
-                content.append(f"- merge_order: {task.merge_order}")
-            if hasattr(task, 'exclusive_files') and task.exclusive_files:
-                content.append(f"- exclusive_files: [{', '.join(task.exclusive_files)}]")
-            if hasattr(task, 'shared_files') and task.shared_files:
-                content.append(f"- shared_files: [{', '.join(task.shared_files)}]")
-            if hasattr(task, 'initialization_deps') and task.initialization_deps:
-                content.append(f"- initialization_deps: [{', '.join(task.initialization_deps)}]")
-            content.append("")
-        
-        with open(self.tasks_file, 'w') as f:
-            f.write('\n'.join(content))
+        """Replace all stored tasks"""
+        self.store.replace_all(tasks)
+    
+    def export_tasks(self) -> Path:
+        """Write the tasks.md view of the task store"""
+        return self.store.export_markdown()
+    
+    def import_tasks(self) -> int:
+        """Load tasks.md into the task store"""
+        return self.store.import_markdown()
+    
+    def reset_tasks(self):
+        """Remove all tasks from the task store and the archive"""
+        self.store.reset()
+        self.archive.clear()
+    
+    def archive_merged_tasks(self, older_than: timedelta) -> int:
+        """Move tasks MERGED longer than ``older_than`` ago into the archive"""
+        with self.store.lock:
+            cutoff = datetime.now() - older_than
+            tasks = archive_candidates(self.get_task_graph().with_status(TaskStatus.MERGED), cutoff)
+            if not tasks:
+                return 0
+            # Archive first, so a crash in between leaves a duplicate rather than a loss
+            self.archive.add(tasks)
+            self.store.delete_tasks([task.id for task in tasks])
+            self.store.compact()
+        print(f"🗄️  Archived {len(tasks)} merged tasks for {self.project.name}")
+        return len(tasks)
     
     def add_task(self, title: str, description: Optional[str] = None, 
                  dependencies: Optional[List[str]] = None, priority: int = 0,
-                 prompt: Optional[str] = None) -> Task:
+                 prompt: Optional[str] = None, wave: Optional[int] = None) -> Task:
         """Add a new task"""
-        tasks = self.get_tasks()
-        
-        # Find the highest task_id
-        max_task_id = 0
-        for t in tasks:
-            if t.task_id:
-                max_task_id = max(max_task_id, t.task_id)
-        
-        # Create task with auto-incremented task_id
-        new_task_id = max_task_id + 1
-        
-        # Generate simple branch name: task-{number}
-        branch = f"task-{new_task_id}"
-        # Use simple ID format: task_number-project_id
-        simple_id = f"{new_task_id}-{self.project.id}"
-        task = Task(
-            id=simple_id,
-            task_id=new_task_id,
-            title=title,
-            description=description,
-            prompt=prompt,
-            branch=branch,
-            status=TaskStatus.UNCLAIMED,
-            dependencies=dependencies or [],
-            priority=priority
-        )
-        
-        tasks.append(task)
-        self.save_tasks(tasks)
-        
-        return task
+        with self.store.lock:
+            # Create task with auto-incremented task_id
+            new_task_id = self.store.max_task_id() + 1
+            
+            # Generate simple branch name: task-{number}
+            branch = f"task-{new_task_id}"
+            # Use simple ID format: task_number-project_id
+            simple_id = f"{new_task_id}-{self.project.id}"
+            task = Task(
+                id=simple_id,
+                task_id=new_task_id,
+                title=title,
+                description=description,
+                prompt=prompt,
+                branch=branch,
+                status=TaskStatus.UNCLAIMED,
+                dependencies=dependencies or [],
+                priority=priority,
+                wave=wave
+            )
+            
+            self.store.add_task(task)
+            return task
     
-    def update_task(self, task_id: str, updates: dict) -> Task:
-        """Update a task"""
-        tasks = self.get_tasks()
-        
-        for i, task in enumerate(tasks):
-            if task.id == task_id:
-                # Update fields
-                for key, value in updates.items():
-                    if hasattr(task, key):
-                        # Convert status strings to TaskStatus enum
-                        if key == 'status' and isinstance(value, str):
-                            from .models import TaskStatus
-                            try:
-                                value = TaskStatus(value)
-                            except ValueError:
-                                pass  # Keep original value if invalid
-                        setattr(task, key, value)
-                
-                task.updated_at = datetime.now()
-                tasks[i] = task
-                self.save_tasks(tasks)
-                return task
-        
-        raise ValueError(f"Task '{task_id}' not found")
+    def update_task(self, task_id: str, updates: dict,
+                    expected_version: Optional[int] = None) -> Task:
+        """Update a task, optionally only if it is still at ``expected_version``"""
+        expected = {task_id: expected_version} if expected_version is not None else None
+        return self.update_tasks({task_id: updates}, expected)[0]
     
-    def delete_task(self, task_id: str):
+    def update_tasks(self, updates: Dict[str, dict],
+                     expected: Optional[Dict[str, int]] = None) -> List[Task]:
+        """Update several tasks with a single read and a single write"""
+        return self.store.update_tasks(updates, expected)
+    
+    def delete_task(self, task_id: str, expected_version: Optional[int] = None):
         """Delete a task"""
-        tasks = self.get_tasks()
-        tasks = [t for t in tasks if t.id != task_id]
-        self.save_tasks(tasks)
+        self.store.delete_task(task_id, expected_version)
     
-    def get_agents(self) -> List[Agent]:
+    def get_revision(self) -> int:
+        """Revision of the last write to this project's tasks"""
+        return self.store.revision()
+
+    def get_changes(self, since: int) -> dict:
+        """Tasks changed and IDs deleted after revision ``since``"""
+        return self.store.get_changes(since)
+    
+    async def get_agents(self) -> List[Agent]:
         """Get running agents for this project"""
         agents = []
         
         try:
             # Get tmux sessions
-            result = subprocess.run(
+            result = await run_command(
                 ["tmux", "list-sessions", "-F", "#{session_name}"],
-                capture_output=True,
-                text=True,
                 check=True
             )
             
             sessions = result.stdout.strip().split('\n')
             
             # Match sessions to tasks
-            tasks = self.get_tasks()
+            tasks = self.get_tasks_snapshot()
             for task in tasks:
                 if task.session:
                     # Check if any session matches or starts with the task session name (handles tmux truncation)
@@ -314,6 +233,8 @@ class ProjectManager:
                                 agent_status = "completed"
                             elif file_status == "RUNNING":
                                 agent_status = "running"
+                        if task.suspended_at:
+                            agent_status = "suspended"
                         
                         agent = Agent(
                             id=matching_session,
@@ -323,7 +244,7 @@ class ProjectManager:
                             branch=task.branch,
                             status=agent_status,
                             progress=self._estimate_progress(task),
-                            started_at=getattr(task, 'created_at', datetime.now()),
+                            started_at=task.started_at or task.created_at or datetime.now(),
                             logs=[]
                         )
                         agents.append(agent)
@@ -334,24 +255,30 @@ class ProjectManager:
         
         return agents
     
-    def _estimate_progress(self, task: Task) -> int:
+    def _estimate_progress(self, task: TaskRecord) -> int:
         """Estimate task progress based on status"""
         status_progress = {
             TaskStatus.UNCLAIMED: 0,
             TaskStatus.UP_NEXT: 10,
             TaskStatus.IN_PROGRESS: 50,
             TaskStatus.COMPLETED: 90,
-            TaskStatus.MERGED: 100
+            TaskStatus.MERGED: 100,
+            # Given up on until retried by hand, which starts over
+            TaskStatus.QUARANTINED: 0
         }
         return status_progress.get(task.status, 0)
     
-    def get_stats(self) -> ProjectStats:
+    async def get_stats(self) -> ProjectStats:
         """Get project statistics"""
-        tasks = self.get_tasks()
-        agents = self.get_agents()
+        graph = self.get_task_graph()
+        tasks = self.get_tasks_snapshot()
+        agents = await self.get_agents()
+        # Archived tasks still count as merged
+        archived = len([task_id for task_id in graph.archived if task_id not in graph])
         
         stats = ProjectStats(
-            total_tasks=len(tasks),
+            total_tasks=len(tasks) + archived,
+            merged_tasks=archived,
             active_agents=len([a for a in agents if a.status == "running"])
         )
         
@@ -367,21 +294,17 @@ class ProjectManager:
                 stats.completed_tasks += 1
             elif task.status == TaskStatus.MERGED:
                 stats.merged_tasks += 1
+            elif task.status == TaskStatus.QUARANTINED:
+                stats.quarantined_tasks += 1
         
         return stats
     
-    def get_worktrees(self) -> List[Dict[str, str]]:
+    async def get_worktrees(self) -> List[Dict[str, str]]:
         """Get git worktrees for this project"""
         worktrees = []
         
         try:
-            os.chdir(self.project_path)
-            result = subprocess.run(
-                ["git", "worktree", "list", "--porcelain"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            result = await self.repo.run("worktree", "list", "--porcelain", check=True)
             
             current_worktree = {}
             for line in result.stdout.strip().split('\n'):
@@ -404,7 +327,7 @@ class ProjectManager:
         """Check if the project path is a Git repository"""
         return self.git_dir.exists() and self.git_dir.is_dir()
     
-    def get_git_status(self) -> Dict[str, any]:
+    async def get_git_status(self) -> Dict[str, any]:
         """Get Git repository status"""
         if not self.is_git_repo():
             return {"is_git_repo": False}
@@ -413,34 +336,16 @@ class ProjectManager:
         
         try:
             # Get current branch
-            result = subprocess.run(
-                ["git", "branch", "--show-current"],
-                cwd=str(self.project_path),
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            result = await self.repo.run("branch", "--show-current", check=True)
             status["current_branch"] = result.stdout.strip()
             
             # Check for uncommitted changes
-            result = subprocess.run(
-                ["git", "status", "--porcelain"],
-                cwd=str(self.project_path),
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            result = await self.repo.run("status", "--porcelain", check=True)
             status["has_changes"] = bool(result.stdout.strip())
             
             # Get remote URL if exists
             try:
-                result = subprocess.run(
-                    ["git", "remote", "get-url", "origin"],
-                    cwd=str(self.project_path),
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
+                result = await self.repo.run("remote", "get-url", "origin", check=True)
                 status["remote_url"] = result.stdout.strip()
             except subprocess.CalledProcessError:
                 status["remote_url"] = None
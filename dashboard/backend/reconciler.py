@@ -0,0 +1,239 @@
+"""
+Reconciliation of a project's tasks with the agents actually on the host
+"""
+import asyncio
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set
+
+import redis
+
+from .models import TaskStatus
+from .process_runner import run_command
+from .speculation import BACKUP_SUFFIX, backup_branch
+from .task_record import TaskRecord
+
+
+def session_name_for(task: TaskRecord, project_id: str) -> str:
+    """tmux session the orchestrator starts for a task's agent"""
+    if task.task_id:
+        return f"{task.task_id}-{project_id}"
+    # Fallback to branch-based naming if no task_id
+    return f"{project_id}-{task.branch}"
+
+
+def project_session_pattern(project_id: str) -> "re.Pattern":
+    """Matches the names of agent sessions the orchestrator starts for a project"""
+    pid = re.escape(project_id)
+    return re.compile(rf"^(\d+-{pid}|{pid}-.+)({re.escape(BACKUP_SUFFIX)})?$")
+
+
+class ObservedState(NamedTuple):
+    """
+    One snapshot of what is actually running for a project.
+
+    ``unmerged_branches`` is None when git couldn't tell (e.g. no main
+    branch), and ``redis_completions`` is None when Redis is unavailable.
+    """
+    sessions: Set[str]
+    status_files: Dict[str, str]  # session name -> contents
+    redis_completions: Optional[Dict[str, dict]]  # task number -> completion info
+    worktrees: Dict[str, Path]  # branch -> worktree path
+    unmerged_branches: Optional[Set[str]]
+
+
+class ReconciliationPlan(NamedTuple):
+    """Everything needed to bring tasks and host back in line, computed in one diff"""
+    adopt: Dict[str, str]  # task ID -> live session to mark IN_PROGRESS with
+    keep: List[str]  # IN_PROGRESS task IDs whose agent is still running
+    complete: List[str]
+    requeue: List[str]
+    kill_sessions: List[str]
+    write_status_files: List[str]  # sessions missing their RUNNING status file
+    remove_status_files: List[str]
+    clear_redis: List[str]
+    remove_worktrees: List[str]  # worktree paths
+
+    def summary(self) -> Dict[str, int]:
+        """Number of actions of each kind"""
+        return {field: len(getattr(self, field)) for field in self._fields}
+
+
+async def _tmux_sessions() -> Set[str]:
+    result = await run_command(["tmux", "list-sessions", "-F", "#{session_name}"], timeout=10)
+    # No tmux server means no sessions
+    return set(result.stdout.split()) if result.returncode == 0 else set()
+
+
+def _status_files(status_dir: Path, project_id: str) -> Dict[str, str]:
+    # Only this project's sessions; "web" must not pick up "3-web2"
+    pattern = project_session_pattern(project_id)
+    files = {}
+    try:
+        with os.scandir(status_dir) as entries:
+            for entry in entries:
+                session = entry.name[:-len(".status")]
+                if entry.name.endswith(".status") and pattern.match(session):
+                    try:
+                        files[session] = Path(entry.path).read_text().strip()
+                    except OSError:
+                        continue
+    except FileNotFoundError:
+        pass
+    return files
+
+
+def _redis_completions(project_id: str) -> Optional[Dict[str, dict]]:
+    try:
+        r = redis.Redis(host='localhost', port=6379, decode_responses=True,
+                        socket_connect_timeout=2, socket_timeout=2)
+        raw = r.hgetall(f"splitmind:{project_id}:completed_tasks")
+    except Exception:
+        return None
+    completions = {}
+    for task_number, data in raw.items():
+        try:
+            completions[task_number] = json.loads(data)
+        except ValueError:
+            completions[task_number] = {}
+    return completions
+
+
+def _parse_worktrees(porcelain: str) -> Dict[str, Path]:
+    worktrees = {}
+    path = None
+    for line in porcelain.splitlines():
+        if line.startswith("worktree "):
+            path = Path(line[len("worktree "):])
+        elif line.startswith("branch refs/heads/") and path is not None:
+            worktrees[line[len("branch refs/heads/"):]] = path
+    return worktrees
+
+
+async def observe_state(pm, status_dir: Path) -> ObservedState:
+    """Take one snapshot of sessions, status files, Redis completions, worktrees and branches"""
+    project_id = pm.project.id
+    sessions, worktrees, unmerged, completions = await asyncio.gather(
+        _tmux_sessions(),
+        pm.repo.run("worktree", "list", "--porcelain"),
+        pm.repo.run("for-each-ref", "--no-merged=main", "--format=%(refname:short)",
+                    "refs/heads/"),
+        asyncio.to_thread(_redis_completions, project_id),
+    )
+    return ObservedState(
+        sessions=sessions,
+        status_files=_status_files(status_dir, project_id),
+        redis_completions=completions,
+        worktrees=_parse_worktrees(worktrees.stdout) if worktrees.returncode == 0 else {},
+        unmerged_branches=set(unmerged.stdout.split()) if unmerged.returncode == 0 else None,
+    )
+
+
+def plan_reconciliation(tasks: Sequence[TaskRecord], observed: ObservedState,
+                        project_id: str, worktrees_dir: Path) -> ReconciliationPlan:
+    """
+    Diff the tasks' recorded state against what is running.
+
+    - IN_PROGRESS tasks whose agent reported completion (status file or
+      Redis), or whose sessions are gone but whose branch has commits, are
+      completed. Those with a live agent or backup session are kept; the
+      rest are requeued, counting as a failed attempt.
+    - UNCLAIMED and UP_NEXT tasks with a live agent session, e.g. from a
+      spawn whose status write was lost, are adopted as IN_PROGRESS.
+    - Agent sessions left running for COMPLETED or MERGED tasks, or for no
+      task at all, are killed, and status files and Redis completions that
+      no longer belong to a live agent are dropped.
+    - Worktrees in the project's worktrees/ directory whose branch is fully
+      merged and belongs to no active, requeued or QUARANTINED task are
+      removed; anything with unmerged commits is left alone, and worktrees
+      with uncommitted changes are kept when the removal runs.
+    """
+    pattern = project_session_pattern(project_id)
+    live = observed.sessions
+    unmerged = observed.unmerged_branches
+    completions = observed.redis_completions or {}
+    completed_by_session = {
+        info.get("session_name"): task_number for task_number, info in completions.items()
+    }
+
+    adopt, keep, complete, requeue = {}, [], [], []
+    kill_sessions: Set[str] = set()
+    active_sessions: Set[str] = set()
+    active_branches: Set[str] = set()
+
+    for task in tasks:
+        task_sessions = [s for s in (task.session, task.backup_session) if s]
+        reported = bool(task.session) and (
+            observed.status_files.get(task.session) == "COMPLETED"
+            or completed_by_session.get(task.session) == str(task.task_id)
+        )
+
+        if task.status == TaskStatus.IN_PROGRESS:
+            if reported:
+                complete.append(task.id)
+                kill_sessions.update(task_sessions)
+            elif task.session in live or task.backup_session in live:
+                keep.append(task.id)
+                active_sessions.update(task_sessions)
+                active_branches.update((task.branch, backup_branch(task.branch)))
+            elif unmerged is None:
+                # Can't tell whether work was done; leave it to the completion watcher
+                active_sessions.update(task_sessions)
+                active_branches.update((task.branch, backup_branch(task.branch)))
+            elif task.branch in unmerged:
+                complete.append(task.id)
+                kill_sessions.update(task_sessions)
+            else:
+                requeue.append(task.id)
+                kill_sessions.update(task_sessions)
+                # The retry reuses the worktree and whatever the agent left in it
+                active_branches.add(task.branch)
+        elif task.status in (TaskStatus.UNCLAIMED, TaskStatus.UP_NEXT):
+            candidates = [task.session, session_name_for(task, project_id)]
+            session = next((s for s in candidates if s and s in live), None)
+            if session and not reported:
+                adopt[task.id] = session
+                active_sessions.add(session)
+                active_branches.update((task.branch, backup_branch(task.branch)))
+            else:
+                active_branches.add(task.branch)
+        else:
+            kill_sessions.update(task_sessions)
+            if task.status == TaskStatus.COMPLETED:
+                # The merge queue still needs the branch
+                active_branches.add(task.branch)
+            elif task.status == TaskStatus.QUARANTINED:
+                # Kept for whoever looks into why the agent keeps failing
+                active_branches.add(task.branch)
+
+    kill_sessions.update(s for s in live if pattern.match(s) and s not in active_sessions)
+    kill_sessions &= live
+    kill_sessions -= active_sessions
+
+    # Completion reports no task is waiting on
+    clear_redis = [
+        task_number for task_number, info in completions.items()
+        if info.get("session_name") not in active_sessions
+    ]
+
+    remove_worktrees = []
+    if unmerged is not None:
+        for branch, path in observed.worktrees.items():
+            if (path.parent == worktrees_dir and branch not in active_branches
+                    and branch not in unmerged):
+                remove_worktrees.append(str(path))
+
+    return ReconciliationPlan(
+        adopt=adopt,
+        keep=keep,
+        complete=complete,
+        requeue=requeue,
+        kill_sessions=sorted(kill_sessions),
+        write_status_files=sorted(s for s in active_sessions & live
+                                  if s not in observed.status_files),
+        remove_status_files=sorted(s for s in observed.status_files if s not in active_sessions),
+        clear_redis=sorted(clear_redis),
+        remove_worktrees=sorted(remove_worktrees),
+    )
@@ -0,0 +1,54 @@
+"""
+Retry budget for tasks whose agents keep failing
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+from .models import OrchestratorConfig, TaskStatus
+from .task_record import TaskRecord
+
+
+# Longest failure reason kept on a task
+MAX_FAILURE_LENGTH = 500
+
+
+def retry_delay(attempts: int, base: float, maximum: float) -> float:
+    """Seconds to wait after the ``attempts``-th failure, doubling with each one"""
+    if attempts <= 0 or base <= 0:
+        return 0
+    return min(maximum, base * 2 ** (attempts - 1))
+
+
+def is_backing_off(task: TaskRecord, now: datetime) -> bool:
+    """Whether a failed task is still waiting out its retry delay"""
+    return task.retry_after is not None and task.retry_after > now
+
+
+def failure_updates(task: TaskRecord, reason: str, config: OrchestratorConfig,
+                    now: datetime) -> Dict[str, Any]:
+    """
+    Updates for a task whose agent failed to spawn or stopped without commits.
+
+    The task goes back to TODO and is not promoted again until its retry
+    delay has passed. After ``max_task_attempts`` failures it is
+    quarantined instead, so its slot goes to work that can succeed.
+    """
+    attempts = task.attempts + 1
+    # Kept on one line so it survives tasks.md
+    reason = " ".join(reason.split())[:MAX_FAILURE_LENGTH]
+    updates = {"attempts": attempts, "last_failure": reason, "session": None,
+               "suspended_at": None}
+    if config.max_task_attempts and attempts >= config.max_task_attempts:
+        updates.update(status=TaskStatus.QUARANTINED, retry_after=None)
+    else:
+        delay = retry_delay(attempts, config.retry_backoff_seconds,
+                            config.max_retry_backoff_seconds)
+        updates.update(status=TaskStatus.UNCLAIMED,
+                       retry_after=now + timedelta(seconds=delay) if delay else None)
+    return updates
+
+
+def retry_updates() -> Dict[str, Any]:
+    """Updates giving a task a fresh retry budget, e.g. to release it from quarantine"""
+    return {"status": TaskStatus.UNCLAIMED, "session": None, "attempts": 0,
+            "last_failure": None, "retry_after": None}
@@ -0,0 +1,144 @@
+"""
+Scheduling policies for promoting and spawning tasks
+"""
+import math
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from .task_graph import SATISFIED_STATUSES, TaskGraph
+from .task_record import TaskRecord
+
+
+PRIORITY = "priority"
+CRITICAL_PATH = "critical_path"
+SCHEDULING_POLICIES = (PRIORITY, CRITICAL_PATH)
+
+
+def priority_key(task: TaskRecord) -> Tuple[int, int]:
+    """The orchestrator's original order: priority, then latest merge_order"""
+    return (getattr(task, 'priority', 10), -getattr(task, 'merge_order', 0))
+
+
+def frozen_seconds(task: TaskRecord, now: datetime) -> float:
+    """Seconds a task's agent has spent frozen since it was started, up to ``now``"""
+    seconds = task.suspended_seconds or 0
+    if task.suspended_at and task.suspended_at < now:
+        seconds += (now - task.suspended_at).total_seconds()
+    return seconds
+
+
+def run_seconds(task: TaskRecord, end: datetime) -> float:
+    """Seconds a task's agent has run from ``started_at`` to ``end``, not counting frozen time"""
+    return (end - task.started_at).total_seconds() - frozen_seconds(task, end)
+
+
+def duration_estimates(tasks: Iterable[TaskRecord]) -> Tuple[Dict[Optional[int], float], Optional[float]]:
+    """
+    Mean run time in seconds of finished tasks, per wave and overall.
+
+    Only tasks with both ``started_at`` and ``completed_at`` count, and
+    time their agents spent frozen is left out.
+    """
+    by_wave: Dict[Optional[int], list] = {}
+    for task in tasks:
+        if task.started_at and task.completed_at:
+            seconds = run_seconds(task, task.completed_at)
+            if seconds > 0:
+                by_wave.setdefault(task.wave, []).append(seconds)
+    if not by_wave:
+        return {}, None
+    all_durations = [d for durations in by_wave.values() for d in durations]
+    means = {wave: sum(d) / len(d) for wave, d in by_wave.items()}
+    return means, sum(all_durations) / len(all_durations)
+
+
+def run_time_percentile(tasks: Iterable[TaskRecord], percentile: float,
+                        min_samples: int = 1) -> Optional[float]:
+    """
+    Run time in seconds that ``percentile`` percent of finished tasks stayed within.
+
+    Uses the nearest-rank method, leaving out time agents spent frozen;
+    None with fewer than ``min_samples`` finished tasks.
+    """
+    durations = sorted(
+        run_seconds(task, task.completed_at)
+        for task in tasks if task.started_at and task.completed_at
+    )
+    durations = [d for d in durations if d > 0]
+    if not durations or len(durations) < min_samples:
+        return None
+    rank = math.ceil(min(max(percentile, 0), 100) / 100 * len(durations))
+    return durations[max(rank, 1) - 1]
+
+
+class CriticalPathScheduler:
+    """
+    Orders tasks by the remaining critical path they start.
+
+    A task's remaining critical path is its own estimated duration plus the
+    longest remaining path among the unfinished tasks that depend on it, so
+    tasks at the head of long dependency chains are started first. Without
+    run time history, or with ``weighted`` off, every task counts as one
+    unit; otherwise a task is estimated at the mean run time of finished
+    tasks in its wave, or of all finished tasks.
+    """
+
+    def __init__(self, graph: TaskGraph, weighted: bool = True):
+        self.graph = graph
+        self.wave_means: Dict[Optional[int], float] = {}
+        self.mean: Optional[float] = None
+        if weighted:
+            self.wave_means, self.mean = duration_estimates(graph.tasks())
+        self._remaining: Dict[str, float] = {}
+
+    def estimate(self, task: TaskRecord) -> float:
+        """Expected run time of a task, in seconds or in units without history"""
+        if self.mean is None:
+            return 1.0
+        return self.wave_means.get(task.wave, self.mean)
+
+    def remaining(self, task_id: str) -> float:
+        """Length of the longest chain of unfinished work starting at a task"""
+        if task_id in self._remaining:
+            return self._remaining[task_id]
+
+        # Iterative post-order walk, so long chains don't hit the recursion limit
+        on_path = set()
+        stack = [(task_id, False)]
+        while stack:
+            current, expanded = stack.pop()
+            if current in self._remaining:
+                continue
+            dependents = [d for d in self.graph.dependents.get(current, ())
+                          if self._unfinished(d)]
+            if not expanded:
+                on_path.add(current)
+                stack.append((current, True))
+                # Dependents already on the walk are part of a cycle; ignore them
+                stack.extend((d, False) for d in dependents
+                             if d not in self._remaining and d not in on_path)
+                continue
+            on_path.discard(current)
+            task = self.graph.get(current)
+            own = self.estimate(task) if task is not None else 0.0
+            longest = max((self._remaining.get(d, 0.0) for d in dependents), default=0.0)
+            self._remaining[current] = own + longest
+        return self._remaining[task_id]
+
+    def key(self, task: TaskRecord) -> tuple:
+        """Sort key: longest remaining path first, then the priority order"""
+        return (-self.remaining(task.id),) + priority_key(task)
+
+    def _unfinished(self, task_id: str) -> bool:
+        task = self.graph.get(task_id)
+        return task is not None and task.status not in SATISFIED_STATUSES
+
+
+def task_order_key(policy: str, graph: TaskGraph,
+                   weighted: bool = True) -> Callable[[TaskRecord], tuple]:
+    """Sort key that puts the task to start first, for a scheduling policy"""
+    if policy == CRITICAL_PATH:
+        return CriticalPathScheduler(graph, weighted).key
+    if policy != PRIORITY:
+        print(f"⚠️  Unknown scheduling policy '{policy}', using '{PRIORITY}'")
+    return priority_key
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Discrete-event simulator for the orchestrator's scheduling decisions
+
+Drives the real _manage_task_queue and _spawn_agents logic against
+synthetic task DAGs, with fake agents whose run times are sampled, on a
+virtual clock: no tmux, git, network or host sampling. Use it to compare
+scheduling policies, max_concurrent_agents values and DAG shapes before
+changing production config:
+
+    python backend/simulator.py --shapes layered chain --agents 2 4 8
+"""
+
+import argparse
+import asyncio
+import contextlib
+import heapq
+import io
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.agent_budget import AgentBudget
+from backend.models import OrchestratorConfig, Project, Task, TaskStatus
+from backend.orchestrator import OrchestratorManager
+from backend.scheduler import SCHEDULING_POLICIES
+from backend.task_graph import TaskGraph
+from backend.task_record import TaskRecord
+from backend.task_store import TaskConflictError
+from backend.websocket_manager import WebSocketManager
+
+
+DAG_SHAPES = ("layered", "chain", "wide", "fan")
+
+# Virtual time starts here, so timestamps look like the real ones
+EPOCH = datetime(2024, 1, 1)
+
+
+class SyntheticTask(NamedTuple):
+    """A generated task and the run time its fake agent will take"""
+    id: str
+    dependencies: Tuple[str, ...]
+    wave: int
+    priority: int
+    duration: float  # seconds
+
+
+def make_dag(shape: str, count: int, rng: random.Random,
+             mean_minutes: float = 30.0) -> List[SyntheticTask]:
+    """
+    Generate ``count`` tasks in a dependency shape.
+
+    - layered: about sqrt(count) waves, each task depending on 1-3 tasks of
+      the previous wave
+    - chain: every task depends on the one before
+    - wide: no dependencies at all
+    - fan: one root, independent middle tasks, and one task depending on
+      all of them
+
+    Run times are log-normal around ``mean_minutes``; about one task in ten
+    gets an explicit priority.
+    """
+    if shape not in DAG_SHAPES:
+        raise ValueError(f"Unknown DAG shape '{shape}'; expected one of {', '.join(DAG_SHAPES)}")
+    ids = [f"sim-task-{i}" for i in range(1, count + 1)]
+
+    if shape == "layered":
+        waves = max(2, round(math.sqrt(count)))
+        wave_of = [min(waves - 1, i * waves // count) for i in range(count)]
+    elif shape == "chain":
+        wave_of = list(range(count))
+    elif shape == "wide":
+        wave_of = [0] * count
+    else:
+        wave_of = [0] + [1] * max(0, count - 2) + ([2] if count > 1 else [])
+    by_wave: Dict[int, List[str]] = {}
+    for task_id, wave in zip(ids, wave_of):
+        by_wave.setdefault(wave, []).append(task_id)
+
+    sigma = 0.6
+    mu = math.log(mean_minutes * 60) - sigma ** 2 / 2
+    tasks = []
+    for task_id, wave in zip(ids, wave_of):
+        previous = by_wave.get(wave - 1, [])
+        if shape == "layered" and previous:
+            dependencies = rng.sample(previous, min(len(previous), rng.randint(1, 3)))
+        elif shape == "fan" and wave == 2:
+            dependencies = previous
+        else:
+            dependencies = previous[-1:] if shape != "wide" else []
+        priority = rng.randint(1, 3) if rng.random() < 0.1 else 0
+        tasks.append(SyntheticTask(task_id, tuple(dependencies), wave, priority,
+                                   rng.lognormvariate(mu, sigma)))
+    return tasks
+
+
+class SimulatedProject:
+    """Stands in for ProjectManager: tasks live in memory and writes are instant"""
+
+    def __init__(self, project: Project, tasks: List[TaskRecord]):
+        self.project = project
+        self.worktrees_dir = Path(tempfile.gettempdir()) / "splitmind-sim" / "worktrees"
+        self.tasks: Dict[str, TaskRecord] = {task.id: task for task in tasks}
+        self.revision = 0
+        self._graph: Optional[TaskGraph] = None
+
+    def get_tasks_snapshot(self) -> Tuple[TaskRecord, ...]:
+        return tuple(self.tasks.values())
+
+    def get_task_graph(self) -> TaskGraph:
+        if self._graph is None:
+            self._graph = TaskGraph(self.tasks.values())
+        return self._graph
+
+    def update_tasks(self, updates: Dict[str, dict],
+                     expected: Optional[Dict[str, int]] = None) -> List[Task]:
+        for task_id, version in (expected or {}).items():
+            actual = self.tasks[task_id].version
+            if actual != version:
+                raise TaskConflictError(task_id, version, actual)
+        self.revision += 1
+        updated = []
+        for task_id, changes in updates.items():
+            self.tasks[task_id] = self.tasks[task_id]._replace(**changes, version=self.revision)
+            updated.append(self.tasks[task_id].to_task())
+        self._graph = None
+        return updated
+
+
+class SimulatedOrchestrator(OrchestratorManager):
+    """The real queue and spawn decisions, with agents started by the simulation"""
+
+    def __init__(self, simulation: "Simulation"):
+        super().__init__(WebSocketManager(),
+                         AgentBudget(simulation.config.max_concurrent_agents))
+        self.simulation = simulation
+
+    def _now(self) -> datetime:
+        return self.simulation.now()
+
+    async def _admit_agents(self, pm, wanted: int) -> int:
+        return wanted
+
+    async def _spawn_agent_for_task(self, pm, task, limits, session_name=None) -> Optional[str]:
+        return self.simulation.start_agent(task)
+
+
+class Simulation:
+    """
+    One project run from the first tick until every task is merged.
+
+    The orchestrator ticks after every batch of simultaneous events, as the
+    event-driven loop does. Completed tasks are merged one at a time, each
+    taking ``merge_minutes``.
+    """
+
+    def __init__(self, dag: List[SyntheticTask], config: OrchestratorConfig,
+                 merge_minutes: float = 2.0):
+        self.dag = {task.id: task for task in dag}
+        self.config = config
+        self.merge_seconds = merge_minutes * 60
+        self.clock = 0.0
+        self._events: List[Tuple[float, int, str, str]] = []
+        self._sequence = 0
+        self.project = Project(id="simulation", name="Simulation", path=tempfile.gettempdir(),
+                               max_agents=config.max_concurrent_agents)
+        self.pm = SimulatedProject(self.project, [
+            TaskRecord(id=task.id, task_id=i, title=task.id, branch=task.id,
+                       dependencies=tuple(task.dependencies), priority=task.priority, wave=task.wave)
+            for i, task in enumerate(dag, start=1)
+        ])
+        self.orchestrator = SimulatedOrchestrator(self)
+        self.orchestrator.update_config(config)
+        self.orchestrator.current_project_id = self.project.id
+        self.orchestrator.budget.capacity = config.max_concurrent_agents
+        self.orchestrator.budget.register(self.project.id)
+
+        self.running = 0
+        self.merge_queue: List[str] = []
+        self.merging: Optional[str] = None
+        self.ready_at: Dict[str, float] = {}
+        self.started_at: Dict[str, float] = {}
+        self.busy_seconds = 0.0
+        self.backlog_seconds = 0.0
+        self.max_backlog = 0
+
+    def now(self) -> datetime:
+        return EPOCH + timedelta(seconds=self.clock)
+
+    def _schedule(self, delay: float, kind: str, task_id: str):
+        self._sequence += 1
+        heapq.heappush(self._events, (self.clock + delay, self._sequence, kind, task_id))
+
+    def start_agent(self, task: TaskRecord) -> str:
+        """Fake agent: finishes after the task's sampled run time"""
+        self.running += 1
+        self.started_at[task.id] = self.clock
+        self._schedule(self.dag[task.id].duration, "finished", task.id)
+        return f"sim-{task.id}"
+
+    def _start_merge(self):
+        if self.merging is None and self.merge_queue:
+            self.merging = self.merge_queue.pop(0)
+            self._schedule(self.merge_seconds, "merged", self.merging)
+
+    def _handle(self, kind: str, task_id: str):
+        if kind == "finished":
+            self.running -= 1
+            self.pm.update_tasks({task_id: {"status": TaskStatus.COMPLETED,
+                                            "completed_at": self.now()}})
+            self.merge_queue.append(task_id)
+            self._start_merge()
+        else:
+            self.pm.update_tasks({task_id: {"status": TaskStatus.MERGED, "merged_at": self.now()}})
+            self.merging = None
+            self._start_merge()
+
+    def _update_ready_times(self):
+        for task_id in self.pm.get_task_graph().ready:
+            self.ready_at.setdefault(task_id, self.clock)
+
+    async def _tick(self):
+        tasks = self.pm.get_tasks_snapshot()
+        # The decision logic narrates every tick; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            await self.orchestrator._manage_task_queue(self.pm, self.project, tasks, [])
+            await self.orchestrator._spawn_agents(
+                self.pm, self.project, self.pm.get_tasks_snapshot(), []
+            )
+
+    async def run(self) -> dict:
+        """Simulate until every task is merged and return the metrics"""
+        self._update_ready_times()
+        while True:
+            await self._tick()
+            if all(task.status == TaskStatus.MERGED for task in self.pm.tasks.values()):
+                break
+            if not self._events:
+                stuck = [t.id for t in self.pm.tasks.values() if t.status != TaskStatus.MERGED]
+                raise RuntimeError(f"Simulation stalled with {len(stuck)} unmerged tasks: {stuck[:5]}")
+
+            at = self._events[0][0]
+            backlog = len(self.merge_queue) + (self.merging is not None)
+            self.busy_seconds += self.running * (at - self.clock)
+            self.backlog_seconds += backlog * (at - self.clock)
+            self.clock = at
+            while self._events and self._events[0][0] == at:
+                _, _, kind, task_id = heapq.heappop(self._events)
+                self._handle(kind, task_id)
+            self.max_backlog = max(self.max_backlog,
+                                   len(self.merge_queue) + (self.merging is not None))
+            self._update_ready_times()
+        return self.metrics()
+
+    def metrics(self) -> dict:
+        """Total time, slot utilization, queue wait and merge backlog"""
+        total = self.clock
+        waits = sorted(self.started_at[task_id] - self.ready_at.get(task_id, 0.0)
+                       for task_id in self.started_at)
+        slots = self.config.max_concurrent_agents
+        return {
+            "total_hours": total / 3600,
+            "utilization": self.busy_seconds / (slots * total) if total else 0.0,
+            "mean_wait_minutes": statistics.mean(waits) / 60 if waits else 0.0,
+            "p90_wait_minutes": waits[max(0, math.ceil(0.9 * len(waits)) - 1)] / 60 if waits else 0.0,
+            "mean_merge_backlog": self.backlog_seconds / total if total else 0.0,
+            "max_merge_backlog": self.max_backlog,
+        }
+
+
+def simulate(dag: List[SyntheticTask], policy: str, agents: int,
+             merge_minutes: float = 2.0) -> dict:
+    """Metrics for one DAG under one scheduling policy and agent count"""
+    config = OrchestratorConfig(
+        max_concurrent_agents=agents, max_total_agents=agents, scheduling_policy=policy,
+        preemption_enabled=False, speculation_enabled=False
+    )
+    return asyncio.run(Simulation(dag, config, merge_minutes).run())
+
+
+def compare(shapes: List[str], policies: List[str], agent_counts: List[int], tasks: int,
+            seeds: int, mean_minutes: float, merge_minutes: float):
+    """Print metrics averaged over ``seeds`` DAGs for every combination"""
+    columns = ("total_hours", "utilization", "mean_wait_minutes", "p90_wait_minutes",
+               "mean_merge_backlog", "max_merge_backlog")
+    for shape in shapes:
+        dags = [make_dag(shape, tasks, random.Random(seed), mean_minutes) for seed in range(seeds)]
+        print(f"\n📊 {shape} DAG, {tasks} tasks, {seeds} seed(s)")
+        print(f"   {'policy':<14} {'agents':>6} {'total h':>8} {'util':>6} "
+              f"{'wait min':>9} {'p90 wait':>9} {'backlog':>8} {'max bl':>7}")
+        for policy in policies:
+            for agents in agent_counts:
+                runs = [simulate(dag, policy, agents, merge_minutes) for dag in dags]
+                avg = {key: statistics.mean(run[key] for run in runs) for key in columns}
+                print(f"   {policy:<14} {agents:>6} {avg['total_hours']:>8.2f} "
+                      f"{avg['utilization']:>6.0%} {avg['mean_wait_minutes']:>9.1f} "
+                      f"{avg['p90_wait_minutes']:>9.1f} {avg['mean_merge_backlog']:>8.2f} "
+                      f"{avg['max_merge_backlog']:>7.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--shapes", nargs="+", default=list(DAG_SHAPES), choices=DAG_SHAPES)
+    parser.add_argument("--policies", nargs="+", default=list(SCHEDULING_POLICIES),
+                        choices=SCHEDULING_POLICIES)
+    parser.add_argument("--agents", nargs="+", type=int, default=[2, 4, 8])
+    parser.add_argument("--tasks", type=int, default=40)
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--mean-minutes", type=float, default=30.0,
+                        help="Mean agent run time per task")
+    parser.add_argument("--merge-minutes", type=float, default=2.0,
+                        help="Time to merge one completed task")
+    args = parser.parse_args()
+    compare(args.shapes, args.policies, args.agents, args.tasks, args.seeds,
+            args.mean_minutes, args.merge_minutes)
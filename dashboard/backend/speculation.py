@@ -0,0 +1,48 @@
+"""
+Speculative backup agents for straggling tasks
+"""
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from .models import TaskStatus
+from .scheduler import run_seconds, run_time_percentile
+from .task_record import TaskRecord
+
+
+# Backup agents work on the task's branch with this suffix
+BACKUP_SUFFIX = "-b"
+
+
+def backup_branch(branch: str) -> str:
+    """Sibling branch a backup agent works on"""
+    return f"{branch}{BACKUP_SUFFIX}"
+
+
+def backup_session_name(session: str) -> str:
+    """tmux session of a backup agent"""
+    return f"{session}{BACKUP_SUFFIX}"
+
+
+def find_stragglers(tasks: Sequence[TaskRecord], percentile: float, min_samples: int,
+                    now: Optional[datetime] = None) -> Tuple[Optional[float], List[TaskRecord]]:
+    """
+    Running tasks that have taken longer than ``percentile`` of finished ones.
+
+    Returns the run time threshold in seconds (None without enough finished
+    tasks) and the stragglers, longest running first. Run time leaves out
+    time spent frozen. Tasks that already have a backup, are frozen, or are
+    already on a backup branch don't count.
+    """
+    threshold = run_time_percentile(tasks, percentile, min_samples)
+    if threshold is None:
+        return None, []
+    now = now or datetime.now()
+    stragglers = [
+        task for task in tasks
+        if task.status == TaskStatus.IN_PROGRESS and task.session and task.started_at
+        and not task.backup_session and not task.suspended_at
+        and not task.branch.endswith(BACKUP_SUFFIX)
+        and run_seconds(task, now) > threshold
+    ]
+    stragglers.sort(key=lambda task: run_seconds(task, now), reverse=True)
+    return threshold, stragglers
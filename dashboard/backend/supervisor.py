@@ -0,0 +1,94 @@
+"""
+Runs orchestrators for several projects in one process
+"""
+from typing import Callable, Dict, List, Optional
+
+from .admission import AdmissionController
+from .agent_budget import AgentBudget
+from .config import config_manager
+from .models import OrchestratorConfig
+from .orchestrator import OrchestratorManager, STATUS_DIR
+from .websocket_manager import WebSocketManager
+
+
+class OrchestratorSupervisor:
+    """
+    One orchestrator control loop per active project, sharing an agent budget.
+
+    ``orchestrator_factory`` builds the orchestrator for each project (e.g.
+    the A2AMCP-enhanced one) from the WebSocket manager, the shared
+    AgentBudget, which caps agents across all projects at
+    ``max_total_agents`` with weighted fair share, and the shared
+    AdmissionController, which holds spawns back while the host is loaded.
+    """
+
+    def __init__(self, ws_manager: WebSocketManager,
+                 orchestrator_factory: Callable[..., OrchestratorManager] = OrchestratorManager):
+        self.ws_manager = ws_manager
+        self.orchestrator_factory = orchestrator_factory
+        self.config = config_manager.get_orchestrator_config()
+        self.budget = AgentBudget(self.config.max_total_agents)
+        self.admission = AdmissionController()
+        self.orchestrators: Dict[str, OrchestratorManager] = {}
+
+        # Status files left by a previous run are kept; each project's
+        # orchestrator reconciles them with its agents when it starts
+        STATUS_DIR.mkdir(exist_ok=True)
+
+    def get(self, project_id: str) -> Optional[OrchestratorManager]:
+        """The running orchestrator for a project, if any"""
+        orchestrator = self.orchestrators.get(project_id)
+        if orchestrator is not None and orchestrator.is_running():
+            return orchestrator
+        return None
+
+    def running_projects(self) -> List[str]:
+        """IDs of projects with a running orchestrator"""
+        return [project_id for project_id in self.orchestrators if self.get(project_id)]
+
+    def is_running(self, project_id: Optional[str] = None) -> bool:
+        """Whether a project's orchestrator, or any orchestrator, is running"""
+        if project_id is not None:
+            return self.get(project_id) is not None
+        return bool(self.running_projects())
+
+    async def start(self, project_id: str):
+        """Start the orchestrator for a project"""
+        if self.get(project_id):
+            raise ValueError(f"Orchestrator is already running for project '{project_id}'")
+
+        orchestrator = self.orchestrator_factory(self.ws_manager, self.budget, self.admission)
+        orchestrator.update_config(self.config)
+        await orchestrator.start(project_id)
+        self.orchestrators[project_id] = orchestrator
+
+    async def stop(self, project_id: Optional[str] = None):
+        """Stop one project's orchestrator, or all of them"""
+        project_ids = [project_id] if project_id is not None else list(self.orchestrators)
+        for pid in project_ids:
+            orchestrator = self.orchestrators.pop(pid, None)
+            if orchestrator is not None:
+                await orchestrator.stop()
+
+    def update_config(self, config: OrchestratorConfig):
+        """Apply a new configuration to every orchestrator"""
+        self.config = config
+        self.budget.capacity = config.max_total_agents
+        for orchestrator in self.orchestrators.values():
+            orchestrator.update_config(config)
+
+    def status(self) -> dict:
+        """Running projects, agent slot usage, control loop health and startup reconciliation"""
+        return {
+            "running": self.is_running(),
+            "projects": self.running_projects(),
+            "agents": self.budget.stats(),
+            "loops": {
+                project_id: self.orchestrators[project_id].loop_stats()
+                for project_id in self.running_projects()
+            },
+            "reconciliation": {
+                project_id: self.orchestrators[project_id].last_reconciliation
+                for project_id in self.running_projects()
+            }
+        }
@@ -0,0 +1,115 @@
+"""
+Cold storage for merged tasks
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+
+from .models import TaskStatus
+from .task_cache import file_signature
+from .task_journal import journal_lock
+from .task_record import TaskRecord
+from .task_store import encode_task
+
+
+_archives: Dict[str, "TaskArchive"] = {}
+_archives_guard = threading.Lock()
+
+
+def archive_candidates(tasks: Sequence[TaskRecord], cutoff: datetime) -> List[TaskRecord]:
+    """MERGED tasks that were last touched before ``cutoff``"""
+    return [
+        task for task in tasks
+        if task.status == TaskStatus.MERGED
+        and (task.merged_at or task.updated_at or cutoff) < cutoff
+    ]
+
+
+class TaskArchive:
+    """
+    MERGED tasks moved out of a project's live task store.
+
+    Tasks are appended as JSON lines to ``.splitmind/archive/tasks.jsonl``
+    and their IDs to ``ids.txt``, so dependency checks can load the small ID
+    set without reading the archived tasks themselves. Tasks archived more
+    than once (e.g. after an interrupted sweep) are read back once, and the
+    newest copy wins.
+    """
+
+    def __init__(self, archive_dir: Path):
+        self.archive_dir = Path(archive_dir)
+        self.tasks_file = self.archive_dir / "tasks.jsonl"
+        self.ids_file = self.archive_dir / "ids.txt"
+        self.lock = journal_lock(self.tasks_file)
+        self._ids: Tuple[object, FrozenSet[str]] = (None, frozenset())
+        self._tasks: Tuple[object, Tuple[TaskRecord, ...]] = (None, ())
+
+    def ids(self) -> FrozenSet[str]:
+        """IDs of every archived task"""
+        with self.lock:
+            signature = file_signature(self.ids_file)
+            if signature is None:
+                return frozenset()
+            if signature != self._ids[0]:
+                with open(self.ids_file, 'r') as f:
+                    ids = frozenset(line.strip() for line in f if line.strip())
+                self._ids = (signature, ids)
+            return self._ids[1]
+
+    def read(self) -> Tuple[TaskRecord, ...]:
+        """All archived tasks"""
+        with self.lock:
+            signature = file_signature(self.tasks_file)
+            if signature is None:
+                return ()
+            if signature != self._tasks[0]:
+                by_id: Dict[str, TaskRecord] = {}
+                with open(self.tasks_file, 'r') as f:
+                    for line in f:
+                        try:
+                            task = TaskRecord.from_dict(json.loads(line))
+                        except (json.JSONDecodeError, TypeError):
+                            # Torn line from an interrupted append
+                            continue
+                        by_id.pop(task.id, None)
+                        by_id[task.id] = task
+                self._tasks = (signature, tuple(by_id.values()))
+            return self._tasks[1]
+
+    def add(self, tasks: Sequence[TaskRecord]):
+        """Durably append tasks; callers remove them from the live store afterwards"""
+        if not tasks:
+            return
+        with self.lock:
+            self.archive_dir.mkdir(parents=True, exist_ok=True)
+            self._append(self.tasks_file,
+                         "".join(json.dumps(encode_task(t), default=str) + "\n" for t in tasks))
+            self._append(self.ids_file, "".join(f"{t.id}\n" for t in tasks))
+
+    def clear(self):
+        """Remove every archived task"""
+        with self.lock:
+            for path in (self.tasks_file, self.ids_file):
+                if path.exists():
+                    path.unlink()
+
+    @staticmethod
+    def _append(path: Path, data: str):
+        with open(path, 'a') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def task_archive(splitmind_dir: Path) -> TaskArchive:
+    """Get the process-wide archive for a project's .splitmind directory"""
+    key = str(Path(splitmind_dir).resolve())
+    with _archives_guard:
+        archive = _archives.get(key)
+        if archive is None:
+            archive = TaskArchive(Path(splitmind_dir) / "archive")
+            _archives[key] = archive
+        return archive
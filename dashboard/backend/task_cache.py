@@ -0,0 +1,82 @@
+"""
+Process-wide cache of parsed task lists
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .task_record import TaskRecord
+
+
+# (st_ino, st_size, st_mtime_ns) for each backing file, None when missing
+FileSignature = Optional[Tuple[int, int, int]]
+
+
+def file_signature(path: Path) -> FileSignature:
+    """Identify a file version by inode, size and modification time"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class TaskCache:
+    """
+    Shares parsed tasks between ProjectManager instances.
+
+    Entries are keyed by project and validated against the signatures of the
+    files they were parsed from, so edits made outside the process are
+    picked up. Cached snapshots are tuples shared by every reader and must
+    not be mutated.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[tuple, Tuple[TaskRecord, ...]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, project_id: str, signature: tuple) -> Optional[Tuple[TaskRecord, ...]]:
+        """Return the cached snapshot if it was parsed from the same files"""
+        with self._lock:
+            entry = self._entries.get(project_id)
+            if entry and entry[0] == signature:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, project_id: str, signature: tuple, tasks: Tuple[TaskRecord, ...]):
+        """Store a freshly parsed snapshot"""
+        with self._lock:
+            self._entries[project_id] = (signature, tasks)
+
+    def invalidate(self, project_id: str):
+        """Drop a project's snapshot after its tasks were written"""
+        with self._lock:
+            if self._entries.pop(project_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop every snapshot"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0
+            }
+
+
+# Global task cache instance
+task_cache = TaskCache()
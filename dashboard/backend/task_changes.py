@@ -0,0 +1,81 @@
+"""
+Tombstones and change-feed helpers for task stores
+"""
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from .task_journal import write_atomic
+
+
+# Deleted task IDs kept for change feeds; older ones raise the resync floor
+MAX_TOMBSTONES = 1000
+
+
+def prune_tombstones(floor: int, tombstones: Dict[str, int]) -> Tuple[int, Dict[str, int]]:
+    """
+    Keep the newest MAX_TOMBSTONES tombstones.
+
+    Clients asking for changes since a revision below the returned floor
+    may have missed a pruned deletion and must do a full resync.
+    """
+    if len(tombstones) <= MAX_TOMBSTONES:
+        return floor, tombstones
+    ordered = sorted(tombstones.items(), key=lambda item: item[1])
+    dropped = ordered[:len(ordered) - MAX_TOMBSTONES]
+    floor = max(floor, max(rev for _, rev in dropped))
+    return floor, dict(ordered[len(dropped):])
+
+
+def build_changes(revision: int, since: int, floor: int, tasks: Iterable,
+                  tombstones: Dict[str, int]) -> dict:
+    """Assemble a change feed response from changed tasks and tombstones"""
+    if since < floor or since > revision:
+        return {"revision": revision, "since": since, "reset": True, "tasks": [], "deleted": []}
+
+    changed = [task for task in tasks if task.version > since]
+    changed_ids = {task.id for task in changed}
+    deleted = sorted(
+        (task_id for task_id, rev in tombstones.items()
+         if rev > since and task_id not in changed_ids),
+        key=lambda task_id: tombstones[task_id]
+    )
+    return {"revision": revision, "since": since, "reset": False,
+            "tasks": changed, "deleted": deleted}
+
+
+class TombstoneFile:
+    """
+    Deleted task IDs and the resync floor, stored as a small JSON file.
+
+    Only the latest deletion of each ID is kept, and the file is replaced
+    atomically on every change.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def read(self) -> Tuple[int, Dict[str, int]]:
+        """Return the resync floor and the tombstones keyed by task ID"""
+        try:
+            data = json.loads(self.path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0, {}
+        return data.get("floor", 0), data.get("tombstones", {})
+
+    def add(self, task_ids: List[str], revision: int):
+        """Record deletions made at ``revision``"""
+        if not task_ids:
+            return
+        floor, tombstones = self.read()
+        for task_id in task_ids:
+            tombstones[task_id] = revision
+        self._write(*prune_tombstones(floor, tombstones))
+
+    def reset(self, floor: int):
+        """Drop all tombstones and require a resync from before ``floor``"""
+        self._write(floor, {})
+
+    def _write(self, floor: int, tombstones: Dict[str, int]):
+        data = json.dumps({"floor": floor, "tombstones": tombstones})
+        write_atomic(self.path, data.encode('utf-8'))
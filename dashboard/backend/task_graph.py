@@ -0,0 +1,233 @@
+"""
+In-memory dependency graph over a project's tasks
+"""
+import threading
+from typing import AbstractSet, Dict, Iterable, List, Optional, Set, Tuple
+
+from .models import TaskStatus
+from .task_record import TaskRecord
+
+
+# A dependency in one of these states no longer blocks its dependents
+SATISFIED_STATUSES = (TaskStatus.COMPLETED, TaskStatus.MERGED)
+
+
+class TaskGraph:
+    """
+    Indexes task records by id, branch, session and status, and tracks
+    reverse dependencies so that readiness can be maintained incrementally.
+
+    A task is *ready* when it is UNCLAIMED and every dependency that exists
+    is COMPLETED or MERGED. ``archived`` holds the IDs of MERGED tasks moved
+    to the project archive, which satisfy dependencies without being loaded.
+    Unknown dependency IDs are treated as satisfied too, matching the
+    orchestrator's historical behaviour. When several tasks share an ID the
+    first one wins, as with a linear ``next(...)`` scan.
+    """
+
+    def __init__(self, tasks: Iterable[TaskRecord] = (), archived: AbstractSet[str] = frozenset()):
+        self.archived = archived
+        self.by_id: Dict[str, TaskRecord] = {}
+        self.by_branch: Dict[str, TaskRecord] = {}
+        self.by_session: Dict[str, TaskRecord] = {}
+        self.by_status: Dict[TaskStatus, Dict[str, TaskRecord]] = {s: {} for s in TaskStatus}
+        self.dependents: Dict[str, Set[str]] = {}
+        self.ready: Set[str] = set()
+        self._unmet: Dict[str, int] = {}
+        self._order: Dict[str, int] = {}
+        self._next_order = 0
+
+        for task in tasks:
+            self.add(task)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self.by_id
+
+    def get(self, task_id: str) -> Optional[TaskRecord]:
+        """Look up a task by ID"""
+        return self.by_id.get(task_id)
+
+    def tasks(self) -> List[TaskRecord]:
+        """All indexed tasks"""
+        return list(self.by_id.values())
+
+    def with_status(self, *statuses: TaskStatus) -> List[TaskRecord]:
+        """Tasks currently in any of the given statuses"""
+        result = []
+        for status in statuses:
+            result.extend(self.by_status[status].values())
+        return result
+
+    def count(self, status: TaskStatus) -> int:
+        """Number of tasks in a status"""
+        return len(self.by_status[status])
+
+    def ready_tasks(self) -> List[TaskRecord]:
+        """UNCLAIMED tasks whose dependencies are all satisfied, in task order"""
+        return [self.by_id[task_id] for task_id in sorted(self.ready, key=self._order.__getitem__)]
+
+    def is_archived(self, task_id: str) -> bool:
+        """Whether ``task_id`` only exists in the archive"""
+        return task_id in self.archived and task_id not in self.by_id
+
+    def is_satisfied(self, task_id: str) -> bool:
+        """Whether a dependency on ``task_id`` no longer blocks"""
+        task = self.by_id.get(task_id)
+        if task is None:
+            # Archived tasks were MERGED; unknown IDs never block
+            return True
+        return task.status in SATISFIED_STATUSES
+
+    def dependencies_met(self, task: TaskRecord) -> bool:
+        """Whether every dependency of a task is COMPLETED or MERGED"""
+        if task.id in self.by_id:
+            return self._unmet.get(task.id, 0) == 0
+        return all(self.is_satisfied(dep_id) for dep_id in task.dependencies or [])
+
+    def dependencies_merged(self, task: TaskRecord,
+                            merged: AbstractSet[str] = frozenset()) -> bool:
+        """Whether every dependency of a task has been MERGED, or is in ``merged``"""
+        for dep_id in task.dependencies or []:
+            dep_task = self.by_id.get(dep_id)
+            if dep_task and dep_task.status != TaskStatus.MERGED and dep_id not in merged:
+                return False
+        return True
+
+    def add(self, task: TaskRecord):
+        """Index a new task"""
+        if task.id in self.by_id:
+            return
+
+        self.by_id[task.id] = task
+        if task.id not in self._order:
+            self._order[task.id] = self._next_order
+            self._next_order += 1
+        if task.branch:
+            self.by_branch.setdefault(task.branch, task)
+        if task.session:
+            self.by_session.setdefault(task.session, task)
+        self.by_status[task.status][task.id] = task
+
+        # Tasks that already depended on this ID may now be blocked by it
+        if task.status not in SATISFIED_STATUSES:
+            self._adjust_dependents(task.id, 1)
+
+        for dep_id in task.dependencies or []:
+            self.dependents.setdefault(dep_id, set()).add(task.id)
+        self._unmet[task.id] = sum(
+            1 for dep_id in set(task.dependencies or []) if not self.is_satisfied(dep_id)
+        )
+        self._refresh_ready(task.id)
+
+    def remove(self, task_id: str):
+        """Drop a task from the index"""
+        task = self.by_id.pop(task_id, None)
+        if task is None:
+            return
+
+        if self.by_branch.get(task.branch) is task:
+            del self.by_branch[task.branch]
+        if task.session and self.by_session.get(task.session) is task:
+            del self.by_session[task.session]
+        self.by_status[task.status].pop(task_id, None)
+
+        for dep_id in task.dependencies or []:
+            dependents = self.dependents.get(dep_id)
+            if dependents:
+                dependents.discard(task_id)
+                if not dependents:
+                    del self.dependents[dep_id]
+        self._unmet.pop(task_id, None)
+        self._order.pop(task_id, None)
+        self.ready.discard(task_id)
+
+        # A missing dependency counts as satisfied
+        if task.status not in SATISFIED_STATUSES:
+            self._adjust_dependents(task_id, -1)
+
+    def update(self, task: TaskRecord):
+        """Re-index a task whose fields changed"""
+        old = self.by_id.get(task.id)
+        if old is None:
+            self.add(task)
+            return
+
+        if (old.dependencies != task.dependencies or old.branch != task.branch
+                or old.session != task.session):
+            order = self._order[task.id]
+            self.remove(task.id)
+            self._order[task.id] = order
+            self.add(task)
+            return
+
+        self.by_id[task.id] = task
+        if task.branch and self.by_branch.get(task.branch) is old:
+            self.by_branch[task.branch] = task
+        if task.session and self.by_session.get(task.session) is old:
+            self.by_session[task.session] = task
+        self.by_status[old.status].pop(task.id, None)
+        self.by_status[task.status][task.id] = task
+
+        was_satisfied = old.status in SATISFIED_STATUSES
+        now_satisfied = task.status in SATISFIED_STATUSES
+        if was_satisfied != now_satisfied:
+            self._adjust_dependents(task.id, -1 if now_satisfied else 1)
+        self._refresh_ready(task.id)
+
+    def refresh(self, tasks: Iterable[TaskRecord]):
+        """Bring the index in line with a newer task list"""
+        seen = set()
+        for task in tasks:
+            if task.id in seen:
+                continue
+            seen.add(task.id)
+            old = self.by_id.get(task.id)
+            if old is None:
+                self.add(task)
+            elif old is not task and old != task:
+                self.update(task)
+        for task_id in [t for t in self.by_id if t not in seen]:
+            self.remove(task_id)
+
+    def _adjust_dependents(self, task_id: str, delta: int):
+        for dependent_id in self.dependents.get(task_id, ()):
+            if dependent_id in self._unmet:
+                self._unmet[dependent_id] += delta
+                self._refresh_ready(dependent_id)
+
+    def _refresh_ready(self, task_id: str):
+        task = self.by_id.get(task_id)
+        if task and task.status == TaskStatus.UNCLAIMED and self._unmet.get(task_id, 0) <= 0:
+            self.ready.add(task_id)
+        else:
+            self.ready.discard(task_id)
+
+
+_graphs: Dict[str, Tuple[Tuple[TaskRecord, ...], TaskGraph]] = {}
+_graphs_lock = threading.Lock()
+
+
+def graph_for_snapshot(project_id: str, snapshot: Tuple[TaskRecord, ...],
+                       archived: AbstractSet[str] = frozenset()) -> TaskGraph:
+    """
+    Get the shared graph for a project's task snapshot.
+
+    The previous graph is refreshed in place when the snapshot changes, so
+    only tasks that actually changed are re-indexed.
+    """
+    with _graphs_lock:
+        entry = _graphs.get(project_id)
+        if entry and entry[0] is snapshot:
+            entry[1].archived = archived
+            return entry[1]
+        if entry:
+            graph = entry[1]
+            graph.archived = archived
+            graph.refresh(snapshot)
+        else:
+            graph = TaskGraph(snapshot, archived)
+        _graphs[project_id] = (snapshot, graph)
+        return graph
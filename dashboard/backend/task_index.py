@@ -0,0 +1,142 @@
+"""
+Byte-offset index of the task blocks in tasks.md
+"""
+import mmap
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from .task_cache import file_signature
+from .task_journal import write_atomic
+
+
+# A task block starts at a "## Task:" heading and runs to its last non-blank line
+TASK_HEADING = re.compile(rb"^[ \t]*## Task:", re.MULTILINE)
+
+# (start, end) byte offsets of a block within the file
+Span = Tuple[int, int]
+
+_indexes: Dict[str, "TaskBlockIndex"] = {}
+_indexes_guard = threading.Lock()
+
+
+class TaskBlockIndex:
+    """
+    Maps task IDs to the byte ranges of their blocks in tasks.md.
+
+    The index is built with a single scan over a memory map of the file and
+    revalidated against its signature, so it is only rebuilt after the file
+    was replaced. Callers must hold the store lock while using it.
+    """
+
+    def __init__(self, path: Path, make_id: Callable[[str], str]):
+        self.path = Path(path)
+        self.make_id = make_id
+        self.signature = None
+        self.spans: List[Tuple[int, int, str]] = []
+        self.preamble_end = 0
+        self.by_id: Dict[str, List[Span]] = {}
+
+    def refresh(self):
+        """Rebuild the index if tasks.md changed since it was built"""
+        signature = file_signature(self.path)
+        if signature is not None and signature == self.signature:
+            return
+
+        spans = []
+        preamble_end = 0
+        if signature is not None and signature[1] > 0:
+            with open(self.path, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    starts = [m.start() for m in TASK_HEADING.finditer(mm)]
+                    preamble_end = starts[0] if starts else len(mm)
+                    for i, start in enumerate(starts):
+                        limit = starts[i + 1] if i + 1 < len(starts) else len(mm)
+                        block = mm[start:limit]
+                        heading = block.split(b"\n", 1)[0]
+                        title = heading.decode('utf-8', 'replace').strip()
+                        title = title.replace("## Task:", "").strip()
+                        end = start + len(block.rstrip())
+                        if end < limit and mm[end:end + 1] == b"\n":
+                            end += 1
+                        spans.append((start, end, self.make_id(title)))
+
+        self.signature = signature
+        self.preamble_end = preamble_end
+        self._set_spans(spans)
+
+    def spans_for(self, task_id: str) -> List[Span]:
+        """Byte ranges of every block with the given ID"""
+        self.refresh()
+        return list(self.by_id.get(task_id, ()))
+
+    def read_blocks(self, task_id: str) -> List[str]:
+        """Read just the blocks for a task ID"""
+        spans = self.spans_for(task_id)
+        if not spans:
+            return []
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            return [os.pread(fd, end - start, start).decode('utf-8') for start, end in spans]
+        finally:
+            os.close(fd)
+
+    def splice(self, replacements: Dict[Span, bytes]):
+        """
+        Replace blocks without re-rendering the rest of the file.
+
+        The untouched bytes are copied as-is into a new file that atomically
+        replaces tasks.md. Span ``(0, preamble_end)`` addresses the header
+        before the first task.
+        """
+        if not replacements:
+            return
+        self.refresh()
+        spans = sorted(replacements)
+
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        parts = []
+        pos = 0
+        for start, end in spans:
+            parts.append(data[pos:start])
+            parts.append(replacements[(start, end)])
+            pos = end
+        parts.append(data[pos:])
+        write_atomic(self.path, b"".join(parts))
+
+        # Shift the following blocks instead of rescanning the file
+        delta = 0
+        preamble = replacements.get((0, self.preamble_end))
+        if preamble is not None:
+            delta = len(preamble) - self.preamble_end
+            self.preamble_end = len(preamble)
+        shifted = []
+        for start, end, task_id in self.spans:
+            new = replacements.get((start, end))
+            if new is not None:
+                shifted.append((start + delta, start + delta + len(new), task_id))
+                delta += len(new) - (end - start)
+            else:
+                shifted.append((start + delta, end + delta, task_id))
+        self.signature = file_signature(self.path)
+        self._set_spans(shifted)
+
+    def _set_spans(self, spans: List[Tuple[int, int, str]]):
+        self.spans = spans
+        self.by_id = {}
+        for start, end, task_id in spans:
+            self.by_id.setdefault(task_id, []).append((start, end))
+
+
+def task_block_index(path: Path, make_id: Callable[[str], str]) -> TaskBlockIndex:
+    """Get the process-wide block index for a tasks.md file"""
+    key = str(Path(path).resolve())
+    with _indexes_guard:
+        index = _indexes.get(key)
+        if index is None:
+            index = TaskBlockIndex(path, make_id)
+            _indexes[key] = index
+        return index
@@ -0,0 +1,251 @@
+"""
+Append-only write-ahead journal for task mutations
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Compact the journal back into tasks.md once it grows past either limit
+COMPACT_MAX_ENTRIES = 500
+COMPACT_MAX_BYTES = 512 * 1024
+
+# Appends are flushed immediately but fsync'd in batches by a background thread
+FSYNC_INTERVAL = 0.05  # seconds
+
+_locks: Dict[str, threading.RLock] = {}
+_locks_guard = threading.Lock()
+
+_dirty: Dict[str, Path] = {}
+_dirty_cond = threading.Condition()
+_flusher: Optional[threading.Thread] = None
+
+
+def journal_lock(path: Path) -> threading.RLock:
+    """Get the process-wide lock guarding a journal and its snapshot"""
+    key = str(Path(path).resolve())
+    with _locks_guard:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = threading.RLock()
+            _locks[key] = lock
+        return lock
+
+
+def encode_value(value: Any) -> Any:
+    """Convert a task field value into something JSON can store"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return [encode_value(v) for v in value]
+    return value
+
+
+def write_atomic(path: Path, data: bytes):
+    """Replace a file via a synced temp file and rename, so readers never see a partial write"""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def _flush_loop():
+    """Background fsync of journals written since the last batch"""
+    while True:
+        with _dirty_cond:
+            while not _dirty:
+                _dirty_cond.wait()
+            pending = list(_dirty.values())
+            _dirty.clear()
+        for path in pending:
+            try:
+                with journal_lock(path):
+                    if not path.exists():
+                        continue
+                    with open(path, 'ab') as f:
+                        os.fsync(f.fileno())
+            except Exception as e:
+                print(f"Error syncing task journal {path}: {e}")
+        time.sleep(FSYNC_INTERVAL)
+
+
+def _mark_dirty(path: Path):
+    """Queue a journal for the next batched fsync"""
+    global _flusher
+    with _dirty_cond:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_flush_loop, daemon=True)
+            _flusher.start()
+        _dirty[str(path)] = path
+        _dirty_cond.notify()
+
+
+class TaskJournal:
+    """
+    Write-ahead journal of task mutations stored next to tasks.md.
+
+    Each line is a JSON object with an ``op`` of ``add``, ``update`` or
+    ``delete``. Readers replay the journal on top of the tasks.md snapshot;
+    compaction folds it back into tasks.md and truncates it.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.lock = journal_lock(self.path)
+        self._compacting = False
+
+    def append(self, entries: List[Dict[str, Any]]):
+        """Append one or more mutation entries"""
+        if not entries:
+            return
+        data = "".join(json.dumps(e, default=str) + "\n" for e in entries)
+        with self.lock:
+            with open(self.path, 'a') as f:
+                f.write(data)
+        _mark_dirty(self.path)
+
+    def read(self) -> List[Dict[str, Any]]:
+        """Read all journal entries, skipping a torn trailing line"""
+        with self.lock:
+            if not self.path.exists():
+                return []
+            with open(self.path, 'r') as f:
+                lines = f.readlines()
+
+        entries = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Partially written entry from a crash; ignore it
+                continue
+        return entries
+
+    def last_revision(self) -> int:
+        """Revision of the newest entry, reading only the end of the file"""
+        with self.lock:
+            try:
+                size = self.path.stat().st_size
+            except FileNotFoundError:
+                return 0
+            with open(self.path, 'rb') as f:
+                f.seek(max(0, size - 8192))
+                tail = f.read()
+
+        for line in reversed(tail.splitlines()):
+            try:
+                return json.loads(line).get("rev", 0)
+            except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+                continue
+        # Entries larger than the tail we read; fall back to a full read
+        return max((e.get("rev", 0) for e in self.read()), default=0)
+
+    def truncate(self):
+        """Drop all entries once they are part of the snapshot"""
+        with self.lock:
+            if self.path.exists():
+                with open(self.path, 'w') as f:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def needs_compaction(self) -> bool:
+        """Whether the journal has grown enough to fold into the snapshot"""
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return False
+        if size >= COMPACT_MAX_BYTES:
+            return True
+        # Cheap line count estimate without parsing
+        with self.lock:
+            with open(self.path, 'rb') as f:
+                return sum(1 for _ in f) >= COMPACT_MAX_ENTRIES
+
+    def compact_in_background(self, compact: Callable[[], None]):
+        """Run ``compact`` on a daemon thread unless one is already running"""
+        with self.lock:
+            if self._compacting:
+                return
+            self._compacting = True
+
+        def run():
+            try:
+                with self.lock:
+                    compact()
+            except Exception as e:
+                print(f"Error compacting task journal {self.path}: {e}")
+            finally:
+                self._compacting = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+def apply_entries(tasks: List[Dict[str, Any]], entries: List[Dict[str, Any]],
+                  make_id: Callable[[str], str]) -> List[Dict[str, Any]]:
+    """
+    Replay journal entries on top of parsed task dicts.
+
+    Task ids are derived from titles the same way the tasks.md parser does,
+    so replayed state matches what a full rewrite would read back.
+    """
+    result = list(tasks)
+    if not entries:
+        return result
+
+    by_id: Dict[str, List[Dict[str, Any]]] = {}
+    for task in result:
+        by_id.setdefault(task["id"], []).append(task)
+
+    for entry in entries:
+        op = entry.get("op")
+        if op == "add":
+            task = dict(entry.get("task") or {})
+            if not task.get("title"):
+                continue
+            task["id"] = make_id(task["title"])
+            same = [t for t in by_id.get(task["id"], [])
+                    if t.get("task_id") == task.get("task_id")]
+            if same:
+                # Replaying an add that already reached the snapshot
+                same[0].clear()
+                same[0].update(task)
+            else:
+                by_id.setdefault(task["id"], []).append(task)
+                result.append(task)
+        elif op == "update":
+            matches = by_id.get(entry.get("id"))
+            if not matches:
+                continue
+            task = matches[0]
+            task.update(entry.get("fields") or {})
+            new_id = make_id(task["title"])
+            if new_id != task["id"]:
+                matches.pop(0)
+                if not matches:
+                    del by_id[entry["id"]]
+                task["id"] = new_id
+                by_id.setdefault(new_id, []).append(task)
+        elif op == "delete":
+            removed = by_id.pop(entry.get("id"), None)
+            if removed:
+                removed_ids = {id(t) for t in removed}
+                result = [t for t in result if id(t) not in removed_ids]
+
+    return result
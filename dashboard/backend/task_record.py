@@ -0,0 +1,97 @@
+"""
+Lightweight task records for internal scans
+"""
+from datetime import datetime
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+
+from .models import Task, TaskStatus
+
+
+# Fields parsed from ISO strings when records are loaded from JSON
+DATETIME_FIELDS = ("created_at", "updated_at", "started_at", "suspended_at", "completed_at",
+                   "merged_at", "retry_after")
+# List fields, held as tuples so records shared through cached snapshots can't be changed
+LIST_FIELDS = ("dependencies", "owned_files", "shared_files", "creates_files", "exclusive_files",
+               "initialization_deps")
+
+
+class TaskRecord(NamedTuple):
+    """
+    Immutable, tuple-backed view of a task.
+
+    Snapshots, the task graph, the scheduler and the merge queues work on
+    these instead of pydantic models, which are only built by ``to_task``
+    where a task leaves the process or is about to be modified. Use
+    ``_replace`` to derive a changed record. List fields are tuples here
+    and lists again in ``to_dict``.
+    """
+
+    id: str
+    task_id: Optional[int] = None
+    title: str = ""
+    description: Optional[str] = None
+    prompt: Optional[str] = None
+    status: TaskStatus = TaskStatus.UNCLAIMED
+    branch: Optional[str] = None
+    session: Optional[str] = None
+    backup_session: Optional[str] = None
+    dependencies: Sequence[str] = ()
+    priority: int = 0
+    owned_files: Sequence[str] = ()
+    shared_files: Sequence[str] = ()
+    creates_files: Sequence[str] = ()
+    merge_order: int = 0
+    exclusive_files: Sequence[str] = ()
+    initialization_deps: Sequence[str] = ()
+    wave: Optional[int] = None
+    attempts: int = 0
+    last_failure: Optional[str] = None
+    retry_after: Optional[datetime] = None
+    version: int = 0
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    suspended_at: Optional[datetime] = None
+    suspended_seconds: float = 0
+    completed_at: Optional[datetime] = None
+    merged_at: Optional[datetime] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TaskRecord":
+        """Build a record from a parsed or JSON-decoded task dict"""
+        values = {k: data[k] for k in cls._fields if data.get(k) is not None}
+        status = values.get("status")
+        if status is not None and not isinstance(status, TaskStatus):
+            try:
+                values["status"] = TaskStatus(status)
+            except ValueError:
+                values["status"] = TaskStatus.UNCLAIMED
+        for key in DATETIME_FIELDS:
+            if isinstance(values.get(key), str):
+                values[key] = datetime.fromisoformat(values[key])
+        for key in LIST_FIELDS:
+            if key in values:
+                values[key] = tuple(values[key])
+        return cls(**values)
+
+    @classmethod
+    def from_task(cls, task: Task) -> "TaskRecord":
+        """Build a record from a Task model"""
+        values = {k: getattr(task, k) for k in cls._fields}
+        for key in LIST_FIELDS:
+            values[key] = tuple(values[key])
+        return cls(**values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Task fields as a dict, leaving unset timestamps to the model defaults"""
+        data = self._asdict()
+        for key in LIST_FIELDS:
+            data[key] = list(data[key])
+        for key in ("created_at", "updated_at"):
+            if data[key] is None:
+                del data[key]
+        return data
+
+    def to_task(self) -> Task:
+        """Build a new Task model that the caller owns"""
+        return Task(**self.to_dict())
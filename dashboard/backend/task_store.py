@@ -0,0 +1,1106 @@
+"""
+Pluggable task storage backends for SplitMind projects
+"""
+import json
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .models import Task, TaskStatus
+from .task_journal import TaskJournal, apply_entries, encode_value, write_atomic
+from .blob_store import BlobStore, is_blob_ref
+from .task_cache import task_cache, file_signature
+from .task_changes import TombstoneFile, build_changes, prune_tombstones
+from .task_index import task_block_index
+from .task_record import TaskRecord
+
+
+# Journaled fields that can change a task's ID or its position in tasks.md;
+# compacting updates to any of them needs a full rewrite instead of a splice
+REORDERING_FIELDS = {"title", "task_id", "priority", "branch"}
+
+# Timestamps kept in tasks.md, for run time history, archiving, preemption and retries
+TIMESTAMP_FIELDS = ("started_at", "suspended_at", "completed_at", "merged_at", "retry_after")
+
+# Store revision recorded in the tasks.md header
+REVISION_HEADER = re.compile(r"<!-- revision: (\d+) -->")
+
+# Called with the project ID after every committed task write
+_write_listeners: List[Callable[[str], None]] = []
+
+
+def add_write_listener(callback: Callable[[str], None]):
+    """Get notified of task writes in any project of this process"""
+    _write_listeners.append(callback)
+
+
+def remove_write_listener(callback: Callable[[str], None]):
+    """Stop notifying a callback registered with add_write_listener"""
+    if callback in _write_listeners:
+        _write_listeners.remove(callback)
+
+
+def _notify_write(project_id: str):
+    for callback in list(_write_listeners):
+        try:
+            callback(project_id)
+        except Exception as e:
+            print(f"Error in task write listener: {e}")
+
+
+class TaskConflictError(Exception):
+    """A task was modified after the version the writer read"""
+
+    def __init__(self, task_id: str, expected: int, actual: int):
+        self.task_id = task_id
+        self.expected = expected
+        self.actual = actual
+        super().__init__(f"Task '{task_id}' is at version {actual}, expected {expected}")
+
+
+def sanitize_task_id(task_id: str) -> str:
+    """Sanitize task ID to avoid URL routing issues"""
+    # Replace problematic characters
+    sanitized = task_id.replace('/', '-')
+    sanitized = sanitized.replace('\\', '-')
+    sanitized = sanitized.replace('&', 'and')
+    return sanitized
+
+
+def task_id_from_title(title: str) -> str:
+    """Derive the task ID the parser assigns to a task title"""
+    return sanitize_task_id(title.lower().replace(" ", "-"))
+
+
+def task_sort_key(task):
+    """Order tasks by priority and task_id to keep listings stable"""
+    return (task.priority if task.priority is not None else 10, task.task_id or 0)
+
+
+def task_page_key(task) -> Tuple[int, int, str]:
+    """Listing order with the task ID as a tiebreaker, used for page cursors"""
+    return task_sort_key(task) + (task.id,)
+
+
+def encode_task(task) -> Dict[str, Any]:
+    """Convert a Task or TaskRecord into a JSON-serializable dict"""
+    data = task.to_dict() if isinstance(task, TaskRecord) else task.dict()
+    return {k: encode_value(v) for k, v in data.items()}
+
+
+def parse_tasks_markdown(path: Path) -> List[dict]:
+    """Parse a tasks.md file into raw task dicts"""
+    if not path.exists():
+        return []
+
+    with open(path, 'r') as f:
+        return parse_tasks_lines(f)
+
+
+def parse_tasks_lines(lines: Iterable[str]) -> List[dict]:
+    """Parse lines in the tasks.md format into raw task dicts"""
+    tasks = []
+    current_task = None
+
+    for line in lines:
+        line = line.strip()
+
+        if line.startswith("## Task:"):
+            # Save previous task
+            if current_task:
+                tasks.append(current_task)
+
+            # Start new task
+            title = line.replace("## Task:", "").strip()
+            # Generate sanitized ID
+            task_id = task_id_from_title(title)
+            current_task = {
+                "id": task_id,
+                "task_id": None,
+                "title": title,
+                "status": TaskStatus.UNCLAIMED,
+                "branch": None,
+                "session": None,
+                "description": None,
+                "dependencies": [],
+                "priority": 0,
+                "merge_order": 0,
+                "exclusive_files": [],
+                "shared_files": [],
+                "initialization_deps": []
+            }
+
+        elif current_task and line.startswith("- "):
+            # Parse task properties
+            if line.startswith("- task_id:"):
+                try:
+                    task_id = int(line.replace("- task_id:", "").strip())
+                    current_task["task_id"] = task_id
+                except ValueError:
+                    pass
+
+            elif line.startswith("- status:"):
+                status_str = line.replace("- status:", "").strip()
+                try:
+                    current_task["status"] = TaskStatus(status_str)
+                except ValueError:
+                    current_task["status"] = TaskStatus.UNCLAIMED
+
+            elif line.startswith("- branch:"):
+                branch = line.replace("- branch:", "").strip()
+                if branch != "null":
+                    # Sanitize branch name as well
+                    branch = sanitize_task_id(branch)
+                    current_task["branch"] = branch
+
+            elif line.startswith("- session:"):
+                session = line.replace("- session:", "").strip()
+                if session != "null":
+                    current_task["session"] = session
+
+            elif line.startswith("- backup_session:"):
+                current_task["backup_session"] = line.replace("- backup_session:", "").strip()
+
+            elif line.startswith("- description:"):
+                current_task["description"] = line.replace("- description:", "").strip()
+
+            elif line.startswith("- prompt:"):
+                current_task["prompt"] = line.replace("- prompt:", "").strip()
+
+            elif line.startswith("- dependencies:"):
+                deps_str = line.replace("- dependencies:", "").strip()
+                if deps_str and deps_str != "[]":
+                    current_task["dependencies"] = [d.strip() for d in deps_str.strip("[]").split(",") if d.strip()]
+
+            elif line.startswith("- priority:"):
+                try:
+                    current_task["priority"] = int(line.replace("- priority:", "").strip())
+                except ValueError:
+                    current_task["priority"] = 0
+
+            elif line.startswith("- merge_order:"):
+                try:
+                    current_task["merge_order"] = int(line.replace("- merge_order:", "").strip())
+                except ValueError:
+                    current_task["merge_order"] = 0
+
+            elif line.startswith("- exclusive_files:"):
+                files_str = line.replace("- exclusive_files:", "").strip()
+                if files_str and files_str != "[]":
+                    current_task["exclusive_files"] = [f.strip() for f in files_str.strip("[]").split(",") if f.strip()]
+
+            elif line.startswith("- shared_files:"):
+                files_str = line.replace("- shared_files:", "").strip()
+                if files_str and files_str != "[]":
+                    current_task["shared_files"] = [f.strip() for f in files_str.strip("[]").split(",") if f.strip()]
+
+            elif line.startswith("- initialization_deps:"):
+                deps_str = line.replace("- initialization_deps:", "").strip()
+                if deps_str and deps_str != "[]":
+                    current_task["initialization_deps"] = [d.strip() for d in deps_str.strip("[]").split(",") if d.strip()]
+
+            elif line.startswith("- wave:"):
+                try:
+                    current_task["wave"] = int(line.replace("- wave:", "").strip())
+                except ValueError:
+                    pass
+
+            elif line.startswith("- attempts:"):
+                try:
+                    current_task["attempts"] = int(line.replace("- attempts:", "").strip())
+                except ValueError:
+                    pass
+
+            elif line.startswith("- last_failure:"):
+                current_task["last_failure"] = line.replace("- last_failure:", "").strip()
+
+            elif line.startswith("- suspended_seconds:"):
+                try:
+                    current_task["suspended_seconds"] = float(line.replace("- suspended_seconds:", "").strip())
+                except ValueError:
+                    pass
+
+            elif line.startswith("- version:"):
+                try:
+                    current_task["version"] = int(line.replace("- version:", "").strip())
+                except ValueError:
+                    pass
+
+            elif line.startswith(tuple(f"- {key}:" for key in TIMESTAMP_FIELDS)):
+                key, _, value = line[2:].partition(":")
+                try:
+                    current_task[key] = datetime.fromisoformat(value.strip())
+                except ValueError:
+                    pass
+
+    # Don't forget the last task
+    if current_task:
+        tasks.append(current_task)
+
+    return tasks
+
+
+def build_tasks(tasks: List[dict]) -> List[TaskRecord]:
+    """Convert raw task dicts into sorted task records"""
+    max_task_id = max((t.get("task_id") or 0 for t in tasks), default=0)
+
+    # Assign task IDs to tasks that don't have them
+    for task in tasks:
+        if task.get("task_id") is None:
+            max_task_id += 1
+            task["task_id"] = max_task_id
+
+    # Convert to records; Task models are only built at the API edge
+    result_tasks = [TaskRecord.from_dict(task) for task in tasks if task.get("branch")]
+
+    # Sort tasks by priority and task_id to maintain consistent order
+    result_tasks.sort(key=task_sort_key)
+
+    # print(f"📖 Loaded {len(result_tasks)} tasks from database")
+    # for task in result_tasks:
+    #     print(f"📖 Loaded {task.title}: status = {task.status}")
+    return result_tasks
+
+
+def render_task_properties(task) -> List[str]:
+    """Render the property lines of a single task block"""
+    lines = [f"- task_id: {task.task_id}"]
+    # Always save the enum value, not the enum object
+    status_value = task.status.value if hasattr(task.status, 'value') else str(task.status)
+    lines.append(f"- status: {status_value}")
+    lines.append(f"- branch: {task.branch}")
+    lines.append(f"- session: {task.session or 'null'}")
+    if getattr(task, 'backup_session', None):
+        lines.append(f"- backup_session: {task.backup_session}")
+    if task.description:
+        lines.append(f"- description: {task.description}")
+    if task.prompt:
+        lines.append(f"- prompt: {task.prompt}")
+    if hasattr(task, 'dependencies') and task.dependencies:
+        lines.append(f"- dependencies: [{', '.join(task.dependencies)}]")
+    if hasattr(task, 'priority') and task.priority > 0:
+        lines.append(f"- priority: {task.priority}")
+    if hasattr(task, 'merge_order') and task.merge_order > 0:
+        lines.append(f"- merge_order: {task.merge_order}")
+    if hasattr(task, 'exclusive_files') and task.exclusive_files:
+        lines.append(f"- exclusive_files: [{', '.join(task.exclusive_files)}]")
+    if hasattr(task, 'shared_files') and task.shared_files:
+        lines.append(f"- shared_files: [{', '.join(task.shared_files)}]")
+    if hasattr(task, 'initialization_deps') and task.initialization_deps:
+        lines.append(f"- initialization_deps: [{', '.join(task.initialization_deps)}]")
+    if task.wave is not None:
+        lines.append(f"- wave: {task.wave}")
+    if getattr(task, 'attempts', 0):
+        lines.append(f"- attempts: {task.attempts}")
+    if getattr(task, 'last_failure', None):
+        lines.append(f"- last_failure: {task.last_failure}")
+    if getattr(task, 'suspended_seconds', 0):
+        lines.append(f"- suspended_seconds: {task.suspended_seconds}")
+    if task.version:
+        lines.append(f"- version: {task.version}")
+    for key in TIMESTAMP_FIELDS:
+        value = getattr(task, key, None)
+        if value:
+            lines.append(f"- {key}: {encode_value(value)}")
+    return lines
+
+
+def render_task_block(task) -> str:
+    """Render one task block exactly as render_tasks_markdown lays it out"""
+    return f"## Task: {task.title}\n\n" + "\n".join(render_task_properties(task)) + "\n"
+
+
+def render_preamble(revision: int = 0) -> str:
+    """Render the tasks.md header that precedes the first task block"""
+    if revision:
+        return f"# tasks.md\n\n<!-- revision: {revision} -->\n\n"
+    return "# tasks.md\n\n\n"
+
+
+def read_header_revision(path: Path) -> int:
+    """Read the store revision from the tasks.md header"""
+    try:
+        with open(path, 'r') as f:
+            head = f.read(256)
+    except FileNotFoundError:
+        return 0
+    match = REVISION_HEADER.search(head)
+    return int(match.group(1)) if match else 0
+
+
+def render_tasks_markdown(tasks: list, revision: int = 0) -> str:
+    """Render tasks in the tasks.md format"""
+    content = ["# tasks.md\n"]
+    if revision:
+        content.append(f"<!-- revision: {revision} -->")
+
+    # Sort tasks before saving to maintain consistent order
+    sorted_tasks = sorted(tasks, key=task_sort_key)
+
+    for task in sorted_tasks:
+        content.append(f"\n## Task: {task.title}\n")
+        content.extend(render_task_properties(task))
+        content.append("")
+    
+    return '\n'.join(content)
+
+
+class TaskStore:
+    """
+    Interface for persisting a project's tasks.
+
+    Implementations return shared snapshots of TaskRecords from
+    ``get_tasks_snapshot``, hand out Task models from the single-task
+    getters, and apply every write under ``lock``. Each write
+    bumps the store revision and stamps it on the tasks it touched as their
+    ``version``; writers that pass the versions they read get a
+    TaskConflictError instead of overwriting a newer change.
+
+    Long or multi-line prompts are written to content-addressed blobs and
+    records only carry the reference; ``load_task`` and ``task_dict``
+    read the text back when a task leaves the store.
+    """
+
+    name = "base"
+
+    def __init__(self, project_id: str, splitmind_dir: Path):
+        self.project_id = project_id
+        self.splitmind_dir = Path(splitmind_dir)
+        self.tasks_file = self.splitmind_dir / "tasks.md"
+        self.lock = threading.RLock()
+        self.blobs = BlobStore(self.splitmind_dir / "blobs")
+
+    def get_tasks_snapshot(self) -> Tuple[TaskRecord, ...]:
+        """Get all tasks as a shared, read-only snapshot"""
+        raise NotImplementedError
+
+    def get_task(self, task_id: str) -> Optional[Task]:
+        """Get a single task by ID"""
+        return self.get_tasks_by_ids([task_id]).get(task_id)
+
+    def get_tasks_by_ids(self, task_ids: List[str]) -> Dict[str, Task]:
+        """Get the tasks with the given IDs, keyed by ID"""
+        wanted = set(task_ids)
+        found: Dict[str, Task] = {}
+        for task in self.get_tasks_snapshot():
+            if task.id in wanted and task.id not in found:
+                found[task.id] = self.load_task(task)
+        return found
+
+    def get_tasks_by_status(self, *statuses: TaskStatus) -> List[TaskRecord]:
+        """Get tasks in any of the given statuses"""
+        return [t for t in self.get_tasks_snapshot() if t.status in statuses]
+
+    def max_task_id(self) -> int:
+        """Highest numeric task_id in the store"""
+        return max((t.task_id or 0 for t in self.get_tasks_snapshot()), default=0)
+
+    def revision(self) -> int:
+        """Revision of the last write to the store"""
+        raise NotImplementedError
+
+    def add_task(self, task: Task):
+        """Persist a new task"""
+        raise NotImplementedError
+
+    def update_tasks(self, updates: Dict[str, dict],
+                     expected: Optional[Dict[str, int]] = None) -> List[Task]:
+        """Apply updates to several tasks in one write"""
+        raise NotImplementedError
+
+    def delete_task(self, task_id: str, expected_version: Optional[int] = None):
+        """Delete a task"""
+        raise NotImplementedError
+
+    def delete_tasks(self, task_ids: List[str]):
+        """Delete several tasks in one write"""
+        raise NotImplementedError
+
+    def replace_all(self, tasks: list, revision: Optional[int] = None):
+        """
+        Replace the stored tasks, recording ``revision`` or a new one.
+
+        Under a new revision every task is stamped with it as its version, so
+        versions carried over from another store can't run ahead of this
+        one's revision.
+        """
+        raise NotImplementedError
+
+    def get_changes(self, since: int) -> dict:
+        """
+        Tasks written and IDs deleted after revision ``since``.
+
+        ``reset`` is set when the changes can't be reconstructed, e.g. after
+        the tasks were replaced wholesale, and the client must resync.
+        """
+        raise NotImplementedError
+
+    def reset(self):
+        """Remove all stored tasks"""
+        raise NotImplementedError
+
+    def compact(self):
+        """Fold pending changes into the backing file, for stores that defer them"""
+
+    def export_markdown(self) -> Path:
+        """Write the current tasks to tasks.md and return its path"""
+        with self.lock:
+            content = render_tasks_markdown(list(self.get_tasks_snapshot()), self.revision())
+            write_atomic(self.tasks_file, content.encode('utf-8'))
+        return self.tasks_file
+
+    def import_markdown(self) -> int:
+        """Load tasks.md into the store, returning the number of tasks"""
+        with self.lock:
+            tasks = build_tasks(parse_tasks_markdown(self.tasks_file))
+            self.replace_all(tasks)
+        return len(tasks)
+
+    def load_task(self, task: TaskRecord) -> Task:
+        """Build a Task model, reading a stored prompt back from its blob"""
+        return Task(**self.task_dict(task))
+
+    def task_dict(self, task: TaskRecord) -> Dict[str, Any]:
+        """Task fields as a dict, reading a stored prompt back from its blob"""
+        data = task.to_dict()
+        data["prompt"] = self.blobs.resolve(task.prompt)
+        return data
+
+    def _store_blobs(self, task):
+        """Copy of a Task or TaskRecord whose large prompt is moved to a blob"""
+        if isinstance(task, TaskRecord) and is_blob_ref(task.prompt):
+            # Records read from a store already hold the reference
+            return task
+        prompt = self.blobs.put_large(task.prompt)
+        if prompt == task.prompt:
+            return task
+        if isinstance(task, TaskRecord):
+            return task._replace(prompt=prompt)
+        return task.copy(update={"prompt": prompt})
+
+    @staticmethod
+    def _with_version(task, version: int):
+        """Copy of a Task or TaskRecord stamped with ``version``"""
+        if isinstance(task, TaskRecord):
+            return task._replace(version=version)
+        return task.copy(update={"version": version})
+
+    def _check_versions(self, tasks: Dict[str, Task], expected: Optional[Dict[str, int]]):
+        """Raise TaskConflictError if a task changed since the caller read it"""
+        for task_id, version in (expected or {}).items():
+            task = tasks.get(task_id)
+            if task is not None and version is not None and task.version != version:
+                raise TaskConflictError(task_id, version, task.version)
+
+    def _apply_updates(self, task: Task, updates: dict, now: datetime,
+                       revision: int) -> Dict[str, Any]:
+        """Apply updates to a task copy and return the changed fields"""
+        fields = {}
+        # Update fields
+        for key, value in updates.items():
+            # Versions are assigned by the store, never by callers
+            if key == 'version':
+                continue
+            if hasattr(task, key):
+                # Convert status strings to TaskStatus enum
+                if key == 'status' and isinstance(value, str):
+                    try:
+                        value = TaskStatus(value)
+                    except ValueError:
+                        pass  # Keep original value if invalid
+                setattr(task, key, value)
+                # IDs are derived from titles, never stored
+                if key == 'prompt':
+                    fields[key] = self.blobs.put_large(value)
+                elif key != 'id':
+                    fields[key] = encode_value(value)
+
+        # Archiving goes by merged_at, whichever path merged the task
+        if task.status == TaskStatus.MERGED and task.merged_at is None:
+            task.merged_at = now
+            fields["merged_at"] = encode_value(now)
+
+        task.updated_at = now
+        task.version = revision
+        fields["updated_at"] = encode_value(now)
+        fields["version"] = revision
+        return fields
+
+
+class MarkdownTaskStore(TaskStore):
+    """
+    Stores tasks in tasks.md with an append-only journal of changes.
+
+    Reads replay the journal over the tasks.md snapshot; the journal is
+    compacted back into tasks.md in the background. A byte-offset index of
+    the task blocks lets single-task reads and compaction of plain status
+    updates touch only the blocks involved.
+    """
+
+    name = "markdown"
+
+    def __init__(self, project_id: str, splitmind_dir: Path):
+        super().__init__(project_id, splitmind_dir)
+        self.journal = TaskJournal(self.splitmind_dir / "tasks.journal")
+        self.lock = self.journal.lock
+        self.index = task_block_index(self.tasks_file, task_id_from_title)
+        self.tombstones = TombstoneFile(self.splitmind_dir / "tasks.tombstones.json")
+
+    def _signature(self) -> tuple:
+        return (file_signature(self.tasks_file), file_signature(self.journal.path))
+
+    def _pending_entries(self) -> List[dict]:
+        """Journal entries newer than the tasks.md snapshot"""
+        header_revision = read_header_revision(self.tasks_file)
+        return [entry for entry in self.journal.read()
+                if entry.get("rev") is None or entry["rev"] > header_revision]
+
+    def revision(self) -> int:
+        """Newest revision in the tasks.md header or the journal"""
+        with self.lock:
+            return max(read_header_revision(self.tasks_file), self.journal.last_revision())
+
+    def get_tasks_snapshot(self) -> Tuple[TaskRecord, ...]:
+        """Parsed tasks, served from the cache while the files are unchanged"""
+        with self.lock:
+            signature = self._signature()
+            cached = task_cache.get(self.project_id, signature)
+            if cached is not None:
+                return cached
+
+            tasks = parse_tasks_markdown(self.tasks_file)
+            tasks = apply_entries(tasks, self._pending_entries(), task_id_from_title)
+            snapshot = tuple(build_tasks(tasks))
+            task_cache.put(self.project_id, signature, snapshot)
+            return snapshot
+
+    def get_tasks_by_ids(self, task_ids: List[str]) -> Dict[str, Task]:
+        """Get a few tasks by ID without parsing the whole file"""
+        with self.lock:
+            if task_cache.get(self.project_id, self._signature()) is None:
+                found = self._read_tasks(task_ids)
+                if found is not None:
+                    return found
+            return super().get_tasks_by_ids(task_ids)
+
+    def _read_tasks(self, task_ids: List[str]) -> Optional[Dict[str, Task]]:
+        """
+        Read tasks from their indexed blocks plus the journal.
+
+        Returns None when the blocks alone can't reproduce what a full parse
+        would give, e.g. after a journaled rename or for a block without a
+        task_id, so the caller falls back to the snapshot.
+        """
+        entries = self._pending_entries()
+        if any(entry.get("op") == "update" and "title" in (entry.get("fields") or {})
+               for entry in entries):
+            return None
+
+        wanted = set(task_ids)
+        raw = []
+        for task_id in wanted:
+            for block in self.index.read_blocks(task_id):
+                raw.extend(parse_tasks_lines(block.splitlines()))
+
+        raw = [t for t in apply_entries(raw, entries, task_id_from_title) if t["id"] in wanted]
+        if any(t.get("task_id") is None for t in raw):
+            return None
+
+        found: Dict[str, Task] = {}
+        for task in build_tasks(raw):
+            if task.id not in found:
+                found[task.id] = self.load_task(task)
+        return found
+
+    def add_task(self, task: Task):
+        """Journal a new task"""
+        with self.lock:
+            task.version = self.revision() + 1
+            self._journal([{"op": "add", "rev": task.version, "task": encode_task(self._store_blobs(task))}])
+
+    def update_tasks(self, updates: Dict[str, dict],
+                     expected: Optional[Dict[str, int]] = None) -> List[Task]:
+        """Journal updates to several tasks with a single append"""
+        with self.lock:
+            by_id = self.get_tasks_by_ids(list(updates))
+
+            # Validate everything before writing anything
+            for task_id in updates:
+                if task_id not in by_id:
+                    raise ValueError(f"Task '{task_id}' not found")
+            self._check_versions(by_id, expected)
+
+            updated = []
+            entries = []
+            renamed = []
+            now = datetime.now()
+            revision = self.revision() + 1
+            for task_id, task_updates in updates.items():
+                task = by_id[task_id]
+                fields = self._apply_updates(task, task_updates, now, revision)
+                entries.append({"op": "update", "rev": revision, "id": task_id, "fields": fields})
+                updated.append(task)
+                if task_id_from_title(task.title) != task_id:
+                    renamed.append(task_id)
+
+            self._journal(entries)
+            # A new title means a new ID; the old one is gone for change feeds
+            self.tombstones.add(renamed, revision)
+            return updated
+
+    def delete_task(self, task_id: str, expected_version: Optional[int] = None):
+        """Journal a task deletion"""
+        with self.lock:
+            if expected_version is not None:
+                task = self.get_task(task_id)
+                if task is None:
+                    raise ValueError(f"Task '{task_id}' not found")
+                self._check_versions({task_id: task}, {task_id: expected_version})
+            self.delete_tasks([task_id])
+
+    def delete_tasks(self, task_ids: List[str]):
+        """Journal several deletions under one revision"""
+        if not task_ids:
+            return
+        with self.lock:
+            revision = self.revision() + 1
+            self._journal([{"op": "delete", "rev": revision, "id": task_id} for task_id in task_ids])
+            self.tombstones.add(task_ids, revision)
+
+    def replace_all(self, tasks: list, revision: Optional[int] = None):
+        """Atomically rewrite tasks.md and clear the journal"""
+        with self.lock:
+            replaced = revision is None
+            if replaced:
+                revision = self.revision() + 1
+                tasks = [self._with_version(t, revision) for t in tasks]
+            content = render_tasks_markdown([self._store_blobs(t) for t in tasks], revision)
+            write_atomic(self.tasks_file, content.encode('utf-8'))
+            # The snapshot now contains every journaled change
+            self.journal.truncate()
+            task_cache.invalidate(self.project_id)
+            if replaced:
+                # Deletions can't be told apart from the old contents any more
+                self.tombstones.reset(revision)
+                _notify_write(self.project_id)
+
+    def get_changes(self, since: int) -> dict:
+        """Changes from the journal when it covers ``since``, else from the snapshot"""
+        with self.lock:
+            revision = self.revision()
+            floor, tombstones = self.tombstones.read()
+            if since < floor or since > revision:
+                return build_changes(revision, since, floor, [], tombstones)
+
+            if since >= read_header_revision(self.tasks_file):
+                task_ids = set()
+                for entry in self._pending_entries():
+                    if entry.get("rev") is not None and entry["rev"] <= since:
+                        continue
+                    if entry.get("op") == "add":
+                        task_ids.add(task_id_from_title((entry.get("task") or {}).get("title", "")))
+                    elif entry.get("op") == "update":
+                        task_ids.add(entry.get("id"))
+                        title = (entry.get("fields") or {}).get("title")
+                        if title:
+                            task_ids.add(task_id_from_title(title))
+                tasks = list(self.get_tasks_by_ids(list(task_ids)).values())
+            else:
+                tasks = [self.load_task(t) for t in self.get_tasks_snapshot() if t.version > since]
+            return build_changes(revision, since, floor, tasks, tombstones)
+
+    def export_markdown(self) -> Path:
+        """Fold the journal into tasks.md"""
+        self.compact()
+        return self.tasks_file
+
+    def reset(self):
+        """Empty tasks.md and remove its journal, keeping the revision"""
+        with self.lock:
+            self.replace_all([])
+            if self.journal.path.exists():
+                self.journal.path.unlink()
+            task_cache.invalidate(self.project_id)
+
+    def compact(self):
+        """Fold the journal back into tasks.md"""
+        with self.lock:
+            snapshot = self.get_tasks_snapshot()
+            revision = self.revision()
+            if self._splice_journal(snapshot, self._pending_entries(), revision):
+                self.journal.truncate()
+                task_cache.invalidate(self.project_id)
+            else:
+                self.replace_all(list(snapshot), revision)
+
+    def _splice_journal(self, snapshot: Tuple[TaskRecord, ...], entries: List[dict],
+                        revision: int) -> bool:
+        """Rewrite only the blocks of updated tasks, if nothing moved"""
+        dirty = set()
+        for entry in entries:
+            if entry.get("op") != "update" or REORDERING_FIELDS & set(entry.get("fields") or {}):
+                return False
+            dirty.add(entry.get("id"))
+        if not dirty:
+            return False
+
+        by_id: Dict[str, TaskRecord] = {}
+        for task in snapshot:
+            by_id.setdefault(task.id, task)
+
+        replacements = {}
+        for task_id in dirty:
+            spans = self.index.spans_for(task_id)
+            if len(spans) != 1 or task_id not in by_id:
+                return False
+            replacements[spans[0]] = render_task_block(by_id[task_id]).encode('utf-8')
+        replacements[(0, self.index.preamble_end)] = render_preamble(revision).encode('utf-8')
+
+        self.index.splice(replacements)
+        return True
+
+    def _journal(self, entries: List[dict]):
+        """Record task mutations and schedule compaction when needed"""
+        self.journal.append(entries)
+        task_cache.invalidate(self.project_id)
+        _notify_write(self.project_id)
+        if self.journal.needs_compaction():
+            self.journal.compact_in_background(self.compact)
+
+
+_connections: Dict[str, Tuple[sqlite3.Connection, threading.RLock]] = {}
+_connections_guard = threading.Lock()
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    pk INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL,
+    task_id INTEGER,
+    status TEXT NOT NULL,
+    branch TEXT,
+    session TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_id ON tasks(id);
+CREATE INDEX IF NOT EXISTS idx_tasks_task_id ON tasks(task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+CREATE INDEX IF NOT EXISTS idx_tasks_branch ON tasks(branch);
+CREATE INDEX IF NOT EXISTS idx_tasks_session ON tasks(session);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tombstones (
+    id TEXT PRIMARY KEY,
+    rev INTEGER NOT NULL
+);
+"""
+
+
+def _migrate_sqlite(conn: sqlite3.Connection):
+    """Add columns introduced after a database was created"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(tasks)")}
+    if "version" not in columns:
+        conn.execute("ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        conn.execute(
+            "UPDATE tasks SET version = COALESCE(json_extract(data, '$.version'), 0)"
+        )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_version ON tasks(version)")
+
+
+def _sqlite_connection(path: Path) -> Tuple[sqlite3.Connection, threading.RLock]:
+    """Get the process-wide connection and lock for a task database"""
+    key = str(Path(path).resolve())
+    with _connections_guard:
+        entry = _connections.get(key)
+        if entry is None:
+            conn = sqlite3.connect(key, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SQLITE_SCHEMA)
+            _migrate_sqlite(conn)
+            entry = (conn, threading.RLock())
+            _connections[key] = entry
+        return entry
+
+
+class SQLiteTaskStore(TaskStore):
+    """
+    Stores tasks in .splitmind/tasks.db.
+
+    The full task is kept as JSON alongside indexed status, task_id, branch,
+    session and version columns. tasks.md is only written on export. The first
+    time the database is created, the markdown store's tasks are imported,
+    journaled changes included.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, project_id: str, splitmind_dir: Path):
+        super().__init__(project_id, splitmind_dir)
+        self.db_file = self.splitmind_dir / "tasks.db"
+        is_new = not self.db_file.exists()
+        self.splitmind_dir.mkdir(parents=True, exist_ok=True)
+        self.conn, self.lock = _sqlite_connection(self.db_file)
+        if is_new:
+            count = self._import_markdown_store()
+            if count:
+                print(f"📥 Imported {count} tasks from tasks.md into {self.db_file}")
+
+    def _import_markdown_store(self) -> int:
+        """Copy the markdown store's tasks, including uncompacted journal entries"""
+        markdown = MarkdownTaskStore(self.project_id, self.splitmind_dir)
+        if not (markdown.tasks_file.exists() or markdown.journal.path.exists()):
+            return 0
+        tasks = markdown.get_tasks_snapshot()
+        self.replace_all(list(tasks), markdown.revision())
+        return len(tasks)
+
+    def _query(self, sql: str, params=()) -> List[TaskRecord]:
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [TaskRecord.from_dict(json.loads(row[0])) for row in rows]
+
+    def _row_values(self, task) -> tuple:
+        data = encode_task(self._store_blobs(task))
+        data["id"] = task_id_from_title(task.title)
+        status_value = task.status.value if hasattr(task.status, 'value') else str(task.status)
+        return (data["id"], task.task_id, status_value, task.branch, task.session,
+                task.priority or 0, task.version or 0, json.dumps(data, default=str))
+
+    def get_tasks_snapshot(self) -> Tuple[TaskRecord, ...]:
+        """All tasks, served from the cache until the database changes"""
+        with self.lock:
+            signature = ("sqlite", self.conn.execute("PRAGMA data_version").fetchone()[0])
+            cached = task_cache.get(self.project_id, signature)
+            if cached is not None:
+                return cached
+
+            tasks = self._query("SELECT data FROM tasks ORDER BY pk")
+            snapshot = tuple(sorted(tasks, key=task_sort_key))
+            task_cache.put(self.project_id, signature, snapshot)
+            return snapshot
+
+    def get_task(self, task_id: str) -> Optional[Task]:
+        """Indexed lookup of a single task"""
+        tasks = self._query("SELECT data FROM tasks WHERE id = ? ORDER BY pk LIMIT 1", (task_id,))
+        return self.load_task(tasks[0]) if tasks else None
+
+    def get_tasks_by_ids(self, task_ids: List[str]) -> Dict[str, Task]:
+        """Indexed lookup of several tasks"""
+        found: Dict[str, Task] = {}
+        ids = list(task_ids)
+        # Stay under SQLite's bound parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            for task in self._query(
+                f"SELECT data FROM tasks WHERE id IN ({placeholders}) ORDER BY pk", chunk
+            ):
+                if task.id not in found:
+                    found[task.id] = self.load_task(task)
+        return found
+
+    def get_tasks_by_status(self, *statuses: TaskStatus) -> List[TaskRecord]:
+        """Indexed status filter"""
+        if not statuses:
+            return []
+        placeholders = ",".join("?" for _ in statuses)
+        values = [s.value if hasattr(s, 'value') else str(s) for s in statuses]
+        tasks = self._query(f"SELECT data FROM tasks WHERE status IN ({placeholders})", values)
+        return sorted(tasks, key=task_sort_key)
+
+    def max_task_id(self) -> int:
+        """Highest task_id via the task_id index"""
+        with self.lock:
+            row = self.conn.execute("SELECT MAX(task_id) FROM tasks").fetchone()
+        return row[0] or 0
+
+    def revision(self) -> int:
+        """Revision counter kept in the meta table"""
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return row[0] if row else 0
+
+    @contextmanager
+    def _transaction(self, revision: Optional[int] = None):
+        """Run writes in one immediate transaction and yield ``revision`` or a new one"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if revision is None:
+                    self.conn.execute(
+                        "INSERT INTO meta (key, value) VALUES ('revision', 1) "
+                        "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+                    )
+                else:
+                    self.conn.execute(
+                        "INSERT INTO meta (key, value) VALUES ('revision', ?) "
+                        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                        (revision,)
+                    )
+                yield self.revision()
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            finally:
+                task_cache.invalidate(self.project_id)
+        _notify_write(self.project_id)
+
+    def _select_row(self, task_id: str):
+        return self.conn.execute(
+            "SELECT pk, data FROM tasks WHERE id = ? ORDER BY pk LIMIT 1", (task_id,)
+        ).fetchone()
+
+    def add_task(self, task: Task):
+        """Insert a new task"""
+        with self._transaction() as revision:
+            task.version = revision
+            self.conn.execute(
+                "INSERT INTO tasks (id, task_id, status, branch, session, priority, version, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._row_values(task)
+            )
+
+    def update_tasks(self, updates: Dict[str, dict],
+                     expected: Optional[Dict[str, int]] = None) -> List[Task]:
+        """Update several rows in one transaction"""
+        with self._transaction() as revision:
+            rows = {}
+            tasks = {}
+            for task_id in updates:
+                row = self._select_row(task_id)
+                if row is None:
+                    raise ValueError(f"Task '{task_id}' not found")
+                rows[task_id] = row[0]
+                tasks[task_id] = self.load_task(TaskRecord.from_dict(json.loads(row[1])))
+            self._check_versions(tasks, expected)
+
+            updated = []
+            renamed = []
+            now = datetime.now()
+            for task_id, task_updates in updates.items():
+                task = tasks[task_id]
+                self._apply_updates(task, task_updates, now, revision)
+                task.id = task_id_from_title(task.title)
+                if task.id != task_id:
+                    renamed.append(task_id)
+                self.conn.execute(
+                    "UPDATE tasks SET id = ?, task_id = ?, status = ?, branch = ?, "
+                    "session = ?, priority = ?, version = ?, data = ? WHERE pk = ?",
+                    self._row_values(task) + (rows[task_id],)
+                )
+                updated.append(task)
+            self._add_tombstones(renamed, revision)
+            return updated
+
+    def delete_task(self, task_id: str, expected_version: Optional[int] = None):
+        """Delete every row with the given ID"""
+        with self._transaction() as revision:
+            if expected_version is not None:
+                row = self._select_row(task_id)
+                if row is None:
+                    raise ValueError(f"Task '{task_id}' not found")
+                self._check_versions({task_id: Task(**json.loads(row[1]))},
+                                     {task_id: expected_version})
+            self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            self._add_tombstones([task_id], revision)
+
+    def delete_tasks(self, task_ids: List[str]):
+        """Delete several tasks in one transaction"""
+        if not task_ids:
+            return
+        with self._transaction() as revision:
+            self.conn.executemany("DELETE FROM tasks WHERE id = ?", [(t,) for t in task_ids])
+            self._add_tombstones(task_ids, revision)
+
+    def replace_all(self, tasks: list, revision: Optional[int] = None):
+        """Replace the table contents in one transaction"""
+        restamp = revision is None
+        with self._transaction(revision) as revision:
+            if restamp:
+                tasks = [self._with_version(t, revision) for t in tasks]
+            self.conn.execute("DELETE FROM tasks")
+            self._reset_tombstones(revision)
+            self.conn.executemany(
+                "INSERT INTO tasks (id, task_id, status, branch, session, priority, version, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [self._row_values(task) for task in tasks]
+            )
+
+    def reset(self):
+        """Remove all tasks and the tasks.md export"""
+        with self._transaction() as revision:
+            self.conn.execute("DELETE FROM tasks")
+            self._reset_tombstones(revision)
+        if self.tasks_file.exists():
+            self.tasks_file.unlink()
+
+    def _floor(self) -> int:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'floor'").fetchone()
+        return row[0] if row else 0
+
+    def _add_tombstones(self, task_ids: List[str], revision: int):
+        """Record deletions inside the current transaction, pruning old ones"""
+        if not task_ids:
+            return
+        self.conn.executemany(
+            "INSERT INTO tombstones (id, rev) VALUES (?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET rev = excluded.rev",
+            [(task_id, revision) for task_id in task_ids]
+        )
+        tombstones = dict(self.conn.execute("SELECT id, rev FROM tombstones").fetchall())
+        floor, kept = prune_tombstones(self._floor(), tombstones)
+        if len(kept) < len(tombstones):
+            self.conn.execute("DELETE FROM tombstones WHERE rev <= ?", (floor,))
+            self._set_floor(floor)
+
+    def _reset_tombstones(self, floor: int):
+        self.conn.execute("DELETE FROM tombstones")
+        self._set_floor(floor)
+
+    def _set_floor(self, floor: int):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('floor', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (floor,)
+        )
+
+    def get_changes(self, since: int) -> dict:
+        """Changed rows via the version index, plus tombstones"""
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                revision = self.revision()
+                floor = self._floor()
+                tombstones = dict(self.conn.execute(
+                    "SELECT id, rev FROM tombstones WHERE rev > ?", (since,)
+                ).fetchall())
+                rows = self.conn.execute(
+                    "SELECT data FROM tasks WHERE version > ? ORDER BY pk", (since,)
+                ).fetchall()
+            finally:
+                self.conn.execute("COMMIT")
+        tasks = [self.load_task(TaskRecord.from_dict(json.loads(row[0]))) for row in rows]
+        return build_changes(revision, since, floor, tasks, tombstones)
+
+
+TASK_STORES = {
+    MarkdownTaskStore.name: MarkdownTaskStore,
+    SQLiteTaskStore.name: SQLiteTaskStore,
+}
+
+
+def create_task_store(project_id: str, splitmind_dir: Path, backend: str = "markdown") -> TaskStore:
+    """Instantiate the task store backend selected for a project"""
+    store_class = TASK_STORES.get(backend)
+    if store_class is None:
+        raise ValueError(f"Unknown task store '{backend}'")
+    return store_class(project_id, splitmind_dir)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test where the config manager keeps project plan blobs
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.blob_store import BlobStore, is_blob_ref
+from backend.config import ConfigManager
+from backend.models import Project
+
+
+def config_in(tmp_path: Path) -> ConfigManager:
+    """A config manager with its source tree and data directory under tmp_path"""
+    manager = ConfigManager.__new__(ConfigManager)
+    manager.config_dir = tmp_path / "src"
+    manager.config_file = manager.config_dir / "config.json"
+    manager.projects_file = manager.config_dir / "projects.json"
+    manager.blobs = BlobStore(tmp_path / "data" / "blobs")
+    manager._ensure_config_dir()
+    manager._load_config()
+    return manager
+
+
+def test_plans_live_in_the_data_dir_and_old_blobs_move_there(tmp_path: Path):
+    """Blobs left in the source tree are moved out; plans round-trip, whatever they start with"""
+    old_plan = "# Plan\n\nWritten before the data directory"
+    old_ref = BlobStore(tmp_path / "src" / "blobs").put(old_plan)
+    manager = config_in(tmp_path)
+    manager._move_legacy_blobs()
+    assert not (tmp_path / "src" / "blobs").exists()
+    assert manager.blobs.get(old_ref) == old_plan
+
+    project_path = tmp_path / "project"
+    project_path.mkdir()
+    manager.add_project(Project(id="p", name="P", path=str(project_path), plan="# Plan\n\nSteps"))
+    stored = manager.projects_data["projects"][0]["plan"]
+    assert is_blob_ref(stored) and manager.blobs.get(stored) == "# Plan\n\nSteps"
+
+    manager.update_project("p", {"description": "Renamed"})
+    assert manager.get_project("p").plan == "# Plan\n\nSteps"
+    manager.update_project("p", {"plan": "blob:sha256:see attached"})
+    assert manager.get_project("p").plan == "blob:sha256:see attached"
+    assert not list((tmp_path / "src").glob("blobs"))
+    print("✅ Plans stored under the data directory and read back as written")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        test_plans_live_in_the_data_dir_and_old_blobs_move_there(Path(tmp))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test that git work on several repositories can safely overlap
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.git_repo import GitRepo
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "SplitMind Test", "GIT_AUTHOR_EMAIL": "test@splitmind.local",
+    "GIT_COMMITTER_NAME": "SplitMind Test", "GIT_COMMITTER_EMAIL": "test@splitmind.local",
+}
+
+
+async def make_repo(path: Path) -> GitRepo:
+    path.mkdir()
+    repo = GitRepo(path)
+    await repo.run("init", check=True)
+    await repo.run("checkout", "-b", "main", check=True)
+    return repo
+
+
+async def commit_file(repo: GitRepo, name: str):
+    (repo.path / name).write_text(f"{name}\n")
+    await repo.run("add", name, check=True)
+    await repo.run("commit", "-m", f"Add {name}", check=True, env=GIT_ENV)
+
+
+def test_interleaved_operations_on_two_repos():
+    """Commits made concurrently in two repositories land in the right one"""
+    rounds = 10
+
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            first, second = await asyncio.gather(
+                make_repo(Path(tmp) / "first"), make_repo(Path(tmp) / "second")
+            )
+            toplevels = set()
+            for i in range(rounds):
+                results = await asyncio.gather(
+                    commit_file(first, f"first-{i}.txt"),
+                    commit_file(second, f"second-{i}.txt"),
+                    first.run("rev-parse", "--show-toplevel", check=True),
+                    second.run("rev-parse", "--show-toplevel", check=True),
+                )
+                toplevels.add((Path(results[2].stdout.strip()).resolve(),
+                               Path(results[3].stdout.strip()).resolve()))
+            assert toplevels == {(first.path.resolve(), second.path.resolve())}
+
+            first_log, second_log = await asyncio.gather(
+                first.run("log", "--format=%s", check=True),
+                second.run("log", "--format=%s", check=True),
+            )
+            first_files, second_files = await asyncio.gather(
+                first.run("ls-files", check=True), second.run("ls-files", check=True)
+            )
+            return first_log.stdout, second_log.stdout, first_files.stdout, second_files.stdout
+
+    cwd = os.getcwd()
+    first_log, second_log, first_files, second_files = asyncio.run(run())
+
+    assert os.getcwd() == cwd
+    assert len(first_log.splitlines()) == rounds
+    assert len(second_log.splitlines()) == rounds
+    assert all(line.startswith("Add first-") for line in first_log.splitlines())
+    assert all(line.startswith("Add second-") for line in second_log.splitlines())
+    assert sorted(first_files.split()) == sorted(f"first-{i}.txt" for i in range(rounds))
+    assert sorted(second_files.split()) == sorted(f"second-{i}.txt" for i in range(rounds))
+    print(f"✅ {rounds} interleaved rounds kept both repositories separate")
+
+
+def test_backend_does_not_change_directory():
+    """Backend modules must not change the process-wide working directory"""
+    pattern = "os." + "chdir("
+    backend = Path(__file__).parent
+    offenders = [path.name for path in backend.glob("*.py") if pattern in path.read_text()]
+    assert offenders == [], f"{pattern} used in {offenders}"
+    print("✅ No backend module changes the working directory")
+
+
+if __name__ == "__main__":
+    test_interleaved_operations_on_two_repos()
+    test_backend_does_not_change_directory()
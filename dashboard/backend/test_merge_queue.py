@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test that a merge queue pass orders merges by dependency without touching the graph
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.control_loop import ControlLoop
+from backend.merge_queue import MergeQueue
+from backend.models import TaskStatus
+from backend.task_graph import TaskGraph
+from backend.task_record import TaskRecord
+
+
+class RecordingMergeQueue(MergeQueue):
+    """Merges without git, recording the order"""
+
+    def __init__(self, project_path: str, merge_seconds: float = 0):
+        super().__init__(project_path)
+        self.merge_seconds = merge_seconds
+        self.merged = []
+
+    async def merge_task(self, task: TaskRecord) -> bool:
+        await asyncio.sleep(self.merge_seconds)
+        self.merged.append(task.id)
+        return True
+
+    async def cleanup_worktree(self, task: TaskRecord):
+        pass
+
+
+def task(number: int, dependencies=()) -> TaskRecord:
+    return TaskRecord(id=f"t-{number}", task_id=number, title=f"T {number}",
+                      status=TaskStatus.COMPLETED, branch=f"task-{number}",
+                      dependencies=tuple(dependencies))
+
+
+def test_dependents_merge_in_the_same_pass_and_the_graph_is_untouched(tmp_path: Path):
+    """A task whose dependency merged earlier in the pass merges too; the shared graph keeps its state"""
+    base, dependent = task(1), task(2, ["t-1"])
+    graph = TaskGraph([base, dependent])
+    queue = RecordingMergeQueue(str(tmp_path))
+    queue.queue = [base, dependent]
+
+    asyncio.run(queue.process_queue(graph))
+    assert queue.merged == ["t-1", "t-2"] and not queue.queue
+    assert graph.by_id["t-1"].status == TaskStatus.COMPLETED
+    print("✅ Merged t-1 then t-2; graph still shows t-1 COMPLETED")
+
+
+def test_slow_merge_outlives_its_control_loop_pass(tmp_path: Path):
+    """A loop pass that times out stops waiting, but the merge it started still finishes"""
+    queue = RecordingMergeQueue(str(tmp_path), merge_seconds=0.2)
+    queue.queue = [task(1)]
+    graph = TaskGraph(queue.queue)
+
+    async def run():
+        loop = ControlLoop("merger", lambda: queue.process_queue(graph), interval=1, timeout=0.05)
+        await loop.run_once()
+        assert loop.last_error.startswith("timed out") and queue.merged == []
+        # The next pass waits for the merge to finish
+        async with queue.merge_lock:
+            pass
+
+    asyncio.run(run())
+    assert queue.merged == ["t-1"] and not queue.queue
+    print("✅ Merge finished after its loop pass timed out")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        test_dependents_merge_in_the_same_pass_and_the_graph_is_untouched(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_slow_merge_outlives_its_control_loop_pass(Path(tmp))
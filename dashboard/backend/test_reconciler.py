@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test that reconciliation diffs recorded task state against what is running
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models import TaskStatus
+from backend.reconciler import ObservedState, _status_files, plan_reconciliation
+from backend.task_record import TaskRecord
+
+PROJECT = "demo"
+WORKTREES = Path("/work/demo/worktrees")
+
+
+def task(number: int, status: TaskStatus, session: str = None, **fields) -> TaskRecord:
+    return TaskRecord(id=f"t-{number}", task_id=number, title=f"T {number}", status=status,
+                      branch=f"task-{number}", session=session, **fields)
+
+
+def observed(sessions=(), status_files=None, redis_completions=None, worktrees=None,
+             unmerged=()) -> ObservedState:
+    return ObservedState(
+        sessions=set(sessions),
+        status_files=status_files or {},
+        redis_completions=redis_completions,
+        worktrees=worktrees or {},
+        unmerged_branches=set(unmerged) if unmerged is not None else None,
+    )
+
+
+def test_in_progress_tasks_are_kept_completed_or_requeued():
+    """Live agents are kept, finished ones completed and vanished ones requeued"""
+    tasks = [
+        task(1, TaskStatus.IN_PROGRESS, "1-demo"),
+        task(2, TaskStatus.IN_PROGRESS, "2-demo"),
+        task(3, TaskStatus.IN_PROGRESS, "3-demo"),
+        task(4, TaskStatus.IN_PROGRESS, "4-demo"),
+        task(5, TaskStatus.IN_PROGRESS, "5-demo"),
+    ]
+    plan = plan_reconciliation(tasks, observed(
+        sessions={"1-demo", "2-demo"},
+        status_files={"2-demo": "COMPLETED"},
+        redis_completions={"3": {"session_name": "3-demo"}},
+        unmerged={"task-4"},
+    ), PROJECT, WORKTREES)
+
+    assert plan.keep == ["t-1"]
+    assert sorted(plan.complete) == ["t-2", "t-3", "t-4"]
+    assert plan.requeue == ["t-5"]
+    assert plan.kill_sessions == ["2-demo"]
+    assert plan.write_status_files == ["1-demo"]
+    assert plan.remove_status_files == ["2-demo"]
+    assert plan.clear_redis == ["3"]
+    print("✅ Running, finished and vanished agents each got the right action")
+
+
+def test_orphans_are_adopted_or_cleaned_up():
+    """Sessions without an IN_PROGRESS task are adopted if a queued task owns them, else killed"""
+    tasks = [
+        task(1, TaskStatus.UP_NEXT),
+        task(2, TaskStatus.MERGED, "2-demo"),
+        task(3, TaskStatus.IN_PROGRESS, "3-demo", backup_session="3-demo-b"),
+    ]
+    plan = plan_reconciliation(tasks, observed(
+        sessions={"1-demo", "2-demo", "9-demo", "3-demo-b", "9-other", "shell"},
+        worktrees={
+            "task-2": WORKTREES / "task-2",
+            "task-3-b": WORKTREES / "task-3-b",
+            "task-8": WORKTREES / "task-8",
+            "old": WORKTREES / "old",
+            "main": Path("/work/demo"),
+        },
+        unmerged={"task-3-b", "task-8"},
+    ), PROJECT, WORKTREES)
+
+    assert plan.adopt == {"t-1": "1-demo"}
+    assert plan.keep == ["t-3"]
+    assert plan.kill_sessions == ["2-demo", "9-demo"]
+    assert plan.remove_worktrees == [str(WORKTREES / "old"), str(WORKTREES / "task-2")]
+    print("✅ Orphaned session adopted, stray sessions killed, merged worktrees removed")
+
+
+def test_unknown_branch_state_leaves_tasks_alone():
+    """Without git's view of unmerged branches, dead agents are left to the completion watcher"""
+    plan = plan_reconciliation([task(1, TaskStatus.IN_PROGRESS, "1-demo")],
+                               observed(unmerged=None), PROJECT, WORKTREES)
+    assert plan.complete == [] and plan.requeue == [] and plan.remove_worktrees == []
+    print("✅ Tasks untouched when branch state is unknown")
+
+
+def test_worktrees_of_quarantined_and_requeued_tasks_are_kept():
+    """A failed agent's worktree may hold uncommitted work, so it stays for the retry or a look"""
+    tasks = [
+        task(1, TaskStatus.QUARANTINED),
+        task(2, TaskStatus.IN_PROGRESS, "2-demo"),
+        task(3, TaskStatus.MERGED),
+    ]
+    plan = plan_reconciliation(tasks, observed(
+        worktrees={f"task-{n}": WORKTREES / f"task-{n}" for n in (1, 2, 3)},
+        unmerged=(),
+    ), PROJECT, WORKTREES)
+    assert plan.requeue == ["t-2"]
+    assert plan.remove_worktrees == [str(WORKTREES / "task-3")]
+    print("✅ Only the merged task's worktree removed")
+
+
+def test_status_files_of_a_project_sharing_a_prefix_are_left_alone(tmp_path: Path):
+    """Reconciling "web" neither reads nor removes the status files of "web2"'s agents"""
+    for name, status in (("1-web", "RUNNING"), ("2-web-b", "COMPLETED"), ("3-web2", "RUNNING"),
+                         ("web2-task-4", "COMPLETED")):
+        (tmp_path / f"{name}.status").write_text(status)
+
+    files = _status_files(tmp_path, "web")
+    assert files == {"1-web": "RUNNING", "2-web-b": "COMPLETED"}
+    plan = plan_reconciliation([task(1, TaskStatus.IN_PROGRESS, "1-web")], observed(
+        sessions={"1-web", "3-web2"}, status_files=files, unmerged=(),
+    ), "web", WORKTREES)
+    assert plan.remove_status_files == ["2-web-b"] and plan.kill_sessions == []
+    print("✅ Only web's stale status file removed; web2's agents untouched")
+
+
+if __name__ == "__main__":
+    test_in_progress_tasks_are_kept_completed_or_requeued()
+    test_orphans_are_adopted_or_cleaned_up()
+    test_unknown_branch_state_leaves_tasks_alone()
+    test_worktrees_of_quarantined_and_requeued_tasks_are_kept()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_status_files_of_a_project_sharing_a_prefix_are_left_alone(Path(tmp))
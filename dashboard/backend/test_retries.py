@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test the retry budget of repeatedly failing tasks
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models import OrchestratorConfig, TaskStatus
+from backend.retries import failure_updates, is_backing_off
+from backend.task_record import TaskRecord
+from backend.task_store import build_tasks, parse_tasks_lines, render_task_block
+
+NOW = datetime(2026, 1, 1, 12, 0)
+CONFIG = OrchestratorConfig(max_task_attempts=4, retry_backoff_seconds=60,
+                            max_retry_backoff_seconds=150)
+
+
+def test_failures_back_off_then_quarantine():
+    """Each failure doubles the delay up to the max, and the last one quarantines"""
+    task = TaskRecord(id="t-1", task_id=1, title="T 1", status=TaskStatus.IN_PROGRESS,
+                      branch="task-1", session="1-demo")
+    delays = []
+    for _ in range(3):
+        updates = failure_updates(task, "Agent session ended without commits", CONFIG, NOW)
+        assert updates["status"] == TaskStatus.UNCLAIMED and updates["session"] is None
+        delays.append((updates["retry_after"] - NOW).total_seconds())
+        task = task._replace(**updates)
+        assert is_backing_off(task, NOW)
+        assert not is_backing_off(task, NOW + timedelta(seconds=delays[-1]))
+    assert delays == [60, 120, 150]
+
+    updates = failure_updates(task, "Spawn failed:\nnpm install\nexited 1", CONFIG, NOW)
+    assert updates["status"] == TaskStatus.QUARANTINED
+    assert updates["attempts"] == 4 and updates["retry_after"] is None
+    assert updates["last_failure"] == "Spawn failed: npm install exited 1"
+    print(f"✅ Retried after {delays} s, then quarantined on attempt 4")
+
+
+def test_retry_state_survives_tasks_md():
+    """Attempts, the failure reason and the retry time are kept in tasks.md"""
+    task = TaskRecord(id="t-1", task_id=1, title="T 1", status=TaskStatus.UNCLAIMED,
+                      branch="task-1", attempts=2, last_failure="Spawn failed: no tmux",
+                      retry_after=NOW)
+    loaded, = build_tasks(parse_tasks_lines(render_task_block(task).splitlines()))
+    assert (loaded.attempts, loaded.last_failure, loaded.retry_after) == (
+        2, "Spawn failed: no tmux", NOW)
+    print("✅ Retry state round-trips through tasks.md")
+
+
+if __name__ == "__main__":
+    test_failures_back_off_then_quarantine()
+    test_retry_state_survives_tasks_md()
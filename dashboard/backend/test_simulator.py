@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test the scheduling simulator against cases with known answers
+"""
+
+import math
+import os
+import random
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.simulator import make_dag, simulate
+
+
+def test_chain_runs_one_task_at_a_time():
+    """A chain takes the sum of its run times however many agents there are"""
+    dag = make_dag("chain", 8, random.Random(1))
+    expected_hours = sum(task.duration for task in dag) / 3600
+    for agents in (1, 4):
+        metrics = simulate(dag, "critical_path", agents, merge_minutes=0)
+        assert math.isclose(metrics["total_hours"], expected_hours)
+        assert math.isclose(metrics["utilization"], 1 / agents)
+    print(f"✅ Chain of 8 finished in {expected_hours:.2f} h with 1 and 4 agents")
+
+
+def test_wide_dag_with_enough_agents_has_no_wait():
+    """Independent tasks all start at once when every task gets a slot"""
+    dag = make_dag("wide", 6, random.Random(2))
+    metrics = simulate(dag, "priority", 6, merge_minutes=0)
+    assert math.isclose(metrics["total_hours"], max(task.duration for task in dag) / 3600)
+    assert metrics["mean_wait_minutes"] == 0
+    print(f"✅ 6 independent tasks finished in {metrics['total_hours']:.2f} h with no queue wait")
+
+
+def test_every_layered_task_is_merged():
+    """Fewer agents than ready tasks still gets the whole DAG merged"""
+    dag = make_dag("layered", 25, random.Random(3))
+    metrics = simulate(dag, "critical_path", 3, merge_minutes=2)
+    assert 0 < metrics["utilization"] <= 1
+    assert metrics["max_merge_backlog"] >= 1
+    print(f"✅ 25 layered tasks merged in {metrics['total_hours']:.2f} h "
+          f"at {metrics['utilization']:.0%} utilization")
+
+
+if __name__ == "__main__":
+    test_chain_runs_one_task_at_a_time()
+    test_wide_dag_with_enough_agents_has_no_wait()
+    test_every_layered_task_is_merged()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test that straggler detection measures run time without frozen time
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models import TaskStatus
+from backend.scheduler import run_time_percentile
+from backend.speculation import find_stragglers
+from backend.task_record import TaskRecord
+from backend.task_store import build_tasks, parse_tasks_lines, render_task_block
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+
+def finished(number: int, minutes: int, frozen_minutes: int = 0) -> TaskRecord:
+    return TaskRecord(id=f"done-{number}", task_id=number, title=f"Done {number}",
+                      status=TaskStatus.COMPLETED, branch=f"done-{number}",
+                      started_at=NOW - timedelta(minutes=minutes), completed_at=NOW,
+                      suspended_seconds=frozen_minutes * 60)
+
+
+def running(number: int, minutes: int, frozen_minutes: int = 0, **fields) -> TaskRecord:
+    return TaskRecord(id=f"run-{number}", task_id=number, title=f"Run {number}",
+                      status=TaskStatus.IN_PROGRESS, branch=f"run-{number}",
+                      session=f"{number}-demo", started_at=NOW - timedelta(minutes=minutes),
+                      suspended_seconds=frozen_minutes * 60, **fields)
+
+
+def test_frozen_time_is_not_run_time():
+    """Finished tasks' frozen time leaves the baseline, and resumed agents aren't stragglers for it"""
+    history = [finished(1, 10), finished(2, 10), finished(3, 60, frozen_minutes=50)]
+    assert run_time_percentile(history, 100) == 600
+
+    tasks = history + [running(4, 30, frozen_minutes=25), running(5, 15),
+                       running(6, 40, suspended_at=NOW - timedelta(minutes=35))]
+    threshold, stragglers = find_stragglers(tasks, 100, 3, now=NOW)
+    assert threshold == 600 and [task.id for task in stragglers] == ["run-5"]
+    print("✅ 50 frozen minutes left out of the baseline; only the unfrozen slow task straggles")
+
+
+def test_frozen_time_survives_tasks_md():
+    task = running(1, 30, frozen_minutes=5)
+    loaded, = build_tasks(parse_tasks_lines(render_task_block(task).splitlines()))
+    assert loaded.suspended_seconds == 300
+    print("✅ Frozen time round-trips through tasks.md")
+
+
+if __name__ == "__main__":
+    test_frozen_time_is_not_run_time()
+    test_frozen_time_survives_tasks_md()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite task store's revisions and its import from the markdown store
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models import Task, TaskStatus
+from backend.task_store import MarkdownTaskStore, SQLiteTaskStore, task_id_from_title
+
+
+def make_task(number: int) -> Task:
+    title = f"Task {number}"
+    return Task(id=task_id_from_title(title), task_id=number, title=title, branch=f"task-{number}")
+
+
+def test_replace_all_records_the_given_revision(tmp_path: Path):
+    """An explicit revision is recorded instead of a new one"""
+    store = SQLiteTaskStore(f"sqlite-rev-{tmp_path.name}", tmp_path)
+    store.add_task(make_task(1))
+    store.replace_all([make_task(2)], revision=40)
+    assert store.revision() == 40
+    store.replace_all([make_task(3)])
+    assert store.revision() == 41
+    print("✅ replace_all recorded revision 40, then counted on from it")
+
+
+def test_first_open_imports_journaled_changes(tmp_path: Path):
+    """Changes still in the markdown journal survive the switch to SQLite"""
+    project_id = f"sqlite-import-{tmp_path.name}"
+    markdown = MarkdownTaskStore(project_id, tmp_path)
+    markdown.add_task(make_task(1))
+    markdown.compact()
+    markdown.add_task(make_task(2))
+    markdown.update_tasks({"task-1": {"status": TaskStatus.IN_PROGRESS}})
+    assert markdown.journal.path.stat().st_size > 0
+
+    store = SQLiteTaskStore(project_id, tmp_path)
+    tasks = {task.id: task for task in store.get_tasks_snapshot()}
+    assert sorted(tasks) == ["task-1", "task-2"]
+    assert tasks["task-1"].status == TaskStatus.IN_PROGRESS
+    assert store.revision() == markdown.revision()
+    print(f"✅ Imported {len(tasks)} tasks at revision {store.revision()}, journal included")
+
+
+if __name__ == "__main__":
+    for test in (test_replace_all_records_the_given_revision,
+                 test_first_open_imports_journaled_changes):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test the task endpoints' versioning, paging and change feed
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.api import app
+from backend.blob_store import BlobStore
+from backend.config import config_manager
+from backend.models import Project
+
+
+@pytest.fixture
+def client() -> TestClient:
+    return TestClient(app)
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch, client: TestClient) -> str:
+    """A project with three tasks, registered in a config kept under tmp_path"""
+    monkeypatch.setattr(config_manager, "projects_file", tmp_path / "projects.json")
+    monkeypatch.setattr(config_manager, "projects_data", {"projects": []})
+    monkeypatch.setattr(config_manager, "blobs", BlobStore(tmp_path / "blobs"))
+    path = tmp_path / "project"
+    path.mkdir()
+    project_id = f"api-{tmp_path.name}"
+    config_manager.add_project(Project(id=project_id, name="API test", path=str(path)))
+
+    for number in (1, 2, 3):
+        response = client.post(f"/api/projects/{project_id}/tasks", params={"title": f"Task {number}"})
+        assert response.status_code == 200
+    return project_id
+
+
+def test_if_match_rejects_stale_writers(project: str, client: TestClient):
+    """A write with the version it read bumps it; a second writer with that version gets 409"""
+    task = client.get(f"/api/projects/{project}/tasks").json()[0]
+    url = f"/api/projects/{project}/tasks/{task['id']}"
+
+    response = client.put(url, json={"status": "up_next"}, headers={"If-Match": f'"{task["version"]}"'})
+    assert response.status_code == 200
+    version = response.json()["version"]
+    assert version > task["version"] and response.headers["ETag"] == f'"{version}"'
+
+    response = client.put(url, json={"status": "in_progress"},
+                          headers={"If-Match": f'"{task["version"]}"'})
+    assert response.status_code == 409
+    response = client.patch(f"/api/projects/{project}/tasks",
+                            json={task["id"]: {"priority": 2, "version": task["version"]}})
+    assert response.status_code == 409
+    response = client.delete(url, headers={"If-Match": f'"{task["version"]}"'})
+    assert response.status_code == 409
+    assert client.get(f"/api/projects/{project}/tasks").json()[0]["status"] == "up_next"
+    print(f"✅ Version {task['version']} -> {version}; stale writes got 409")
+
+
+def test_task_list_pages_by_cursor_and_serves_304(project: str, client: TestClient):
+    """Pages follow X-Next-Cursor to the end; an unchanged list is a 304 until the next write"""
+    url = f"/api/projects/{project}/tasks"
+    client.put(f"{url}/task-1", json={"priority": 5})
+
+    seen, cursor = [], None
+    while True:
+        response = client.get(url, params={"limit": 2, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200 and response.headers["X-Total-Count"] == "3"
+        seen.extend(task["id"] for task in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == ["task-2", "task-3", "task-1"]
+    up_next = client.get(url, params={"status": "up_next"})
+    assert up_next.json() == [] and up_next.headers["X-Total-Count"] == "0"
+    assert client.get(url, params={"cursor": "not-a-cursor"}).status_code == 400
+
+    etag = response.headers["ETag"]
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304 and response.content == b""
+    client.put(f"{url}/task-1", json={"status": "up_next"})
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+    print(f"✅ Paged {seen} two at a time; 304 for ETag {etag} until the next write")
+
+
+def test_change_feed_endpoint(project: str, client: TestClient):
+    """Clients poll with the returned revision and get only what changed"""
+    url = f"/api/projects/{project}/tasks"
+    revision = client.get(f"{url}/changes").json()["revision"]
+    client.put(f"{url}/task-1", json={"status": "up_next"})
+    client.delete(f"{url}/task-2")
+
+    changes = client.get(f"{url}/changes", params={"since": revision}).json()
+    assert [(task["id"], task["status"]) for task in changes["tasks"]] == [("task-1", "up_next")]
+    assert changes["deleted"] == ["task-2"] and changes["revision"] == revision + 2
+    assert client.get(f"{url}/changes", params={"since": revision + 5}).json()["reset"]
+    print(f"✅ Changes since {revision}: task-1 updated, task-2 deleted")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test that merged tasks become archive candidates however they were merged
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models import Task, TaskStatus
+from backend.task_archive import archive_candidates
+from backend.task_store import MarkdownTaskStore, task_id_from_title
+
+
+def add_task(store, number: int) -> str:
+    title = f"Task {number}"
+    store.add_task(Task(id=task_id_from_title(title), task_id=number, title=title,
+                        branch=f"task-{number}"))
+    return task_id_from_title(title)
+
+
+def test_merged_by_status_alone_is_archived_after_compaction(tmp_path: Path):
+    """A bare status update to MERGED, as the merge queue writes, stamps merged_at"""
+    store = MarkdownTaskStore(f"archive-{tmp_path.name}", tmp_path)
+    merged, open_task = add_task(store, 1), add_task(store, 2)
+    store.update_tasks({merged: {"status": TaskStatus.MERGED}})
+    store.compact()
+
+    reopened = MarkdownTaskStore(f"archive-{tmp_path.name}", tmp_path)
+    cutoff = datetime.now() + timedelta(hours=1)
+    candidates = archive_candidates(reopened.get_tasks_snapshot(), cutoff)
+    assert [task.id for task in candidates] == [merged]
+    assert candidates[0].merged_at is not None
+    assert not archive_candidates(reopened.get_tasks_snapshot(), datetime.now() - timedelta(hours=1))
+    print(f"✅ {merged} archived after compaction; {open_task} kept")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        test_merged_by_status_alone_is_archived_after_compaction(Path(tmp))
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test that the tasks.md block index stays in step with the file through splices
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models import Task, TaskStatus
+from backend.task_index import TaskBlockIndex
+from backend.task_store import (MarkdownTaskStore, read_header_revision, render_preamble,
+                                render_task_block, render_tasks_markdown, task_id_from_title)
+
+
+def make_task(number: int, **fields) -> Task:
+    title = f"Task {number}"
+    return Task(id=task_id_from_title(title), task_id=number, title=title,
+                branch=f"task-{number}", **fields)
+
+
+def test_splice_shifts_the_following_blocks(tmp_path: Path):
+    """After blocks grow and shrink, the shifted offsets match a fresh scan"""
+    path = tmp_path / "tasks.md"
+    path.write_text(render_tasks_markdown([make_task(1), make_task(2, description="Short"),
+                                           make_task(3)], revision=1))
+    index = TaskBlockIndex(path, task_id_from_title)
+    index.refresh()
+    first, = index.spans_for("task-1")
+    second, = index.spans_for("task-2")
+
+    index.splice({
+        (0, index.preamble_end): render_preamble(12).encode(),
+        first: render_task_block(make_task(1, description="A much longer description")).encode(),
+        second: render_task_block(make_task(2)).encode(),
+    })
+    rescanned = TaskBlockIndex(path, task_id_from_title)
+    rescanned.refresh()
+    assert (index.spans, index.preamble_end) == (rescanned.spans, rescanned.preamble_end)
+    assert index.read_blocks("task-3")[0].startswith("## Task: Task 3")
+    assert read_header_revision(path) == 12
+    print("✅ Spliced offsets match a rescan of the file")
+
+
+def fields(task) -> dict:
+    """Everything tasks.md keeps; updated_at is not written"""
+    values = task.to_dict()
+    values.pop("updated_at", None)
+    return values
+
+
+def test_compacting_status_updates_splices_only_their_blocks(tmp_path: Path, monkeypatch):
+    """Compaction of plain updates keeps other blocks byte for byte and reads back the same tasks"""
+    store = MarkdownTaskStore(f"splice-{tmp_path.name}", tmp_path)
+    store.replace_all([make_task(1), make_task(2), make_task(3)])
+    untouched = store.index.read_blocks("task-3")
+    store.update_tasks({"task-1": {"status": TaskStatus.IN_PROGRESS, "session": "1-demo"},
+                        "task-2": {"description": "Now described"}})
+    before = store.get_tasks_snapshot()
+
+    def rewrite(*args):
+        raise AssertionError("compaction rewrote all of tasks.md")
+    monkeypatch.setattr(store, "replace_all", rewrite)
+    store.compact()
+    assert store.journal.path.stat().st_size == 0
+    assert store.index.read_blocks("task-3") == untouched
+    assert "1-demo" in store.index.read_blocks("task-1")[0]
+    reopened = MarkdownTaskStore(store.project_id, tmp_path)
+    assert reopened.get_tasks_by_ids(["task-2"])["task-2"].description == "Now described"
+    assert list(map(fields, before)) == list(map(fields, reopened.get_tasks_snapshot()))
+    print("✅ Compaction spliced two blocks and left the third alone")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        test_splice_shifts_the_following_blocks(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp, pytest.MonkeyPatch.context() as monkeypatch:
+        test_compacting_status_updates_splices_only_their_blocks(Path(tmp), monkeypatch)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test that the markdown store's journal replays, survives crashes and compacts
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import task_journal
+from backend.models import Task, TaskStatus
+from backend.task_cache import task_cache
+from backend.task_store import MarkdownTaskStore, read_header_revision, task_id_from_title
+
+
+def make_task(number: int) -> Task:
+    title = f"Task {number}"
+    return Task(id=task_id_from_title(title), task_id=number, title=title, branch=f"task-{number}")
+
+
+def reopen(store: MarkdownTaskStore) -> MarkdownTaskStore:
+    """A fresh store on the same files, reading them rather than the cache"""
+    task_cache.invalidate(store.project_id)
+    return MarkdownTaskStore(store.project_id, store.splitmind_dir)
+
+
+def state(store: MarkdownTaskStore):
+    return [(task.id, task.status, task.version) for task in store.get_tasks_snapshot()]
+
+
+def test_journaled_changes_are_replayed_over_tasks_md(tmp_path: Path):
+    """Writes only append to the journal; a reopened store replays them, skipping a torn line"""
+    store = MarkdownTaskStore(f"journal-{tmp_path.name}", tmp_path)
+    for number in (1, 2, 3):
+        store.add_task(make_task(number))
+    store.update_tasks({"task-1": {"status": TaskStatus.UP_NEXT}})
+    store.delete_task("task-3")
+    assert not store.tasks_file.exists()
+
+    with open(store.journal.path, "a") as f:
+        f.write('{"op": "update", "rev": 99, "id": "task-2", "fie')
+    reopened = reopen(store)
+    assert state(reopened) == [("task-1", TaskStatus.UP_NEXT, 4),
+                               ("task-2", TaskStatus.UNCLAIMED, 2)]
+    assert reopened.revision() == 5
+    print("✅ Journal replayed over an empty tasks.md; torn entry ignored")
+
+
+def test_crash_between_snapshot_rename_and_truncate(tmp_path: Path, monkeypatch):
+    """If compaction dies after replacing tasks.md, the stale journal is not applied twice"""
+    store = MarkdownTaskStore(f"crash-{tmp_path.name}", tmp_path)
+    for number in (1, 2):
+        store.add_task(make_task(number))
+    store.update_tasks({"task-2": {"status": TaskStatus.COMPLETED}})
+    before = state(store)
+
+    def crash():
+        raise OSError("killed before truncate")
+    monkeypatch.setattr(store.journal, "truncate", crash)
+    with pytest.raises(OSError):
+        store.compact()
+    assert read_header_revision(store.tasks_file) == 3
+    assert store.journal.read()
+
+    reopened = reopen(store)
+    assert state(reopened) == before
+    reopened.update_tasks({"task-1": {"status": TaskStatus.UP_NEXT}})
+    assert reopened.revision() == 4
+    assert [task.id for task in reopen(store).get_tasks_snapshot()] == ["task-1", "task-2"]
+    print("✅ Snapshot and leftover journal read back without duplicates")
+
+
+def test_journal_is_compacted_in_the_background(tmp_path: Path, monkeypatch):
+    """Once the journal passes its size limit, it is folded into tasks.md off the writer's thread"""
+    monkeypatch.setattr(task_journal, "COMPACT_MAX_ENTRIES", 3)
+    store = MarkdownTaskStore(f"background-{tmp_path.name}", tmp_path)
+    for number in (1, 2, 3):
+        store.add_task(make_task(number))
+
+    deadline = time.monotonic() + 5
+    while store.journal.path.stat().st_size and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.journal.path.stat().st_size == 0
+    assert read_header_revision(store.tasks_file) == 3
+    assert [task.id for task in reopen(store).get_tasks_snapshot()] == ["task-1", "task-2", "task-3"]
+    print("✅ Journal compacted into tasks.md in the background")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        test_journaled_changes_are_replayed_over_tasks_md(Path(tmp))
+    for test in (test_crash_between_snapshot_rename_and_truncate,
+                 test_journal_is_compacted_in_the_background):
+        with tempfile.TemporaryDirectory() as tmp, pytest.MonkeyPatch.context() as monkeypatch:
+            test(Path(tmp), monkeypatch)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Test revisions, versions and change feeds of both task stores
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import task_changes
+from backend.blob_store import is_blob_ref
+from backend.models import Task, TaskStatus
+from backend.task_store import TASK_STORES, TaskConflictError, task_id_from_title
+
+BACKENDS = sorted(TASK_STORES)
+
+
+def make_task(number: int, **fields) -> Task:
+    title = f"Task {number}"
+    return Task(id=task_id_from_title(title), task_id=number, title=title,
+                branch=f"task-{number}", **fields)
+
+
+def open_store(backend: str, tmp_path: Path):
+    return TASK_STORES[backend](f"{backend}-{tmp_path.name}", tmp_path)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_replaced_tasks_get_the_new_revision(backend: str, tmp_path: Path):
+    """Tasks carried over from another store don't keep versions ahead of this one"""
+    store = open_store(backend, tmp_path)
+    store.add_task(make_task(1))
+    store.replace_all([make_task(1, version=500), make_task(2, version=700)])
+
+    revision = store.revision()
+    assert revision < 500
+    assert {task.version for task in store.get_tasks_snapshot()} == {revision}
+    assert store.get_changes(revision)["tasks"] == []
+    print(f"✅ {backend}: replaced tasks stamped with revision {revision}")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_update_tasks_writes_a_batch_all_or_nothing(backend: str, tmp_path: Path):
+    """A batch is written under one revision, and an unknown or stale task stops all of it"""
+    store = open_store(backend, tmp_path)
+    for number in (1, 2, 3):
+        store.add_task(make_task(number))
+
+    updated = store.update_tasks({"task-1": {"status": TaskStatus.UP_NEXT},
+                                  "task-3": {"status": TaskStatus.UP_NEXT, "session": "3-demo"}})
+    assert store.revision() == 4
+    assert [(task.id, task.version) for task in updated] == [("task-1", 4), ("task-3", 4)]
+
+    for updates, expected, error in (
+        ({"task-2": {"status": TaskStatus.UP_NEXT}, "task-9": {"priority": 1}}, None, ValueError),
+        ({"task-1": {"status": TaskStatus.IN_PROGRESS}, "task-2": {"status": TaskStatus.UP_NEXT}},
+         {"task-1": 1}, TaskConflictError),
+    ):
+        with pytest.raises(error):
+            store.update_tasks(updates, expected)
+    assert store.revision() == 4
+    assert [(task.id, task.status) for task in store.get_tasks_snapshot()] == [
+        ("task-1", TaskStatus.UP_NEXT), ("task-2", TaskStatus.UNCLAIMED), ("task-3", TaskStatus.UP_NEXT)]
+    print(f"✅ {backend}: batch written at revision 4; failing batches wrote nothing")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_change_feed_returns_deltas_and_tombstones(backend: str, tmp_path: Path, monkeypatch):
+    """Changes since a revision hold the tasks written and IDs deleted or renamed away"""
+    store = open_store(backend, tmp_path)
+    for number in (1, 2, 3, 4):
+        store.add_task(make_task(number))
+    since = store.revision()
+
+    store.update_tasks({"task-1": {"status": TaskStatus.UP_NEXT}})
+    store.delete_task("task-2")
+    store.update_tasks({"task-3": {"title": "Task 3 renamed"}})
+    changes = store.get_changes(since)
+    assert not changes["reset"] and changes["revision"] == since + 3
+    assert sorted(task.id for task in changes["tasks"]) == ["task-1", "task-3-renamed"]
+    assert changes["deleted"] == ["task-2", "task-3"]
+    latest = store.get_changes(since + 2)
+    assert [task.id for task in latest["tasks"]] == ["task-3-renamed"]
+    assert latest["deleted"] == ["task-3"]
+    assert store.get_changes(changes["revision"])["tasks"] == []
+    assert store.get_changes(changes["revision"] + 1)["reset"]
+
+    # Once tombstones are pruned, clients from before the dropped ones must resync
+    monkeypatch.setattr(task_changes, "MAX_TOMBSTONES", 1)
+    store.delete_task("task-4")
+    assert store.get_changes(since)["reset"]
+    assert store.get_changes(since + 3)["deleted"] == ["task-4"]
+    print(f"✅ {backend}: deltas and tombstones since {since}; resync after pruning")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_long_prompts_round_trip_through_blobs(backend: str, tmp_path: Path):
+    """Stores keep only a blob reference for long prompts and hand out the full text"""
+    prompt = "Build the parser.\n\n" + "Handle every edge case. " * 40
+    store = open_store(backend, tmp_path)
+    store.add_task(make_task(1, prompt=prompt))
+    store.add_task(make_task(2, prompt=prompt))
+    store.add_task(make_task(3, prompt="Short"))
+    store.update_tasks({"task-2": {"prompt": prompt + "Then test it."}})
+    if backend == "markdown":
+        store.compact()
+
+    records = {task.id: task for task in store.get_tasks_snapshot()}
+    assert is_blob_ref(records["task-1"].prompt) and records["task-3"].prompt == "Short"
+    assert store.get_task("task-1").prompt == prompt
+    assert store.task_dict(records["task-2"])["prompt"] == prompt + "Then test it."
+    assert len([path for path in (tmp_path / "blobs").rglob("*") if path.is_file()]) == 2
+    stored = b"".join(path.read_bytes() for path in tmp_path.iterdir() if path.is_file())
+    assert b"Handle every edge case" not in stored
+    print(f"✅ {backend}: prompts stored once as blobs and read back in full")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_prompts_that_look_like_blob_refs_stay_text(backend: str, tmp_path: Path):
+    """A prompt starting with the blob prefix is stored as a blob, not taken for a reference"""
+    prompts = ["blob:sha256:not a digest", "blob:sha256:" + "0" * 64]
+    store = open_store(backend, tmp_path)
+    for number, prompt in enumerate(prompts, 1):
+        store.add_task(make_task(number, prompt=prompt))
+    store.update_tasks({"task-1": {"prompt": prompts[0] + "!"}})
+    if backend == "markdown":
+        store.compact()
+    assert [store.get_task(f"task-{n}").prompt for n in (1, 2)] == [prompts[0] + "!", prompts[1]]
+    print(f"✅ {backend}: prompts with the blob prefix read back as written")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_snapshot_lists_cannot_be_changed_in_place(backend: str, tmp_path: Path):
+    """Cached records hold tuples; tasks built from them get lists of their own"""
+    store = open_store(backend, tmp_path)
+    store.add_task(make_task(1))
+    store.add_task(make_task(2, dependencies=["task-1"], shared_files=["package.json"]))
+    record = store.get_tasks_snapshot()[1]
+    assert record.dependencies == ("task-1",) and record.shared_files == ("package.json",)
+    with pytest.raises(AttributeError):
+        record.dependencies.append("task-3")
+
+    task = store.load_task(record)
+    task.dependencies.append("task-3")
+    assert store.task_dict(record)["dependencies"] == ["task-1"]
+    assert store.get_tasks_snapshot()[1].dependencies == ("task-1",)
+    print(f"✅ {backend}: snapshot lists are tuples, handed out as fresh lists")
+
+
+if __name__ == "__main__":
+    for backend in BACKENDS:
+        with tempfile.TemporaryDirectory() as tmp:
+            test_replaced_tasks_get_the_new_revision(backend, Path(tmp))
+        with tempfile.TemporaryDirectory() as tmp:
+            test_update_tasks_writes_a_batch_all_or_nothing(backend, Path(tmp))
+        with tempfile.TemporaryDirectory() as tmp, pytest.MonkeyPatch.context() as monkeypatch:
+            test_change_feed_returns_deltas_and_tombstones(backend, Path(tmp), monkeypatch)
+        with tempfile.TemporaryDirectory() as tmp:
+            test_long_prompts_round_trip_through_blobs(backend, Path(tmp))
+        with tempfile.TemporaryDirectory() as tmp:
+            test_prompts_that_look_like_blob_refs_stay_text(backend, Path(tmp))
+        with tempfile.TemporaryDirectory() as tmp:
+            test_snapshot_lists_cannot_be_changed_in_place(backend, Path(tmp))
@@ -37,7 +37,7 @@ export function OrchestratorControl({ projectId }: OrchestratorControlProps) {
 
   // Stop orchestrator
   const stopMutation = useMutation({
-    mutationFn: api.stopOrchestrator,
+    mutationFn: () => api.stopOrchestrator(projectId),
     onSuccess: () => refetchStatus(),
   });
 
@@ -47,7 +47,9 @@ export function OrchestratorControl({ projectId }: OrchestratorControlProps) {
     onSuccess: () => refetchConfig(),
   });
 
-  const isRunning = status?.running && status?.current_project === projectId;
+  const isRunning = status?.projects
+    ? status.projects.includes(projectId)
+    : status?.running && status?.current_project === projectId;
 
   return (
     <Card className="bg-deep-indigo/50 border-electric-cyan/20 hover:border-electric-cyan/40 transition-all">
@@ -22,6 +22,7 @@ const statusColumns = [
   { id: TaskStatus.IN_PROGRESS, title: 'WORKING', color: 'bg-yellow-500' },
   { id: TaskStatus.COMPLETED, title: 'DONE', color: 'bg-green-500' },
   { id: TaskStatus.MERGED, title: 'MERGED', color: 'bg-purple-500' },
+  { id: TaskStatus.QUARANTINED, title: 'QUARANTINED', color: 'bg-red-500' },
 ];
 
 export function TaskBoard({ projectId }: TaskBoardProps) {
@@ -38,9 +39,11 @@ export function TaskBoard({ projectId }: TaskBoardProps) {
     switch (message.type) {
       case 'task_created':
       case 'task_updated':
+      case 'tasks_updated':
       case 'task_deleted':
       case 'tasks_reset':
       case 'task_status_changed':
+      case 'task_quarantined':
         // Invalidate and refetch tasks immediately
         queryClient.invalidateQueries({ queryKey: ['tasks', projectId] });
         break;
@@ -138,7 +141,7 @@ export function TaskBoard({ projectId }: TaskBoardProps) {
         </div>
       </div>
 
-      <div className="grid grid-cols-5 gap-4">
+      <div className="grid grid-cols-6 gap-4">
         {statusColumns.map((column) => (
           <div
             key={column.id}
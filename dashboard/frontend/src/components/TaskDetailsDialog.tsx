@@ -103,6 +103,17 @@ export function TaskDetailsDialog({ projectId, task, open, onOpenChange }: TaskD
     }
   });
 
+  const retryTaskMutation = useMutation({
+    mutationFn: () => api.retryTask(projectId, task!.id),
+    onSuccess: () => {
+      queryClient.invalidateQueries({ queryKey: ['tasks', projectId] });
+    },
+    onError: (error: any) => {
+      console.error('Failed to retry task:', error);
+      alert(`Failed to retry task: ${error.message}`);
+    }
+  });
+
   const handleSave = () => {
     if (!task) return;
     
@@ -185,6 +196,18 @@ export function TaskDetailsDialog({ projectId, task, open, onOpenChange }: TaskD
                   <RotateCcw className="w-4 h-4" />
                 </Button>
               )}
+              {task.status === TaskStatus.QUARANTINED && (
+                <Button
+                  variant="ghost"
+                  size="icon"
+                  onClick={() => retryTaskMutation.mutate()}
+                  className="h-8 w-8 text-yellow-500 hover:text-yellow-600"
+                  disabled={retryTaskMutation.isPending}
+                  title="Retry task with a fresh attempt budget"
+                >
+                  <RotateCcw className="w-4 h-4" />
+                </Button>
+              )}
               {task.status === TaskStatus.COMPLETED && (
                 <Button
                   variant="ghost"
@@ -295,6 +318,7 @@ export function TaskDetailsDialog({ projectId, task, open, onOpenChange }: TaskD
                   <SelectItem value={TaskStatus.IN_PROGRESS}>In Progress</SelectItem>
                   <SelectItem value={TaskStatus.COMPLETED}>Completed</SelectItem>
                   <SelectItem value={TaskStatus.MERGED}>Merged</SelectItem>
+                  <SelectItem value={TaskStatus.QUARANTINED}>Quarantined</SelectItem>
                 </SelectContent>
               </Select>
             ) : (
@@ -302,6 +326,19 @@ export function TaskDetailsDialog({ projectId, task, open, onOpenChange }: TaskD
             )}
           </div>
           
+          {!!task.attempts && (
+            <div className="grid gap-2">
+              <Label>Failed Attempts</Label>
+              <p className="text-sm">
+                {task.attempts}
+                {task.retry_after && ` · retrying after ${new Date(task.retry_after).toLocaleTimeString()}`}
+              </p>
+              {task.last_failure && (
+                <p className="text-xs text-red-400 font-mono">{task.last_failure}</p>
+              )}
+            </div>
+          )}
+          
           <div className="grid gap-2">
             <Label>Task ID</Label>
             <p className="text-sm font-mono">{task.task_id || 'Not assigned'}</p>
@@ -89,6 +89,12 @@ class ApiService {
     });
   }
 
+  retryTask = async (projectId: string, taskId: string): Promise<Task> => {
+    return this.request(`/projects/${projectId}/tasks/${encodeURIComponent(taskId)}/retry`, {
+      method: 'POST',
+    });
+  }
+
   mergeTask = async (projectId: string, taskId: string): Promise<void> => {
     await this.request(`/projects/${projectId}/tasks/${encodeURIComponent(taskId)}/merge`, {
       method: 'POST',
@@ -147,13 +153,14 @@ class ApiService {
     });
   }
 
-  stopOrchestrator = async (): Promise<void> => {
-    await this.request('/orchestrator/stop', {
+  stopOrchestrator = async (projectId?: string): Promise<void> => {
+    const query = projectId ? `?project_id=${projectId}` : '';
+    await this.request(`/orchestrator/stop${query}`, {
       method: 'POST',
     });
   }
 
-  getOrchestratorStatus = async (): Promise<{ running: boolean; current_project?: string }> => {
+  getOrchestratorStatus = async (): Promise<{ running: boolean; current_project?: string; projects?: string[] }> => {
     return this.request('/orchestrator/status');
   }
 
@@ -25,6 +25,9 @@ export interface Task {
   session?: string;
   dependencies?: string[];
   priority?: number;
+  attempts?: number;
+  last_failure?: string;
+  retry_after?: string;
   created_at: string;
   updated_at: string;
   completed_at?: string;
@@ -37,6 +40,7 @@ export enum TaskStatus {
   IN_PROGRESS = "in_progress",
   COMPLETED = "completed",
   MERGED = "merged",
+  QUARANTINED = "quarantined",
 }
 
 export interface Agent {